@@ -0,0 +1,35 @@
+"""
+Перенос выполненных задач, не менявшихся заданное число дней, в архив (task_archive).
+
+То же делает фоновая задача воркеров раз в TASK_ARCHIVE_INTERVAL секунд;
+скрипт нужен, если она выключена (TASK_ARCHIVE_INTERVAL=0), и для первого
+переноса накопившихся задач. Повторный запуск безопасен.
+
+    python -m src.archive_tasks
+    python -m src.archive_tasks --after-days 90 --batch-size 5000
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+from src.config import settings
+from src.database import engine
+from src.task_logic.task_archive import archive_completed_tasks
+
+
+async def main(after_days: int, batch_size: int):
+    started = time.perf_counter()
+    archived = await archive_completed_tasks(after_days, batch_size)
+    await engine.dispose()
+    if archived is None:
+        sys.exit("archiving is already running (in a worker or another run), try again later")
+    print(f"archived {archived} task(s) in {time.perf_counter() - started:.1f} s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--after-days", type=int, default=settings.TASK_ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--batch-size", type=int, default=settings.TASK_ARCHIVE_BATCH_SIZE)
+    args = parser.parse_args()
+    asyncio.run(main(args.after_days, args.batch_size))
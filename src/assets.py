@@ -0,0 +1,51 @@
+import hashlib
+import mimetypes
+import os
+from typing import Dict, NamedTuple, Optional
+
+# Статические файлы доски задач (src/static) отдаются под именами с хешем
+# содержимого: task-board.css -> task-board.1a2b3c4d.css. Имя меняется вместе
+# с содержимым, поэтому файлы можно кэшировать в браузере без ревалидации.
+
+STATIC_DIR = os.path.join(os.path.dirname(__file__), "static")
+STATIC_URL = "/static"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+class Asset(NamedTuple):
+    name: str
+    fingerprinted_name: str
+    content: bytes
+    media_type: str
+    etag: str
+
+
+def load_assets(directory: str = STATIC_DIR) -> Dict[str, Asset]:
+    assets = {}
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if not os.path.isfile(path):
+            continue
+        with open(path, "rb") as f:
+            content = f.read()
+        digest = hashlib.sha256(content).hexdigest()[:12]
+        stem, ext = os.path.splitext(name)
+        media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        if media_type.startswith("text/") or media_type == "application/javascript":
+            media_type += "; charset=utf-8"
+        assets[name] = Asset(name, f"{stem}.{digest}{ext}", content, media_type, f'"{digest}"')
+    return assets
+
+
+# Загружаются один раз при импорте: файлы меняются только с новой версией приложения
+assets = load_assets()
+assets_by_fingerprint = {asset.fingerprinted_name: asset for asset in assets.values()}
+
+
+# Используется в шаблонах: {{ asset_url('task-board.css') }}
+def asset_url(name: str) -> str:
+    return f"{STATIC_URL}/{assets[name].fingerprinted_name}"
+
+
+def get_asset(fingerprinted_name: str) -> Optional[Asset]:
+    return assets_by_fingerprint.get(fingerprinted_name)
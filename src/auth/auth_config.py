@@ -41,3 +41,29 @@ fastapi_users = FastAPIUsers[User, int](
 # async def protected_route(user: User = Depends(current_user)):
 
 current_user = fastapi_users.current_user(active=True)
+
+# Dependency для служебных маршрутов, доступных только суперпользователю
+current_superuser = fastapi_users.current_user(active=True, superuser=True)
+
+
+from typing import Optional
+
+from fastapi import WebSocket
+
+from src.auth.manager import UserManager
+from src.auth.user_repository import CachedUserDatabase
+from src.database import async_session_maker
+
+
+# Аутентификация WebSocket-подключения тем же JWT из куки, что и у current_user.
+# Сессия БД открывается только на время проверки токена, а не на все время жизни сокета.
+async def authenticate_websocket(websocket: WebSocket) -> Optional[User]:
+    token = websocket.cookies.get(cookie_transport.cookie_name)
+    if not token:
+        return None
+    async with async_session_maker() as session:
+        user_manager = UserManager(CachedUserDatabase(session, User))
+        user = await get_access_strategy().read_token(token, user_manager)
+    if user is None or not user.is_active:
+        return None
+    return user
@@ -0,0 +1,79 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+
+from fastapi_users.password import PasswordHelperProtocol
+
+from src.metrics import PASSWORD_HASH_QUEUE_WAIT
+
+
+class PasswordHashExecutor:
+    """
+    Хеширование и проверка паролей в отдельном пуле потоков.
+
+    bcrypt занимает процессор на сотни миллисекунд и освобождает GIL, поэтому в
+    пуле потоков он не блокирует цикл событий: остальные запросы и WebSocket
+    продолжают обслуживаться. Размер пула ограничивает число одновременных
+    хеширований, остальные задачи ждут в очереди — время ожидания учитывается
+    в статистике.
+    """
+
+    def __init__(self, password_helper: PasswordHelperProtocol, max_workers: int):
+        self.password_helper = password_helper
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hash")
+        self._lock = threading.Lock()
+        self.queued = 0  # задачи, ожидающие свободного потока
+        self.calls = 0
+        self.queue_wait_total = 0.0  # sec
+        self.queue_wait_max = 0.0  # sec
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.password_helper.hash, password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        return await self._run(self.password_helper.verify_and_update, plain_password, hashed_password)
+
+    async def _run(self, func: Callable, *args):
+        submitted = time.perf_counter()
+        started = False
+        with self._lock:
+            self.queued += 1
+
+        def job():
+            nonlocal started
+            waited = time.perf_counter() - submitted
+            with self._lock:
+                started = True
+                self.queued -= 1
+                self.calls += 1
+                self.queue_wait_total += waited
+                self.queue_wait_max = max(self.queue_wait_max, waited)
+            PASSWORD_HASH_QUEUE_WAIT.observe(waited)
+            return func(*args)
+
+        # Задача, отмененная в очереди (клиент отключился, остановка пула), не
+        # запускается: из очереди ее убирает обратный вызов завершения
+        def dequeue_cancelled(_):
+            with self._lock:
+                if not started:
+                    self.queued -= 1
+
+        future = self._executor.submit(job)
+        future.add_done_callback(dequeue_cancelled)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "queued": self.queued,
+                "calls": self.calls,
+                "queue_wait_avg": self.queue_wait_total / self.calls if self.calls else 0.0,
+                "queue_wait_max": self.queue_wait_max,
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -1,3 +1,4 @@
+import logging
 from typing import Optional, Dict, Union
 
 from fastapi import Depends, Request, Response, HTTPException, status
@@ -6,24 +7,36 @@ from fastapi_users import (BaseUserManager, IntegerIDMixin, exceptions, models,
                            schemas)
 from fastapi_users.password import PasswordHelper
 from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
 from pwdlib.hashers.bcrypt import BcryptHasher
 
 from src.config import settings
+from .hashing import PasswordHashExecutor
 from .models import User
 from .user_repository import get_user_db
 
+logger = logging.getLogger(__name__)
+
+# Новые хеши — bcrypt; argon2 оставлен только для проверки ранее сохраненных
+# хешей, которые при входе перехешируются в bcrypt (verify_and_update)
 password_hash = PasswordHash((
-    BcryptHasher(rounds=14),
+    BcryptHasher(rounds=settings.BCRYPT_ROUNDS),
+    Argon2Hasher(),
 ))
 
 password_helper_bc = PasswordHelper(password_hash)
 
+# Хеширование паролей вне цикла событий
+password_hasher = PasswordHashExecutor(password_helper_bc, settings.PASSWORD_HASH_WORKERS)
+
 
 class UserManager(IntegerIDMixin, BaseUserManager[User, int]):
-    password_helper = password_helper_bc
+    def __init__(self, user_db, password_helper: PasswordHelper = password_helper_bc):
+        # BaseUserManager по умолчанию подставляет собственный PasswordHelper
+        super().__init__(user_db, password_helper)
 
     async def on_after_register(self, user: User, request: Optional[Request] = None):
-        print(f"User {user.id} has registered.")
+        logger.info("User %s has registered.", user.id)
 
     async def create(
             self,
@@ -43,7 +56,7 @@ class UserManager(IntegerIDMixin, BaseUserManager[User, int]):
             else user_create.create_update_dict_superuser()
         )
         password = user_dict.pop("password")
-        user_dict["hashed_password"] = self.password_helper.hash(password)
+        user_dict["hashed_password"] = await password_hasher.hash(password)
         user_dict["role_id"] = 1
 
         # Создаем пользователя в базе данных
@@ -59,7 +72,7 @@ class UserManager(IntegerIDMixin, BaseUserManager[User, int]):
             request: Optional[Request] = None,
             response: Optional[Response] = None,
     ):
-        print(f"User {user.id} logged in.")
+        logger.info("User %s logged in.", user.id)
 
     async def on_after_logout(
             self,
@@ -67,7 +80,7 @@ class UserManager(IntegerIDMixin, BaseUserManager[User, int]):
             request: Optional[Request] = None,
             response: Optional[Response] = None,
     ):
-        print(f"User {user.id} logged out.")
+        logger.info("User %s logged out.", user.id)
 
     async def authenticate(
             self,
@@ -87,14 +100,14 @@ class UserManager(IntegerIDMixin, BaseUserManager[User, int]):
             user = await self.get_by_email(email)
         except exceptions.UserNotExists:
             # Защита от timing-атак: хешируем пароль даже если пользователь не существует
-            self.password_helper.hash(password)
+            await password_hasher.hash(password)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid credentials"
             )
 
         # Проверка пароля и получение нового хеша (если алгоритм устарел)
-        verified, updated_password_hash = self.password_helper.verify_and_update(
+        verified, updated_password_hash = await password_hasher.verify_and_update(
             password, user.hashed_password
         )
         if not verified:
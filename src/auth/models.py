@@ -1,6 +1,8 @@
 from datetime import datetime
 from fastapi_users_db_sqlalchemy import SQLAlchemyBaseUserTable
-from sqlalchemy import JSON, TIMESTAMP, Boolean, ForeignKey, Integer, String
+from sqlalchemy import (JSON, TIMESTAMP, BigInteger, Boolean, Computed, ForeignKey, Index, Integer, String,
+                        text)
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy import ARRAY, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from src.database import Base
@@ -15,15 +17,95 @@ class Role(Base):
 
 from typing import List  # Добавляем импорт
 
+# Конфигурация текстового поиска: 'simple' не зависит от языка (задачи пишут и на русском, и на английском)
+TASK_SEARCH_CONFIG = "simple"
+
+# Номер ленты изменений (change_seq) берется из общей последовательности task_change_seq
+# функцией task_next_change_seq под блокировкой владельца: новым задачам и tombstone —
+# триггером, измененным — в UPDATE (BUMP_VERSION), см. миграции 0003 и 0005
+
 class Task(Base):
     __tablename__ = "task"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     title: Mapped[str] = mapped_column(String, index=True)
-    description: Mapped[str] = mapped_column(String, index=True)
+    description: Mapped[str] = mapped_column(String)
     completed: Mapped[bool] = mapped_column(Boolean, default=False)
+    # Номер версии растет на каждом изменении: ETag и оптимистичная блокировка (If-Match)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default=text("1"))
+    updated_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP, nullable=False, server_default=text("timezone('utc', now())")
+    )
+    # Номер последнего изменения в ленте /tasks/changes
+    change_seq: Mapped[int] = mapped_column(BigInteger, nullable=False)
     owner_id: Mapped[int] = mapped_column(Integer, ForeignKey("person.id"))
     owner: Mapped["User"] = relationship("User", back_populates="tasks")
+    # Вычисляемый tsvector для полнотекстового поиска: заголовок весомее описания
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed(
+            f"setweight(to_tsvector('{TASK_SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+            f"setweight(to_tsvector('{TASK_SEARCH_CONFIG}', coalesce(description, '')), 'B')",
+            persisted=True,
+        ),
+        deferred=True,
+    )
+
+    __table_args__ = (
+        # Индекс под keyset-пагинацию: WHERE owner_id = ? AND id > ? ORDER BY id
+        Index("ix_task_owner_id_id", "owner_id", "id"),
+        # Индекс под полнотекстовый поиск: WHERE search_vector @@ tsquery
+        Index("ix_task_search_vector", "search_vector", postgresql_using="gin"),
+        # Индекс под ленту изменений: WHERE owner_id = ? AND change_seq > ? ORDER BY change_seq
+        Index("ix_task_owner_id_change_seq", "owner_id", "change_seq"),
+        # Индекс под перенос в архив: WHERE completed AND updated_at < ? ORDER BY updated_at
+        Index("ix_task_completed_updated_at", "updated_at", postgresql_where=text("completed")),
+    )
+
+# Удаленные задачи для ленты изменений: id и номер изменения, остальные поля не нужны
+class TaskTombstone(Base):
+    __tablename__ = "task_tombstone"
+
+    task_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    owner_id: Mapped[int] = mapped_column(Integer, ForeignKey("person.id", ondelete="CASCADE"))
+    change_seq: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    deleted_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP, nullable=False, server_default=text("timezone('utc', now())")
+    )
+
+    __table_args__ = (
+        Index("ix_task_tombstone_owner_id_change_seq", "owner_id", "change_seq"),
+    )
+
+# Холодное хранилище: выполненные задачи старше TASK_ARCHIVE_AFTER_DAYS, перенесенные
+# из task фоновой задачей (task_archive.py). Те же поля без search_vector, только чтение.
+class TaskArchive(Base):
+    __tablename__ = "task_archive"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    title: Mapped[str] = mapped_column(String, nullable=False)
+    description: Mapped[str] = mapped_column(String, nullable=False)
+    completed: Mapped[bool] = mapped_column(Boolean, nullable=False)
+    version: Mapped[int] = mapped_column(Integer, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(TIMESTAMP, nullable=False)
+    change_seq: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    owner_id: Mapped[int] = mapped_column(Integer, ForeignKey("person.id"), nullable=False)
+    archived_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP, nullable=False, server_default=text("timezone('utc', now())")
+    )
+
+    __table_args__ = (
+        Index("ix_task_archive_owner_id_id", "owner_id", "id"),
+    )
+
+# Счетчики задач владельца. Таблицу обновляют триггеры на task и task_archive (миграции 0002, 0004),
+# приложение только читает ее и сверяет с задачами (reconcile_counters)
+class TaskCounter(Base):
+    __tablename__ = "task_counter"
+
+    owner_id: Mapped[int] = mapped_column(Integer, ForeignKey("person.id", ondelete="CASCADE"), primary_key=True)
+    total: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    completed: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
 
 class User(SQLAlchemyBaseUserTable[int], Base):
     __tablename__ = "person"
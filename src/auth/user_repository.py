@@ -1,12 +1,65 @@
+from typing import Any, Dict, Optional
+
 from fastapi import Depends
 from fastapi_users_db_sqlalchemy import SQLAlchemyUserDatabase
+from sqlalchemy import inspect
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 
 from src.auth.models import User
+from src.cache import MISSING, TTLCache
+from src.config import settings
 from src.database import get_async_session
 
+# Кэш аутентифицированных пользователей по id: current_user на каждом защищенном
+# маршруте загружает пользователя, для частых пользователей запрос к БД не нужен.
+# Хранятся значения колонок, а не ORM-объект: каждый запрос получает свой экземпляр.
+user_cache = TTLCache(max_size=settings.USER_CACHE_MAX_SIZE, ttl=settings.USER_CACHE_TTL)
+
+USER_COLUMNS = [attr.key for attr in inspect(User).column_attrs]
+
+
+def snapshot_user(user: User) -> Dict[str, Any]:
+    return {key: getattr(user, key) for key in USER_COLUMNS}
+
+
+def restore_user(snapshot: Dict[str, Any]) -> User:
+    # Объект в состоянии detached: при session.add() он будет обновлен, а не вставлен
+    user = User(**snapshot)
+    make_transient_to_detached(user)
+    return user
+
+
+class CachedUserDatabase(SQLAlchemyUserDatabase):
+    """
+    SQLAlchemyUserDatabase с кэшем get() по id.
+
+    Любое изменение пользователя через update()/delete() (смена is_active, роли,
+    пароля, перехеширование при входе) сбрасывает запись кэша. Изменения в обход
+    приложения видны не позже чем через USER_CACHE_TTL секунд.
+    """
+
+    async def get(self, id: int) -> Optional[User]:
+        snapshot = user_cache.get(id)
+        if snapshot is not MISSING:
+            return restore_user(snapshot)
+        user = await super().get(id)
+        if user is not None:
+            user_cache.set(id, snapshot_user(user))
+        return user
+
+    async def update(self, user: User, update_dict: Dict[str, Any]) -> User:
+        user = await super().update(user, update_dict)
+        # После commit: параллельный get() мог успеть закэшировать старые значения
+        user_cache.delete(user.id)
+        return user
+
+    async def delete(self, user: User) -> None:
+        user_id = user.id
+        await super().delete(user)
+        user_cache.delete(user_id)
+
 
 # Асинхронная функция возвращает объект базы данных пользователей
 async def get_user_db(session: AsyncSession = Depends(get_async_session)):
-    yield SQLAlchemyUserDatabase(session, User)
-
+    yield CachedUserDatabase(session, User)
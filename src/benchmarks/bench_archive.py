@@ -0,0 +1,134 @@
+"""
+Задержка GET /tasks/ на перекошенном наборе задач до и после переноса
+выполненных задач в архив (task_archive).
+
+Скрипт генерирует N задач одним INSERT ... SELECT generate_series, поровну
+между --owners владельцами. Набор перекошен как у долго живущего сервиса:
+задачи с меньшим id старше (updated_at равномерно за --span-days дней),
+выполнена каждая, кроме каждой десятой, — большая часть строк task оказывается
+старыми выполненными задачами. Замеры делаются от имени одного владельца:
+первая страница, keyset-страница из середины списка и страница через OFFSET,
+затем выполняется перенос (TASK_ARCHIVE_AFTER_DAYS) и замеры повторяются,
+в том числе с include_archived=true. Перед каждой серией — VACUUM ANALYZE.
+
+    python -m src.benchmarks.bench_archive --rows 10000000 --owners 100
+"""
+import argparse
+import asyncio
+import time
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import text
+
+from src.benchmarks.common import asgi_client, register_and_login, timed
+from src.config import settings
+from src.database import async_session_maker, engine
+from src.task_logic import task_repository
+from src.task_logic.pagination import encode_cursor
+from src.task_logic.task_archive import archive_completed_tasks
+
+
+async def generate_tasks(email: str, rows: int, owners: int, span_days: int) -> int:
+    async with engine.begin() as conn:
+        # Остальные владельцы — копии зарегистрированного пользователя
+        await conn.execute(text(
+            "INSERT INTO person (email, username, hashed_password, role_id, registered_at, "
+            "is_active, is_superuser, is_verified) "
+            "SELECT g || '-' || u.email, u.username, u.hashed_password, u.role_id, u.registered_at, true, false, false "
+            "FROM generate_series(1, :count) g, person u WHERE u.email = :email"
+        ), {"count": owners - 1, "email": email})
+        owner_ids = (await conn.execute(text(
+            "SELECT array_agg(id ORDER BY id) FROM person WHERE email LIKE '%' || :email"
+        ), {"email": email})).scalar_one()
+        await conn.execute(text(
+            "INSERT INTO task (title, description, completed, updated_at, owner_id) "
+            "SELECT 'task ' || g, 'generated for archive benchmark', g % 10 <> 0, "
+            "timezone('utc', now()) - make_interval(secs => (:rows - g) * 86400.0 * :span_days / :rows), "
+            "(CAST(:owner_ids AS INTEGER[]))[1 + g % :owners] "
+            "FROM generate_series(1, :rows) g"
+        ), {"rows": rows, "span_days": span_days, "owner_ids": owner_ids, "owners": owners})
+        return await conn.scalar(text("SELECT id FROM person WHERE email = :email"), {"email": email})
+
+
+async def vacuum_analyze() -> None:
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("VACUUM ANALYZE task"))
+        await conn.execute(text("VACUUM ANALYZE task_archive"))
+
+
+async def table_sizes() -> str:
+    async with engine.connect() as conn:
+        hot, cold = (await conn.execute(text(
+            "SELECT pg_total_relation_size('task'), pg_total_relation_size('task_archive')"
+        ))).one()
+    return f"task {hot / 2**20:.0f} MiB, task_archive {cold / 2**20:.0f} MiB"
+
+
+# Каждая страница — через API (GET /tasks/) и напрямую запросом репозитория:
+# на страницу из 100 задач время запроса к базе заметно меньше накладных расходов HTTP
+async def measure(client, owner_id: int, repeat: int, skip: int,
+                  include_archived: bool) -> Dict[str, Tuple[Dict[str, float], Dict[str, float]]]:
+    params = {"limit": 100, "include_archived": str(include_archived).lower()}
+
+    async def get(extra: Dict):
+        response = await client.get("/tasks/", params={**params, **extra})
+        response.raise_for_status()
+        return response
+
+    async def query(after_id: Optional[int] = None, skip: int = 0):
+        async with async_session_maker() as db:
+            return await task_repository.list_tasks(db, owner_id, 100, after_id=after_id, skip=skip,
+                                                    include_archived=include_archived)
+
+    # Курсор страницы из середины списка владельца
+    middle = await query(skip=skip)
+    after_id = middle[0]["id"] if middle else None
+    keyset = {"after": encode_cursor({"id": after_id})} if after_id is not None else {}
+    return {
+        "first page": (await timed(lambda: get({}), repeat), await timed(query, repeat)),
+        "keyset page": (await timed(lambda: get(keyset), repeat), await timed(lambda: query(after_id), repeat)),
+        f"offset {skip}": (await timed(lambda: get({"skip": skip}), repeat),
+                           await timed(lambda: query(skip=skip), repeat)),
+    }
+
+
+def report(title: str, results: Dict[str, Tuple[Dict[str, float], Dict[str, float]]]) -> None:
+    print(title)
+    for name, (http, sql) in results.items():
+        print(f"  {name:>12}: GET /tasks/ p50 {http['p50_ms']:6.2f} ms, query p50 {sql['p50_ms']:6.2f} ms")
+
+
+async def main(rows: int, owners: int, span_days: int, repeat: int, skip: int):
+    async with asgi_client() as client:
+        email = await register_and_login(client)
+        started = time.perf_counter()
+        owner_id = await generate_tasks(email, rows, owners, span_days)
+        print(f"generated {rows} rows for {owners} owners in {time.perf_counter() - started:.1f}s")
+
+        await vacuum_analyze()
+        print(f"before: {await table_sizes()}")
+        report("before archiving", await measure(client, owner_id, repeat, skip, include_archived=False))
+
+        started = time.perf_counter()
+        archived = await archive_completed_tasks(settings.TASK_ARCHIVE_AFTER_DAYS, settings.TASK_ARCHIVE_BATCH_SIZE)
+        print(f"archived {archived} rows in {time.perf_counter() - started:.1f}s "
+              f"(batch {settings.TASK_ARCHIVE_BATCH_SIZE}, older than {settings.TASK_ARCHIVE_AFTER_DAYS} days)")
+
+        await vacuum_analyze()
+        print(f"after: {await table_sizes()}")
+        report("after archiving", await measure(client, owner_id, repeat, skip, include_archived=False))
+        report("after archiving, include_archived=true",
+               await measure(client, owner_id, repeat, skip, include_archived=True))
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--owners", type=int, default=100)
+    parser.add_argument("--span-days", type=int, default=365)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--skip", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.owners, args.span_days, args.repeat, args.skip))
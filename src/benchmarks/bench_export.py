@@ -0,0 +1,98 @@
+"""
+Пиковая память процесса при потоковой выгрузке /tasks/export.
+
+Скрипт генерирует в базе N задач одним INSERT ... SELECT generate_series,
+затем вызывает приложение напрямую по ASGI и отбрасывает отданные куски тела
+(httpx.ASGITransport накапливает ответ целиком и исказил бы измерение).
+Прирост пикового RSS не должен зависеть от N: в памяти держится одна пачка
+TASK_EXPORT_BATCH_SIZE строк.
+
+    python -m src.benchmarks.bench_export --rows 1000000 --format csv
+"""
+import argparse
+import asyncio
+import resource
+import time
+
+from sqlalchemy import text
+
+from src.database import engine
+from src.main import app
+from src.benchmarks.common import asgi_client, register_and_login
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def generate_tasks(email: str, rows: int) -> None:
+    async with engine.begin() as conn:
+        await conn.execute(text(
+            "INSERT INTO task (title, description, completed, owner_id) "
+            "SELECT 'task ' || g, 'generated for export benchmark', g % 2 = 0, u.id "
+            "FROM generate_series(1, :rows) g, person u WHERE u.email = :email"
+        ), {"rows": rows, "email": email})
+
+
+async def export(cookie: str, export_format: str) -> int:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "https", "path": "/tasks/export", "raw_path": b"/tasks/export",
+        "query_string": f"format={export_format}".encode(), "root_path": "",
+        "headers": [(b"host", b"bench"), (b"cookie", f"access_token={cookie}".encode())],
+        "client": ("127.0.0.1", 0), "server": ("bench", 443),
+    }
+    received = 0
+    status = None
+    request_sent = False
+    done = asyncio.Event()
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # StreamingResponse ждет здесь отключения клиента до конца выгрузки
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal received, status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            received += len(message.get("body", b""))
+            if not message.get("more_body", False):
+                done.set()
+
+    await app(scope, receive, send)
+    if status != 200:
+        raise RuntimeError(f"export failed with status {status}")
+    return received
+
+
+async def main(rows: int, export_format: str):
+    async with asgi_client() as client:
+        email = await register_and_login(client)
+        cookie = client.cookies["access_token"]
+
+    started = time.perf_counter()
+    await generate_tasks(email, rows)
+    print(f"generated {rows} rows in {time.perf_counter() - started:.1f}s")
+
+    before = peak_rss_mb()
+    started = time.perf_counter()
+    size = await export(cookie, export_format)
+    elapsed = time.perf_counter() - started
+    print(f"exported {size / 2**20:.1f} MiB of {export_format} in {elapsed:.1f}s "
+          f"({rows / elapsed:.0f} rows/s)")
+    print(f"peak RSS: {before:.1f} MiB before, {peak_rss_mb():.1f} MiB after")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.format))
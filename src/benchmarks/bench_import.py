@@ -0,0 +1,55 @@
+"""
+Пропускная способность импорта задач: POST /create-task/ по одной задаче
+против POST /import-tasks/ (COPY через временную таблицу).
+
+    python -m src.benchmarks.bench_import --per-row 2000 --import-rows 200000
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from src.database import engine
+from src.benchmarks.common import asgi_client, register_and_login
+
+
+def ndjson(rows: int) -> bytes:
+    return "".join(
+        json.dumps({"title": f"imported task {i}", "description": "bench import"}) + "\n"
+        for i in range(rows)
+    ).encode()
+
+
+async def main(per_row: int, import_rows: int, concurrency: int):
+    async with asgi_client() as client:
+        await register_and_login(client)
+
+        remaining = iter(range(per_row))
+
+        async def worker():
+            for i in remaining:
+                response = await client.post("/create-task/", json={"title": f"task {i}", "description": "bench"})
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        per_row_rate = per_row / (time.perf_counter() - started)
+        print(f"  per-row API: {per_row_rate:10.0f} rows/s ({per_row} rows, concurrency {concurrency})")
+
+        body = ndjson(import_rows)
+        started = time.perf_counter()
+        response = await client.post("/import-tasks/", content=body, timeout=None)
+        response.raise_for_status()
+        import_rate = response.json()["imported"] / (time.perf_counter() - started)
+        print(f"  COPY import: {import_rate:10.0f} rows/s ({import_rows} rows)")
+        print(f"speedup: {import_rate / per_row_rate:.1f}x")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--per-row", type=int, default=2000)
+    parser.add_argument("--import-rows", type=int, default=200_000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.per_row, args.import_rows, args.concurrency))
@@ -0,0 +1,52 @@
+"""
+Время импорта модуля приложения src.main в свежем интерпретаторе — основная
+часть холодного старта воркера при перезапуске. Выводит медиану по нескольким
+запускам и самые дорогие модули по данным python -X importtime.
+
+Подключение к базе при импорте не выполняется, база не нужна.
+
+    python -m src.benchmarks.bench_import_time --runs 5 --top 15
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from typing import List, Tuple
+
+IMPORT = "import src.main"
+
+
+def import_time() -> float:
+    code = f"import time; t = time.perf_counter(); {IMPORT}; print(time.perf_counter() - t)"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+# (накопительное время в мкс, модуль) из вывода -X importtime
+def slowest_modules(top: int) -> List[Tuple[int, str]]:
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", IMPORT],
+                            capture_output=True, text=True, check=True)
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        modules.append((int(cumulative), name))
+    return sorted(modules, reverse=True)[:top]
+
+
+def main(runs: int, top: int):
+    times = [import_time() for _ in range(runs)]
+    print(f"import src.main: median {statistics.median(times) * 1000:.0f} ms, "
+          f"min {min(times) * 1000:.0f} ms, max {max(times) * 1000:.0f} ms ({runs} runs)")
+    print(f"\n{'cumulative ms':>14}  module")
+    for cumulative, name in slowest_modules(top):
+        print(f"{cumulative / 1000:>14.1f}  {name}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+    main(args.runs, args.top)
@@ -0,0 +1,73 @@
+"""
+Сравнение пропускной способности API без пула соединений (NullPool) и с пулом,
+настроенным через Settings.
+
+Приложение вызывается в процессе через ASGI-транспорт httpx, база данных —
+из текущих настроек (.env). К базе должны быть применены миграции (python -m src.migrate).
+
+    python -m src.benchmarks.bench_pool --requests 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+from sqlalchemy import NullPool
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.config import settings
+from src.database import engine as pooled_engine, get_async_session
+from src.main import app
+from src.benchmarks.common import asgi_client, create_tasks, register_and_login
+
+
+async def run(client: httpx.AsyncClient, requests: int, concurrency: int) -> float:
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            response = await client.get("/tasks/")
+            response.raise_for_status()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return requests / (time.perf_counter() - started)
+
+
+def use_engine(engine):
+    session_maker = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def get_session():
+        async with session_maker() as session:
+            yield session
+
+    app.dependency_overrides[get_async_session] = get_session
+
+
+async def main(requests: int, concurrency: int):
+    null_engine = create_async_engine(settings.ASYNC_DATABASE_URL, poolclass=NullPool)
+    async with asgi_client() as client:
+        use_engine(pooled_engine)
+        await register_and_login(client)
+        await create_tasks(client, 10)
+
+        results = {}
+        for name, engine in (("NullPool", null_engine), ("pool", pooled_engine)):
+            use_engine(engine)
+            await run(client, concurrency, concurrency)  # прогрев
+            results[name] = await run(client, requests, concurrency)
+            print(f"{name:>8}: {results[name]:8.1f} req/s")
+        print(f"speedup: {results['pool'] / results['NullPool']:.2f}x")
+
+    app.dependency_overrides.clear()
+    await null_engine.dispose()
+    await pooled_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
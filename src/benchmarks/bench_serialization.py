@@ -0,0 +1,61 @@
+"""
+Микробенчмарк сериализации страницы задач: обычный путь FastAPI
+(валидация List[TaskResponse], dump в JSON-совместимые типы, json.dumps)
+против быстрого режима GET /tasks/?fast=true (кортежи строк, orjson).
+
+База данных не нужна: строки генерируются в памяти. API ограничивает limit
+сотней задач, страница из 1000 строк показывает тенденцию.
+
+    python -m src.benchmarks.bench_serialization --repeat 2000
+"""
+import argparse
+import time
+from datetime import datetime
+from typing import List
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+
+from src.task_logic.task_repository import TASK_RESPONSE_FIELDS
+from src.task_logic.task_schemas import TaskResponse
+
+response_adapter = TypeAdapter(List[TaskResponse])
+
+
+def make_rows(count: int) -> list:
+    now = datetime.utcnow()
+    return [(i, f"task {i}", "description of the task " * 4, i % 2 == 0, 1, now) for i in range(count)]
+
+
+def standard(rows: list) -> bytes:
+    tasks = [dict(zip(TASK_RESPONSE_FIELDS, row)) for row in rows]
+    content = response_adapter.dump_python(response_adapter.validate_python(tasks), mode="json")
+    return JSONResponse(content).body
+
+
+def fast(rows: list) -> bytes:
+    return ORJSONResponse([dict(zip(TASK_RESPONSE_FIELDS, row)) for row in rows]).body
+
+
+def per_call_us(encode, rows: list, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        encode(rows)
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def main(repeat: int):
+    print(f"{'rows':>6} {'standard, us':>14} {'fast, us':>10} {'speedup':>8}")
+    for count in (10, 100, 1000):
+        rows = make_rows(count)
+        assert standard(rows) == fast(rows)
+        n = max(repeat // count * 10, 10)
+        slow_us, fast_us = per_call_us(standard, rows, n), per_call_us(fast, rows, n)
+        print(f"{count:>6} {slow_us:>14.1f} {fast_us:>10.1f} {slow_us / fast_us:>7.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+    main(args.repeat)
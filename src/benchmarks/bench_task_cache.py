@@ -0,0 +1,60 @@
+"""
+Задержка повторного чтения GET /tasks/{task_id} без кэша и с кэшем задач.
+
+Приложение вызывается в процессе через ASGI-транспорт httpx, база данных —
+из текущих настроек (.env). К базе должны быть применены миграции (python -m src.migrate).
+
+    python -m src.benchmarks.bench_task_cache --tasks 100 --reads 5000
+"""
+import argparse
+import asyncio
+import itertools
+
+from src.benchmarks.common import asgi_client, create_tasks, register_and_login, timed
+from src.config import settings
+from src.main import app
+from src.task_logic.task_cache import InMemoryTaskCache, get_task_cache
+
+
+def override(cache: InMemoryTaskCache):
+    # Без параметров: FastAPI не должен принять аргумент за query-параметр
+    def get_cache():
+        return cache
+    return get_cache
+
+
+async def main(tasks: int, reads: int):
+    caches = {
+        "no cache": InMemoryTaskCache(max_size=0, ttl=0, negative_ttl=0),
+        "cache": InMemoryTaskCache(
+            max_size=settings.TASK_CACHE_MAX_SIZE,
+            ttl=settings.TASK_CACHE_TTL,
+            negative_ttl=settings.TASK_CACHE_NEGATIVE_TTL,
+        ),
+    }
+    async with asgi_client() as client:
+        await register_and_login(client)
+        task_ids = await create_tasks(client, tasks)
+
+        for name, cache in caches.items():
+            app.dependency_overrides[get_task_cache] = override(cache)
+            ids = itertools.cycle(task_ids)
+
+            async def read():
+                response = await client.get(f"/tasks/{next(ids)}")
+                response.raise_for_status()
+
+            result = await timed(read, reads)
+            print(f"{name:>8}: {result['rps']:8.1f} req/s, mean {result['mean_ms']:.2f} ms, "
+                  f"p50 {result['p50_ms']:.2f} ms")
+        print("cache stats:", caches["cache"].stats())
+
+    app.dependency_overrides.clear()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=100)
+    parser.add_argument("--reads", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(main(args.tasks, args.reads))
@@ -0,0 +1,72 @@
+"""
+Кадры и байты на WebSocket-соединение при всплеске изменений задач без
+объединения событий и с окном WS_COALESCE_WINDOW_MS.
+
+Всплеск — --updates запросов PUT /update-task/ по кругу по --tasks задачам
+в --concurrency параллельных воркерах; события получают --clients сокетов
+владельца. База данных — из текущих настроек (.env), миграции должны быть применены.
+
+    python -m src.benchmarks.bench_ws_coalesce --clients 20 --tasks 5 --updates 500 --window-ms 50
+"""
+import argparse
+import asyncio
+import uuid
+
+from src.benchmarks.common import WebSocketClient, asgi_client, create_tasks, load
+from src.task_logic.broadcaster import broadcaster
+
+
+async def burst(client, user_id: int, task_ids, clients: int, updates: int, concurrency: int, window: float):
+    broadcaster.coalesce_window = window
+    sockets = [WebSocketClient(f"/ws/tasks/{user_id}", dict(client.cookies)) for _ in range(clients)]
+    for socket in sockets:
+        if not await socket.connect():
+            raise RuntimeError(f"WebSocket rejected with code {socket.close_code}")
+
+    async def update(i: int):
+        task_id = task_ids[i % len(task_ids)]
+        response = await client.put(f"/update-task/{task_id}", json={
+            "title": f"title {i}", "description": "bench", "completed": i % 2 == 0,
+        })
+        response.raise_for_status()
+
+    result = await load(update, updates, concurrency)
+    # Дожидаемся отправки последнего окна
+    await asyncio.sleep(window + 0.2)
+    stats = [entry for entry in broadcaster.stats() if entry["owner_id"] == user_id]
+    for socket in sockets:
+        await socket.close()
+    return result, stats
+
+
+async def main(clients: int, tasks: int, updates: int, concurrency: int, window_ms: float):
+    async with asgi_client() as client:
+        email = f"bench-{uuid.uuid4().hex[:8]}@example.com"
+        response = await client.post("/auth/register", json={
+            "email": email, "password": "bench-password", "username": "bench", "role_id": 1,
+        })
+        response.raise_for_status()
+        user_id = response.json()["id"]
+        response = await client.post("/auth/login", data={"username": email, "password": "bench-password"})
+        response.raise_for_status()
+        task_ids = await create_tasks(client, tasks)
+
+        for window in (0, window_ms / 1000):
+            result, stats = await burst(client, user_id, task_ids, clients, updates, concurrency, window)
+            events = sum(entry["events"] for entry in stats) / len(stats)
+            frames = sum(entry["frames"] for entry in stats) / len(stats)
+            size = sum(entry["bytes"] for entry in stats) / len(stats)
+            dropped = sum(entry["dropped"] for entry in stats)
+            print(f"window {window * 1000:5.0f} ms: {result['rps']:7.1f} updates/s, per connection "
+                  f"{events:.0f} events -> {frames:.0f} frames, {size / 1024:.1f} KiB, dropped {dropped}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--tasks", type=int, default=5)
+    parser.add_argument("--updates", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--window-ms", type=float, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.clients, args.tasks, args.updates, args.concurrency, args.window_ms))
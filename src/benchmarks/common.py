@@ -0,0 +1,133 @@
+import asyncio
+import statistics
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from src.config import settings
+from src.main import app
+
+# Бенчмарки нагружают API от одного пользователя и IP: бюджеты запросов
+# (RATE_LIMIT_*) исказили бы результат, поэтому выключены
+settings.RATE_LIMIT_ENABLED = False
+
+
+def asgi_client() -> httpx.AsyncClient:
+    # cookie_secure=True: куки отправляются только по https
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="https://bench")
+
+
+async def register_and_login(client: httpx.AsyncClient, password: str = "bench-password") -> str:
+    email = f"bench-{uuid.uuid4().hex[:8]}@example.com"
+    response = await client.post("/auth/register", json={
+        "email": email, "password": password, "username": "bench", "role_id": 1,
+    })
+    response.raise_for_status()
+    response = await client.post("/auth/login", data={"username": email, "password": password})
+    response.raise_for_status()
+    return email
+
+
+async def create_tasks(client: httpx.AsyncClient, count: int) -> List[int]:
+    response = await client.post("/create-tasks/", json=[
+        {"title": f"task {i}", "description": "bench"} for i in range(count)
+    ])
+    response.raise_for_status()
+    return [task["id"] for task in response.json()["items"]]
+
+
+async def timed(call: Callable[[], Awaitable], repeat: int) -> Dict[str, float]:
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        t = time.perf_counter()
+        await call()
+        latencies.append(time.perf_counter() - t)
+    elapsed = time.perf_counter() - started
+    return {
+        "rps": repeat / elapsed,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "p50_ms": statistics.median(latencies) * 1000,
+    }
+
+
+def latency_stats(latencies: List[float], elapsed: float) -> Dict[str, float]:
+    ordered = sorted(latencies)
+
+    def percentile(p: float) -> float:
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p))] * 1000 if ordered else 0.0
+
+    return {
+        "count": len(ordered),
+        "rps": len(ordered) / elapsed if elapsed else 0.0,
+        "mean_ms": statistics.fmean(ordered) * 1000 if ordered else 0.0,
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+    }
+
+
+# requests вызовов call(i) в concurrency параллельных воркерах
+async def load(call: Callable[[int], Awaitable], requests: int, concurrency: int) -> Dict[str, float]:
+    latencies: List[float] = []
+    remaining = iter(range(requests))
+
+    async def worker():
+        for i in remaining:
+            t = time.perf_counter()
+            await call(i)
+            latencies.append(time.perf_counter() - t)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latency_stats(latencies, time.perf_counter() - started)
+
+
+class WebSocketClient:
+    """
+    Минимальный WebSocket-клиент поверх ASGI: httpx.ASGITransport
+    поддерживает только HTTP. Входящие текстовые кадры копятся в очереди
+    вместе с моментом получения (time.perf_counter()).
+    """
+
+    def __init__(self, path: str, cookies: Dict[str, str]):
+        self.path = path
+        self.cookie = "; ".join(f"{name}={value}" for name, value in cookies.items())
+        self.messages: "asyncio.Queue[Tuple[float, str]]" = asyncio.Queue()
+        self.close_code: Optional[int] = None
+        self._incoming: "asyncio.Queue[dict]" = asyncio.Queue()
+        self._accepted = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def connect(self) -> bool:
+        scope = {
+            "type": "websocket", "asgi": {"version": "3.0"}, "scheme": "wss",
+            "path": self.path, "raw_path": self.path.encode(), "query_string": b"", "root_path": "",
+            "headers": [(b"host", b"bench"), (b"cookie", self.cookie.encode())],
+            "client": ("127.0.0.1", 0), "server": ("bench", 443), "subprotocols": [],
+        }
+
+        async def send(message):
+            if message["type"] == "websocket.accept":
+                self._accepted.set()
+            elif message["type"] == "websocket.close":
+                self.close_code = message.get("code", 1000)
+                self._accepted.set()
+            elif message["type"] == "websocket.send":
+                text = message.get("text") or message.get("bytes", b"").decode()
+                await self.messages.put((time.perf_counter(), text))
+
+        await self._incoming.put({"type": "websocket.connect"})
+        self._task = asyncio.create_task(app(scope, self._incoming.get, send))
+        await self._accepted.wait()
+        return self.close_code is None
+
+    async def send_text(self, text: str) -> None:
+        await self._incoming.put({"type": "websocket.receive", "text": text})
+
+    async def close(self) -> None:
+        await self._incoming.put({"type": "websocket.disconnect", "code": 1000})
+        if self._task is not None:
+            await self._task
@@ -0,0 +1,273 @@
+"""
+Нагрузочный бенчмарк API и WebSocket одним запуском.
+
+Приложение вызывается в процессе через ASGI. Для прогона создается временная
+база данных на сервере PostgreSQL из настроек (.env), к ней применяются
+миграции, после прогона база удаляется. SQLite не поддерживается: схема использует tsvector и GIN-индекс,
+импорт — COPY.
+
+Сценарии: регистрация и вход (стоимость bcrypt задается --bcrypt-rounds),
+создание, чтение, обновление и удаление задач, постраничный список,
+рассылка WebSocket-событий N клиентам. Для каждого сценария выводятся
+пропускная способность и задержки p50/p95/p99.
+
+    python -m src.benchmarks.run --save baseline.json
+    python -m src.benchmarks.run --compare baseline.json
+"""
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Dict
+
+import asyncpg
+
+from src.config import settings
+
+PASSWORD = "bench-password"
+
+# Сравнение с базой: насколько может упасть rps или вырасти p95, прежде чем
+# изменение считается регрессией
+DEFAULT_THRESHOLD = 0.10
+
+
+async def admin_connection() -> asyncpg.Connection:
+    return await asyncpg.connect(
+        host=settings.DB_HOST, port=int(settings.DB_PORT),
+        user=settings.DB_USER, password=settings.DB_PASS or None, database="postgres",
+    )
+
+
+async def create_database(name: str) -> None:
+    conn = await admin_connection()
+    try:
+        await conn.execute(f'CREATE DATABASE "{name}"')
+    finally:
+        await conn.close()
+
+
+async def drop_database(name: str) -> None:
+    conn = await admin_connection()
+    try:
+        await conn.execute(f'DROP DATABASE IF EXISTS "{name}" WITH (FORCE)')
+    finally:
+        await conn.close()
+
+
+async def prepare_schema() -> None:
+    from src.migrate import connect, migrate
+
+    conn = await connect()
+    try:
+        await migrate(conn, log=lambda message: None)
+    finally:
+        await conn.close()
+
+
+async def bench_auth(users: int, concurrency: int) -> Dict[str, Dict]:
+    from src.benchmarks.common import asgi_client, load
+
+    emails = [f"bench-{uuid.uuid4().hex[:8]}-{i}@example.com" for i in range(users)]
+    async with asgi_client() as client:
+        async def register(i: int):
+            response = await client.post("/auth/register", json={
+                "email": emails[i], "password": PASSWORD, "username": "bench", "role_id": 1,
+            })
+            response.raise_for_status()
+
+        async def login(i: int):
+            response = await client.post("/auth/login", data={"username": emails[i], "password": PASSWORD})
+            response.raise_for_status()
+
+        return {
+            "register": await load(register, users, concurrency),
+            "login": await load(login, users, concurrency),
+        }
+
+
+async def bench_tasks(requests: int, concurrency: int) -> Dict[str, Dict]:
+    from src.benchmarks.common import asgi_client, load, register_and_login
+
+    results = {}
+    async with asgi_client() as client:
+        await register_and_login(client, PASSWORD)
+        task_ids = []
+
+        async def create(i: int):
+            response = await client.post("/create-task/", json={"title": f"task {i}", "description": "bench"})
+            response.raise_for_status()
+            task_ids.append(response.json()["id"])
+
+        async def read(i: int):
+            response = await client.get(f"/tasks/{task_ids[i % len(task_ids)]}")
+            response.raise_for_status()
+
+        async def update(i: int):
+            response = await client.put(f"/update-task/{task_ids[i % len(task_ids)]}", json={
+                "title": f"task {i}", "description": "bench updated", "completed": i % 2 == 0,
+            })
+            response.raise_for_status()
+
+        # Каждый вызов — проход по страницам списка, пока есть курсор
+        pages = 0
+
+        async def list_pages(i: int):
+            nonlocal pages
+            cursor = None
+            while True:
+                response = await client.get("/tasks/", params={"limit": 100, **({"after": cursor} if cursor else {})})
+                response.raise_for_status()
+                pages += 1
+                cursor = response.headers.get("X-Next-Cursor")
+                if cursor is None:
+                    break
+
+        async def delete(i: int):
+            response = await client.delete(f"/delete-task/{task_ids[i]}")
+            response.raise_for_status()
+
+        results["create_task"] = await load(create, requests, concurrency)
+        results["read_task"] = await load(read, requests, concurrency)
+        results["update_task"] = await load(update, requests, concurrency)
+        pages = 0
+        results["list_tasks"] = await load(list_pages, max(requests // 20, 1), concurrency)
+        results["list_tasks"]["pages"] = pages
+        results["delete_task"] = await load(delete, requests, concurrency)
+    return results
+
+
+# Задержка доставки: от начала POST /create-task/ до получения события каждым клиентом
+async def bench_ws_fanout(clients: int, events: int) -> Dict[str, Dict]:
+    from src.benchmarks.common import WebSocketClient, asgi_client, latency_stats
+
+    async with asgi_client() as client:
+        email = f"bench-{uuid.uuid4().hex[:8]}@example.com"
+        response = await client.post("/auth/register", json={
+            "email": email, "password": PASSWORD, "username": "bench", "role_id": 1,
+        })
+        response.raise_for_status()
+        user_id = response.json()["id"]
+        response = await client.post("/auth/login", data={"username": email, "password": PASSWORD})
+        response.raise_for_status()
+
+        sockets = [WebSocketClient(f"/ws/tasks/{user_id}", dict(client.cookies)) for _ in range(clients)]
+        for socket in sockets:
+            if not await socket.connect():
+                raise RuntimeError(f"WebSocket rejected with code {socket.close_code}")
+
+        latencies = []
+        started = time.perf_counter()
+        for i in range(events):
+            sent_at = time.perf_counter()
+            response = await client.post("/create-task/", json={"title": f"event {i}", "description": "bench"})
+            response.raise_for_status()
+            for socket in sockets:
+                received_at, _ = await asyncio.wait_for(socket.messages.get(), timeout=10)
+                latencies.append(received_at - sent_at)
+        elapsed = time.perf_counter() - started
+
+        for socket in sockets:
+            await socket.close()
+    stats = latency_stats(latencies, elapsed)
+    stats["clients"] = clients
+    return {"ws_fanout": stats}
+
+
+def print_results(results: Dict[str, Dict]) -> None:
+    print(f"{'scenario':<14} {'count':>7} {'rps':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, stats in results.items():
+        print(f"{name:<14} {stats['count']:>7} {stats['rps']:>9.1f} {stats['p50_ms']:>8.2f} "
+              f"{stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f}")
+
+
+# Регрессия: rps упал или p95 вырос больше чем на threshold
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> int:
+    regressions = 0
+    print(f"\n{'scenario':<14} {'rps':>18} {'p95 ms':>18}")
+    for name, stats in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        rps_change = stats["rps"] / base["rps"] - 1 if base["rps"] else 0.0
+        p95_change = stats["p95_ms"] / base["p95_ms"] - 1 if base["p95_ms"] else 0.0
+        regressed = rps_change < -threshold or p95_change > threshold
+        regressions += regressed
+        print(f"{name:<14} {stats['rps']:>9.1f} ({rps_change:+6.1%}) {stats['p95_ms']:>9.2f} ({p95_change:+6.1%})"
+              f"{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+async def run(args) -> Dict[str, Dict]:
+    results: Dict[str, Dict] = {}
+    results.update(await bench_auth(args.users, args.concurrency))
+    results.update(await bench_tasks(args.requests, args.concurrency))
+    results.update(await bench_ws_fanout(args.ws_clients, args.ws_events))
+    return results
+
+
+async def main(args) -> int:
+    # До импорта приложения: engine и хешер паролей читают настройки при импорте
+    settings.BCRYPT_ROUNDS = args.bcrypt_rounds
+    database = args.database or f"bench_{uuid.uuid4().hex[:8]}"
+    if not args.database:
+        await create_database(database)
+    settings.DB_NAME = database
+
+    from src.database import engine
+    from src.main import app
+
+    try:
+        await prepare_schema()
+        async with app.router.lifespan_context(app):
+            results = await run(args)
+    finally:
+        await engine.dispose()
+        if not args.database:
+            await drop_database(database)
+
+    print_results(results)
+    report = {
+        "meta": {
+            "date": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "bcrypt_rounds": args.bcrypt_rounds,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "db_pool_size": settings.DB_POOL_SIZE,
+        },
+        "results": results,
+    }
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nsaved to {args.save}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        changed = [key for key, value in report["meta"].items()
+                   if key != "date" and baseline["meta"].get(key) != value]
+        if changed:
+            print(f"\nwarning: baseline was recorded with different {', '.join(changed)}")
+        if compare(results, baseline["results"], args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000, help="запросов на сценарий задач")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--users", type=int, default=50, help="регистраций и входов")
+    parser.add_argument("--bcrypt-rounds", type=int, default=4)
+    parser.add_argument("--ws-clients", type=int, default=100)
+    parser.add_argument("--ws-events", type=int, default=50)
+    parser.add_argument("--database", help="существующая база вместо временной (не удаляется)")
+    parser.add_argument("--save", metavar="FILE", help="сохранить результаты в JSON")
+    parser.add_argument("--compare", metavar="FILE", help="сравнить с сохраненными результатами")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args)))
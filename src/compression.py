@@ -0,0 +1,97 @@
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import GZipResponder, IdentityResponder
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli необязателен: без него ответы сжимаются только gzip
+    brotli = None
+
+# Сжимаются только текстовые форматы: изображения и архивы уже сжаты
+COMPRESSIBLE_TYPES = (
+    "text/html", "text/css", "text/plain", "text/csv", "text/javascript",
+    "application/javascript", "application/json", "application/x-ndjson",
+)
+
+
+class CompressibleTypesMixin:
+    """
+    Ограничивает сжатие типами COMPRESSIBLE_TYPES. Сжатое представление
+    получает слабый ETag: побайтно оно отличается от несжатого, а If-None-Match
+    сравнивается слабо и продолжает работать. If-Match задачи (etag.if_match_versions)
+    принимает такой тег наравне со строгим.
+    """
+
+    async def send_with_compression(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            await super().send_with_compression(message)
+            content_type = Headers(raw=message["headers"]).get("content-type", "")
+            if not content_type.startswith(COMPRESSIBLE_TYPES):
+                self.content_type_is_excluded = True
+            return
+        if message["type"] == "http.response.body" and not self.started and getattr(self, "content_encoding", None) \
+                and not (self.content_encoding_set or self.content_type_is_excluded):
+            headers = MutableHeaders(raw=self.initial_message["headers"])
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/") and (
+                    message.get("more_body", False) or len(message.get("body", b"")) >= self.minimum_size):
+                headers["etag"] = f"W/{etag}"
+        await super().send_with_compression(message)
+
+
+class GZipCompressor(CompressibleTypesMixin, GZipResponder):
+    pass
+
+
+class BrotliCompressor(CompressibleTypesMixin, IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app: ASGIApp, minimum_size: int, quality: int):
+        super().__init__(app, minimum_size)
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        if more_body:
+            # flush: каждая часть потокового ответа (выгрузка) доходит до клиента сразу
+            return self.compressor.process(body) + self.compressor.flush()
+        return self.compressor.process(body) + self.compressor.finish()
+
+
+class Identity(CompressibleTypesMixin, IdentityResponder):
+    pass
+
+
+def accepts(accept_encoding: str, coding: str) -> bool:
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        if name.strip().lower() == coding:
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+class CompressionMiddleware:
+    """
+    Сжатие ответов brotli (если пакет установлен и клиент его принимает) или
+    gzip. Ответы меньше minimum_size байт не сжимаются: выигрыш меньше затрат.
+    Основано на GZipMiddleware из Starlette, потоковые ответы сжимаются по частям.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 5):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+        if brotli is not None and accepts(accept_encoding, "br"):
+            responder = BrotliCompressor(self.app, self.minimum_size, self.brotli_quality)
+        elif accepts(accept_encoding, "gzip"):
+            responder = GZipCompressor(self.app, self.minimum_size, compresslevel=self.gzip_level)
+        else:
+            responder = Identity(self.app, self.minimum_size)
+        await responder(scope, receive, send)
@@ -1,9 +1,14 @@
+import logging
+import time
 from typing import AsyncGenerator
-from sqlalchemy import MetaData, NullPool
+from sqlalchemy import AsyncAdaptedQueuePool, MetaData, event
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
 
 from src.config import settings
+from src.metrics import POOL_CHECKOUT_WAIT, SQL_SLOW, record_statement
+
+logger = logging.getLogger(__name__)
 
 
 metadata = MetaData()
@@ -12,8 +17,59 @@ class Base(DeclarativeBase):
     metadata = metadata  # Явная привязка
 
 
-# Создаем асинхронный движок для подключения к базе данных с использованием NullPool (без пула соединений)
-engine = create_async_engine(settings.ASYNC_DATABASE_URL, poolclass=NullPool, echo=True)
+# Пул, который измеряет ожидание свободного соединения (включая установку нового)
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    # Логи пула остаются под логгером sqlalchemy.pool, а не под логгером приложения
+    _sqla_logger_namespace = "sqlalchemy.pool.impl.AsyncAdaptedQueuePool"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started)
+
+
+# Создаем асинхронный движок для подключения к базе данных с пулом соединений.
+# Соединения переиспользуются между запросами, а подготовленные выражения
+# кэшируются на каждом соединении asyncpg.
+engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL,
+    poolclass=TimedQueuePool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    echo=settings.DB_ECHO,
+    connect_args={
+        "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+    },
+)
+
+
+# Время каждого SQL-запроса: в метрики и, если дольше SLOW_QUERY_MS, в лог
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _start_statement_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("statement_started", []).append(time.perf_counter())
+
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _record_statement(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info["statement_started"].pop()
+    record_statement(duration)
+    if settings.SLOW_QUERY_MS and duration * 1000 >= settings.SLOW_QUERY_MS:
+        SQL_SLOW.inc()
+        logger.warning("Slow query (%.1f ms): %s", duration * 1000, statement)
+
+
+@event.listens_for(engine.sync_engine, "handle_error")
+def _discard_statement_timer(exception_context):
+    started = exception_context.connection.info.get("statement_started") if exception_context.connection else None
+    if started:
+        started.pop()
+
 
 # Создаем фабрику асинхронных сессий с использованием ранее созданного движка
 async_session_maker = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
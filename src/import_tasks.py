@@ -0,0 +1,70 @@
+"""
+Импорт задач из файла NDJSON или CSV в базу через COPY.
+
+Файл читается по частям, строки проверяются по TaskCreate; ход загрузки
+и ошибки по строкам выводятся в stderr. Задачи получают владельца по email.
+
+    python -m src.import_tasks --owner alice@example.com tasks.ndjson
+    python -m src.import_tasks --owner alice@example.com --format csv - < tasks.csv
+"""
+import argparse
+import asyncio
+import sys
+import time
+from typing import AsyncIterator, BinaryIO
+
+from sqlalchemy import select
+
+from src.auth.models import User
+from src.database import async_session_maker, engine
+from src.task_logic.task_import import FORMATS, import_tasks
+from src.task_logic.task_schemas import TaskImportResult
+
+READ_SIZE = 1 << 20
+
+
+async def read_chunks(source: BinaryIO) -> AsyncIterator[bytes]:
+    while chunk := await asyncio.to_thread(source.read, READ_SIZE):
+        yield chunk
+
+
+async def main(path: str, owner: str, format: str) -> int:
+    started = time.perf_counter()
+
+    def report(result: TaskImportResult) -> None:
+        elapsed = time.perf_counter() - started
+        print(f"\rlines: {result.lines}  staged: {result.staged}  errors: {result.error_count}  "
+              f"{result.staged / elapsed:.0f} rows/s", end="", file=sys.stderr, flush=True)
+
+    async with async_session_maker() as session:
+        owner_id = await session.scalar(select(User.id).where(User.email == owner))
+        if owner_id is None:
+            print(f"User {owner} not found", file=sys.stderr)
+            return 1
+        source = sys.stdin.buffer if path == "-" else open(path, "rb")
+        try:
+            result = await import_tasks(session, owner_id, read_chunks(source), format, progress=report)
+        finally:
+            if source is not sys.stdin.buffer:
+                source.close()
+        await session.commit()
+    await engine.dispose()
+
+    print(file=sys.stderr)
+    for error in result.errors:
+        print(f"line {error.line}: {error.detail}", file=sys.stderr)
+    if result.error_count > len(result.errors):
+        print(f"... and {result.error_count - len(result.errors)} more errors", file=sys.stderr)
+    print(f"imported {result.imported} tasks in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="файл NDJSON/CSV или - для stdin")
+    parser.add_argument("--owner", required=True, help="email владельца задач")
+    parser.add_argument("--format", choices=FORMATS, default=None,
+                        help="по умолчанию определяется по расширению файла")
+    args = parser.parse_args()
+    format = args.format or ("csv" if args.path.endswith(".csv") else "ndjson")
+    sys.exit(asyncio.run(main(args.path, args.owner, format)))
@@ -1,41 +1,108 @@
-from contextlib import asynccontextmanager
+import asyncio
+import json
+import logging
+import os
+from contextlib import AsyncExitStack, asynccontextmanager
 
-from fastapi import FastAPI, Request
+from fastapi import Body, FastAPI, Header, Query, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse
 from fastapi.templating import Jinja2Templates
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from starlette.responses import HTMLResponse
+from starlette.responses import HTMLResponse, PlainTextResponse, StreamingResponse
+from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
 
 from src.auth.endpoints import auth_router
 from src.auth.user_schemas import UserRead, UserCreate
-from src.database import Base, engine, get_async_session
-from src.auth.auth_config import (fastapi_users, auth_backend, current_user)
+from src.config import settings
+from src.database import engine, get_async_session
+from src.migrate import LATEST_VERSION
+from src.auth.auth_config import (fastapi_users, auth_backend, current_user,
+                                  current_superuser, authenticate_websocket)
+from src.auth.user_repository import user_cache
+from src.cache import MISSING
 from src.auth.models import User, Task
+from src.auth.manager import password_hasher
 
-from typing import List, Set
+from typing import Annotated, Any, List, Literal, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect
 
-from src.task_logic.task_schemas import TaskResponse, TaskCreate, TaskUpdate
-
-templates = Jinja2Templates(directory="templates")
-
-async def create_tables():
-    try:
-        async with engine.begin() as conn:
-            # Синхронно создает все таблицы из моделей, наследующих Base
-            await conn.run_sync(Base.metadata.create_all)
-        print("Таблицы базы данных успешно созданы")
-    except Exception as e:
-        print(f"Ошибка при создании таблиц: {e}")
+from src.task_logic.task_schemas import (TaskResponse, TaskCreate, TaskUpdate, TaskBatchUpdate,
+                                         TaskBatchResponse, TaskChanges, TaskImportResult, TaskSearchResult,
+                                         TaskStats)
+from src.task_logic import task_import, task_repository
+from src.task_logic.batch import not_found_errors, unique_positions, validate_items
+from src.task_logic.pagination import encode_cursor, decode_id_cursor, decode_rank_cursor
+from src.task_logic.etag import if_match_versions, list_etag, none_match, task_etag, versions_etag
+from src.task_logic.broadcaster import broadcaster
+from src.task_logic.pubsub import pubsub
+from src.task_logic.task_cache import TaskCache, get_task_cache, task_cache
+from src.task_logic.task_export import EXPORTERS, MEDIA_TYPES, stream_task_rows
+from src.task_logic.task_counters import get_task_stats
+from src.task_logic.task_archive import run_archiver
+from src.task_logic.task_events import (TASK_CREATED, TASK_DELETED, TASK_UPDATED, TASKS_CREATED,
+                                        TASKS_DELETED, TASKS_UPDATED, batch_event, chat_event,
+                                        task_event)
+from src.log_config import start_logging, stop_logging
+from src.assets import IMMUTABLE_CACHE_CONTROL, asset_url, get_asset
+from src.compression import CompressionMiddleware
+from src.rate_limit import InFlightLimitMiddleware, limit_ip, limit_user
+from src import metrics
+
+logger = logging.getLogger(__name__)
+
+templates = Jinja2Templates(directory=os.path.join(os.path.dirname(__file__), "templates"))
+templates.env.globals["asset_url"] = asset_url
+
+# Схема создается миграциями (python -m src.migrate) до запуска приложения.
+# При старте только проверяется версия: воркер с несовместимой схемой не должен
+# подниматься и принимать трафик.
+async def verify_schema():
+    async with engine.connect() as conn:
+        version = 0
+        if await conn.scalar(text("SELECT to_regclass('schema_version')")) is not None:
+            version = await conn.scalar(text("SELECT coalesce(max(version), 0) FROM schema_version"))
+    if version < LATEST_VERSION:
+        raise RuntimeError(
+            f"Database schema version {version}, expected {LATEST_VERSION}: run python -m src.migrate"
+        )
+    logger.info("Database schema version %s", version)
+
+
+# Заранее открываем соединения пула, чтобы первые запросы не ждали подключения
+async def warm_pool(size: int):
+    async with AsyncExitStack() as stack:
+        connections = await asyncio.gather(*(stack.enter_async_context(engine.connect()) for _ in range(size)))
+        await asyncio.gather(*(conn.execute(text("SELECT 1")) for conn in connections))
 
 
 # Инициализация FastAPI с lifespan
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    await create_tables()
+    start_logging()
+    app.state.ready = False
+    await verify_schema()
+    await warm_pool(min(settings.DB_POOL_WARMUP, settings.DB_POOL_SIZE))
+    await pubsub.start()
+    # Перенос старых выполненных задач в архив; проходы воркеров не пересекаются (advisory-блокировка)
+    archiver = None
+    if settings.TASK_ARCHIVE_INTERVAL > 0:
+        archiver = asyncio.create_task(run_archiver(settings.TASK_ARCHIVE_INTERVAL))
+    templates.get_template("task-board.html")  # компиляция шаблона
+    app.state.ready = True
     yield
+    # /readyz сразу начинает отвечать 503: балансировщик снимает трафик с воркера
+    app.state.ready = False
+    if archiver is not None:
+        archiver.cancel()
+        await asyncio.gather(archiver, return_exceptions=True)
+    await pubsub.close()
+    await broadcaster.close()
+    password_hasher.shutdown()
+    await engine.dispose()
+    stop_logging()
 
 app = FastAPI(
     title='Task Manager',
@@ -43,10 +110,12 @@ app = FastAPI(
 )
 
 
+# Вход и регистрация дорогие (bcrypt), поэтому ограничены по IP клиента
 app.include_router(
     fastapi_users.get_auth_router(auth_backend),
     prefix="/auth",
     tags=["Authentication"],
+    dependencies=[Depends(limit_ip("login"))],
 )
 
 
@@ -54,6 +123,7 @@ app.include_router(
     fastapi_users.get_register_router(UserRead, UserCreate),
     prefix="/auth",
     tags=["Authentication"],
+    dependencies=[Depends(limit_ip("register"))],
 )
 
 
@@ -67,15 +137,75 @@ origins = [
 ]
 
 
+# Предел одновременных запросов: лишние получают 503 до маршрутизации и работы с БД.
+# Добавляется раньше CORS: CORSMiddleware оборачивает его, и браузер получает 503
+# с заголовками CORS, а не ошибку CORS без Retry-After
+app.add_middleware(
+    InFlightLimitMiddleware,
+    max_in_flight=settings.MAX_IN_FLIGHT_REQUESTS,
+    retry_after=settings.OVERLOAD_RETRY_AFTER,
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
     allow_credentials=True,
     allow_methods=["GET", "POST", "OPTIONS", "DELETE", "PATCH", "PUT"],
     allow_headers=["Content-Type", "Set-Cookie", "Access-Control-Allow-Headers", "Access-Control-Allow-Origin",
-                   "Authorization"],
+                   "Authorization", "If-Match", "If-None-Match"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
+# Сжатие HTML, JSON и статики (brotli или gzip) для ответов от COMPRESSION_MIN_SIZE байт
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MIN_SIZE,
+    gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+    brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+)
+
+# Задержка и число SQL-запросов по маршрутам; внешний слой, учитывает сжатие и CORS
+app.add_middleware(metrics.MetricsMiddleware)
+
+# Адрес клиента из X-Forwarded-For доверенных прокси (TRUSTED_PROXIES) для бюджетов на IP
+if settings.TRUSTED_PROXIES:
+    app.add_middleware(ProxyHeadersMiddleware, trusted_hosts=settings.TRUSTED_PROXIES)
+
+# Состояние, которое уже хранится в объектах процесса, читается при сборе метрик
+metrics.registry.gauge_callback(
+    "db_pool_checked_out", "Connections currently checked out of the pool", lambda: engine.pool.checkedout())
+metrics.registry.gauge_callback(
+    "db_pool_size", "Connections currently held by the pool", lambda: engine.pool.size())
+metrics.registry.gauge_callback(
+    "ws_connections", "Active WebSocket connections", lambda: len(broadcaster.active_connections))
+metrics.registry.gauge_callback(
+    "ws_queued_messages", "Messages waiting in WebSocket outbound queues", lambda: broadcaster.queued_messages)
+metrics.registry.counter_callback(
+    "ws_dropped_messages_total", "Messages dropped because of full outbound queues",
+    lambda: broadcaster.dropped_messages)
+metrics.registry.counter_callback(
+    "ws_send_failures_total", "WebSocket connections closed after a failed send", lambda: broadcaster.send_failures)
+metrics.registry.counter_callback(
+    "ws_events_sent_total", "Events delivered to WebSocket connections before coalescing",
+    lambda: broadcaster.events_sent)
+metrics.registry.counter_callback(
+    "ws_frames_sent_total", "WebSocket frames sent", lambda: broadcaster.frames_sent)
+metrics.registry.counter_callback(
+    "ws_bytes_sent_total", "WebSocket payload bytes sent", lambda: broadcaster.bytes_sent)
+for name, documentation in (("published", "Task events published by this worker"),
+                            ("received", "Task events received from other workers"),
+                            ("fetched", "Received events rebuilt from the database (payload over the limit)"),
+                            ("dropped", "Task events not delivered to other workers")):
+    metrics.registry.counter_callback(
+        f"pubsub_{name}_total", documentation, lambda name=name: pubsub.stats()[name])
+metrics.registry.gauge_callback(
+    "password_hash_queued", "Password hash jobs waiting for a worker thread", lambda: password_hasher.stats()["queued"])
+for name, cache in (("user", user_cache), ("task", task_cache)):
+    metrics.registry.counter_callback(
+        f"{name}_cache_hits_total", f"{name.capitalize()} cache hits", lambda cache=cache: cache.stats()["hits"])
+    metrics.registry.counter_callback(
+        f"{name}_cache_misses_total", f"{name.capitalize()} cache misses", lambda cache=cache: cache.stats()["misses"])
+
 # Добавляем новые маршруты для работы с токенами
 app.include_router(auth_router)
 
@@ -84,13 +214,27 @@ router = APIRouter(
     tags=["Working with tasks"]
 )
 
+# Бюджеты запросов к задачам (RATE_LIMIT_TASK_*): на пользователя, а для маршрутов
+# без аутентификации — на IP клиента. Сверх бюджета — 429 с Retry-After.
+TASK_READ_LIMIT = [Depends(limit_user("task_read"))]
+TASK_WRITE_LIMIT = [Depends(limit_user("task_write"))]
+TASK_READ_LIMIT_BY_IP = [Depends(limit_ip("task_read"))]
+TASK_WRITE_LIMIT_BY_IP = [Depends(limit_ip("task_write"))]
+
 
 """
 - `GET http://localhost:8000/tasks/`: Получение списка задач (защищённая конечная точка).
 - `POST http://localhost:8000/create-task/`: Создание новой задачи (защищённая конечная точка).
+- `GET http://localhost:8000/tasks/search?q=...`: Полнотекстовый поиск по задачам (защищённая конечная точка).
+- `GET http://localhost:8000/tasks/export?format=ndjson|csv`: Потоковая выгрузка задач (защищённая конечная точка).
+- `GET http://localhost:8000/tasks/changes?since=N`: Изменения задач после номера N (защищённая конечная точка).
+- `GET http://localhost:8000/tasks/stats`: Число задач: всего, выполненных, открытых (защищённая конечная точка).
 - `GET http://localhost:8000/tasks/{task_id}`: Получить определённую задачу (защищённая конечная точка).
 - `PUT http://localhost:8000/update-task/{task_id}`: Обновить определённую задачу (защищённая конечная точка).
 - `DELETE http://localhost:8000/delete-task/{task_id}`: Удалить определённую задачу (защищённая конечная точка).
+- `POST http://localhost:8000/create-tasks/`, `PUT http://localhost:8000/update-tasks/`,
+  `POST http://localhost:8000/delete-tasks/`: Пакетные операции над задачами (защищённые конечные точки).
+- `POST http://localhost:8000/import-tasks/?format=ndjson|csv`: Импорт задач из файла (защищённая конечная точка).
 
 WebSocket — протокол связи поверх TCP-соединения (см. Модель OSI), предназначенный для обмена сообщениями между браузером и веб-сервером,
 используя постоянное соединение:
@@ -101,34 +245,60 @@ WebSocket — протокол связи поверх TCP-соединения
   - Данные передаются в виде кадров (frames) с минимальными накладными расходами.
 """
 
-# Множество для хранения активных WebSocket подключений
-active_connections: Set[WebSocket] = set()
+# Функция для отправки сообщения всем сокетам пользователя (на всех воркерах).
+# Сообщение только ставится в очереди подписчиков, отправка идет в фоне.
+def publish_message(client_id, message):
+    pubsub.publish(client_id, chat_event(client_id, message))
+
 
-# Функция для отправки сообщения всем подписанным пользователям
-async def publish_message(client_id, message):
-    for connection in active_connections:
-        await connection.send_text(f"Client with {client_id} wrote {message}!")
+# Управляющее сообщение клиента: {"action": "subscribe" | "unsubscribe", "task_id": N}
+def parse_subscription(message: str) -> Optional[tuple]:
+    try:
+        command = json.loads(message)
+    except ValueError:
+        return None
+    if not isinstance(command, dict) or command.get("action") not in ("subscribe", "unsubscribe"):
+        return None
+    task_id = command.get("task_id")
+    if not isinstance(task_id, int):
+        return None
+    return command["action"], task_id
 
 # Для получения обновлений статуса задачи в режиме реального времени
 # используйте WebSocket-подключения к `ws://localhost:8000/ws/tasks/{client_id}`.
+# Подключение аутентифицируется по куке access_token, client_id должен совпадать с id пользователя.
+# Клиент получает JSON-события только о своих задачах:
+# {"type": "task.created" | "task.updated" | "task.deleted", "task_id": N, "fields": {...}, "seq": S}
 # Пример клиентской стороны для подписки на обновление статуса задачи:
 # const socket = new WebSocket("ws://localhost:8000/ws/tasks/{client_id}")
+# socket.send(JSON.stringify({action: "subscribe", task_id: 42}))  // только события задачи 42
 @app.websocket("/ws/tasks/{client_id}")
 async def websocket_endpoint(client_id: int, websocket: WebSocket):
-    # Принимаем WebSocket соединение
-    await websocket.accept()
-    # Добавляем соединение в множество активных
-    active_connections.add(websocket)
+    user = await authenticate_websocket(websocket)
+    if user is None or user.id != client_id:
+        # Закрытие до accept — клиент получит отказ в рукопожатии
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    # Принимаем WebSocket соединение и добавляем его в рассылку владельца
+    await broadcaster.connect(websocket, user.id)
     try:
         # Бесконечный цикл для приема сообщений от клиента
         while True:
             # Ожидаем текстовое сообщение от клиента
             message = await websocket.receive_text()
-            # Рассылаем сообщение всем подключенным клиентам
-            await publish_message(client_id, message)
+            subscription = parse_subscription(message)
+            if subscription is None:
+                # Рассылаем сообщение всем сокетам пользователя
+                publish_message(client_id, message)
+            elif subscription[0] == "subscribe":
+                broadcaster.subscribe(websocket, subscription[1])
+            else:
+                broadcaster.unsubscribe(websocket, subscription[1])
     except WebSocketDisconnect:
+        pass
+    finally:
         # При отключении клиента удаляем его из активных соединений
-        active_connections.remove(websocket)
+        broadcaster.disconnect(websocket)
 
 """
 Тест подключения к WebSocket:
@@ -137,6 +307,8 @@ INFO:     127.0.0.1:2310 - "GET /websocket-test HTTP/1.1" 200 OK
 INFO:     ('127.0.0.1', 3897) - "WebSocket /ws/tasks/1" [accepted]
 INFO:     connection open
 """
+# Страница рендерится для каждого пользователя, но содержит только разметку и id:
+# стили и скрипт подключаются статическими файлами с долгим кэшированием
 @router.get("/task-board", response_class=HTMLResponse)
 async def protected_user_route(request: Request, user: User = Depends(current_user)):
     return templates.TemplateResponse(
@@ -144,88 +316,364 @@ async def protected_user_route(request: Request, user: User = Depends(current_us
         {
             "request": request,
             "user": user.id
-        }
+        },
+        headers={"Cache-Control": "private, no-cache"},
     )
 
 # Создание новой задачи
-@router.post("/create-task/", response_model=TaskResponse)
-async def create_task(task: TaskCreate, user: User = Depends(current_user), db: AsyncSession = Depends(get_async_session)):
-    # Создаем объект задачи, добавляя ID владельца
-    db_task = Task(**task.model_dump(), owner_id=user.id)
-    # Добавляем задачу в сессию
-    db.add(db_task)
+@router.post("/create-task/", response_model=TaskResponse, dependencies=TASK_WRITE_LIMIT)
+async def create_task(task: TaskCreate, user: User = Depends(current_user), db: AsyncSession = Depends(get_async_session),
+                      cache: TaskCache = Depends(get_task_cache)):
+    # Один INSERT ... RETURNING: сгенерированный ID приходит сразу, без refresh
+    db_task = await task_repository.create_task(db, user.id, task)
     # Сохраняем изменения в базе данных
     await db.commit()
-    # Обновляем объект из базы (получаем сгенерированный ID и т.д.)
-    await db.refresh(db_task)
-    # Рассылаем уведомление всем активным WebSocket клиентам
-    for connection in active_connections:
-        await connection.send_text(f"New task created: {db_task.title}")
+    # Запись в кэш заодно вытесняет закэшированный ранее 404 для этого id
+    await cache.set(db_task["id"], db_task)
+    # Рассылаем уведомление WebSocket клиентам владельца задачи
+    fields = {key: db_task[key] for key in ("title", "description", "completed", "version")}
+    event = task_event(TASK_CREATED, db_task["id"], fields, db_task["change_seq"])
+    pubsub.publish(db_task["owner_id"], event, [db_task["id"]])
     return db_task
 
-# Получение списка задач с пагинацией
-@router.get("/tasks/", response_model=List[TaskResponse])
-async def read_tasks(skip: int = 0, limit: int = 10, db: AsyncSession = Depends(get_async_session)):
-    # Запрос задач с пропуском и ограничением количества
-    stmt = select(Task).offset(skip).limit(limit)
-    result = await db.execute(stmt)
-    tasks = result.scalars().all()
+# Получение списка задач с пагинацией.
+# Основной режим — keyset-пагинация по курсору `after`: стоимость запроса не
+# зависит от номера страницы. Курсор следующей страницы возвращается в заголовке
+# X-Next-Cursor. Параметр `skip` (OFFSET) оставлен для совместимости.
+# Выполненные задачи, перенесенные в архив, входят в список только с include_archived=true.
+# Страница отдается со строгим ETag; при совпадении If-None-Match — 304 без тела.
+@router.get("/tasks/", response_model=List[TaskResponse], dependencies=TASK_READ_LIMIT)
+async def read_tasks(
+        response: Response,
+        skip: int = Query(0, ge=0),
+        limit: int = Query(10, ge=1, le=100),
+        after: Optional[str] = None,
+        fast: bool = False,
+        include_archived: bool = False,
+        if_none_match: Optional[str] = Header(None),
+        user: User = Depends(current_user),
+        db: AsyncSession = Depends(get_async_session)
+):
+    if fast:
+        return await read_tasks_fast(db, user.id, limit, decode_id_cursor(after), skip, include_archived,
+                                     if_none_match)
+    # Задачи владельца в стабильном порядке по id (индекс ix_task_owner_id_id)
+    tasks = await task_repository.list_tasks(db, user.id, limit, after_id=decode_id_cursor(after), skip=skip,
+                                             include_archived=include_archived)
+    headers = {"ETag": list_etag(tasks)}
+    # Полная страница — возможно, есть следующая
+    if len(tasks) == limit:
+        headers["X-Next-Cursor"] = encode_cursor({"id": tasks[-1]["id"]})
+    if none_match(if_none_match, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return tasks
+
+# Быстрый режим списка (?fast=true): строки из БД уже соответствуют TaskResponse,
+# поэтому повторная валидация Pydantic пропускается, а ответ кодируется orjson.
+# Тело ответа совпадает с обычным режимом.
+async def read_tasks_fast(db: AsyncSession, owner_id: int, limit: int, after_id: Optional[int],
+                          skip: int, include_archived: bool, if_none_match: Optional[str]) -> Response:
+    rows = await task_repository.list_task_rows(db, owner_id, limit, after_id=after_id, skip=skip,
+                                                include_archived=include_archived)
+    headers = {"ETag": versions_etag((row.id, row.version) for row in rows)}
+    if len(rows) == limit:
+        headers["X-Next-Cursor"] = encode_cursor({"id": rows[-1].id})
+    if none_match(if_none_match, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return ORJSONResponse([dict(zip(task_repository.TASK_RESPONSE_FIELDS, row)) for row in rows], headers=headers)
+
+# Полнотекстовый поиск по своим задачам с ранжированием.
+# `q` — запрос в синтаксисе websearch ("слово", "точная фраза", -исключить, or).
+# Курсор следующей страницы возвращается в заголовке X-Next-Cursor.
+@router.get("/tasks/search", response_model=List[TaskSearchResult], dependencies=TASK_READ_LIMIT)
+async def search_tasks(
+        response: Response,
+        q: str = Query(..., min_length=1, max_length=256),
+        completed: Optional[bool] = None,
+        limit: int = Query(10, ge=1, le=100),
+        after: Optional[str] = None,
+        user: User = Depends(current_user),
+        db: AsyncSession = Depends(get_async_session)
+):
+    tasks = await task_repository.search_tasks(
+        db, user.id, q, limit, completed=completed, after=decode_rank_cursor(after)
+    )
+    if len(tasks) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor({"rank": tasks[-1]["rank"], "id": tasks[-1]["id"]})
     return tasks
 
-# Получение конкретной задачи по ID
-@router.get("/tasks/{task_id}", response_model=TaskResponse)
-async def read_task(task_id: int, db: AsyncSession = Depends(get_async_session)):
-    # Поиск задачи по ID
-    stmt = select(Task).where(Task.id == task_id)
-    result = await db.execute(stmt)
-    task = result.scalar_one_or_none()
+# Потоковая выгрузка задач в NDJSON или CSV. Строки читаются серверным курсором
+# пачками и сразу отправляются клиенту, поэтому память не растет с размером таблицы.
+# Пользователь выгружает свои задачи; суперпользователь — задачи owner_id или все.
+# Задачи, перенесенные в архив, входят в выгрузку только с include_archived=true, после остальных.
+@router.get("/tasks/export", dependencies=TASK_READ_LIMIT)
+async def export_tasks(
+        format: Literal["ndjson", "csv"] = "ndjson",
+        completed: Optional[bool] = None,
+        owner_id: Optional[int] = None,
+        include_archived: bool = False,
+        user: User = Depends(current_user),
+):
+    if not user.is_superuser:
+        owner_id = user.id
+    rows = stream_task_rows(owner_id, completed, include_archived)
+    return StreamingResponse(
+        EXPORTERS[format](rows),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="tasks.{format}"'},
+    )
+
+# Лента изменений своих задач: созданные и измененные задачи и id удаленных с номером
+# изменения больше since, по возрастанию номера. Клиент хранит next_since и после
+# переподключения WebSocket запрашивает только пропущенное, а не перечитывает страницы.
+# Без since возвращается только текущий номер — с него клиент начинает.
+# Номера изменений задач владельца выдаются в порядке фиксации (миграция 0005), поэтому
+# next_since — безопасная отметка: изменение с меньшим номером уже не появится.
+@router.get("/tasks/changes", response_model=TaskChanges, dependencies=TASK_READ_LIMIT)
+async def read_task_changes(
+        since: Optional[int] = Query(None, ge=0),
+        limit: int = Query(100, ge=1, le=1000),
+        user: User = Depends(current_user),
+        db: AsyncSession = Depends(get_async_session)
+):
+    if since is None:
+        seq = await task_repository.last_change_seq(db, user.id)
+        return TaskChanges(tasks=[], deleted=[], next_since=seq, has_more=False)
+    # Лишняя строка показывает, что изменений больше limit
+    changes = await task_repository.list_changes(db, user.id, since, limit + 1)
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    return TaskChanges(
+        tasks=[change for change in changes if not change["deleted"]],
+        deleted=[{"id": change["id"], "change_seq": change["change_seq"]} for change in changes if change["deleted"]],
+        next_since=changes[-1]["change_seq"] if changes else since,
+        has_more=has_more,
+    )
+
+# Число задач пользователя: всего, выполненных и открытых. Одна строка из
+# task_counter, которую поддерживают триггеры, без COUNT по задачам.
+@router.get("/tasks/stats", response_model=TaskStats, dependencies=TASK_READ_LIMIT)
+async def read_task_stats(user: User = Depends(current_user), db: AsyncSession = Depends(get_async_session)):
+    return await get_task_stats(db, user.id)
+
+# Получение конкретной задачи по ID (read-through кэш, 404 тоже кэшируется ненадолго).
+# Задача, перенесенная в архив, читается оттуда; изменение возвращает ее в task.
+# Ответ содержит ETag; при совпадении If-None-Match — 304 без тела.
+@router.get("/tasks/{task_id}", response_model=TaskResponse, dependencies=TASK_READ_LIMIT_BY_IP)
+async def read_task(task_id: int, response: Response, if_none_match: Optional[str] = Header(None),
+                    db: AsyncSession = Depends(get_async_session),
+                    cache: TaskCache = Depends(get_task_cache)):
+    task = await cache.get(task_id)
+    if task is MISSING:
+        # Поиск задачи по ID, затем в архиве
+        task = await task_repository.get_task(db, task_id, include_archived=True)
+        if task is None:
+            await cache.set_missing(task_id)
+        else:
+            await cache.set(task_id, task)
     if task is None:
         raise HTTPException(status_code=404, detail="Task not found")
+    etag = task_etag(task)
+    if none_match(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
     return task
 
-# Обновление задачи
-@router.put("/update-task/{task_id}", response_model=TaskResponse)
-async def update_task(task_id: int, task_update: TaskUpdate, db: AsyncSession = Depends(get_async_session)):
-    # Поиск задачи для обновления
-    stmt = select(Task).where(Task.id == task_id)
-    result = await db.execute(stmt)
-    db_task = result.scalar_one_or_none()
+# Обновление задачи.
+# С заголовком If-Match (ETag из GET) обновление применяется, только если задачу
+# никто не изменил после чтения, иначе — 412 Precondition Failed.
+@router.put("/update-task/{task_id}", response_model=TaskResponse, dependencies=TASK_WRITE_LIMIT_BY_IP)
+async def update_task(task_id: int, task_update: TaskUpdate, response: Response,
+                      if_match: Optional[str] = Header(None),
+                      db: AsyncSession = Depends(get_async_session),
+                      cache: TaskCache = Depends(get_task_cache)):
+    # Один UPDATE ... RETURNING: если строка не вернулась — задачи нет или версия не совпала
+    update_data = task_update.model_dump(exclude_unset=True)
+    expected_versions = if_match_versions(if_match, task_id)
+    db_task = await task_repository.update_task(db, task_id, update_data, expected_versions)
     if db_task is None:
+        # Дополнительный запрос только при неудаче: отличаем 412 от 404
+        if expected_versions is not None and \
+                await task_repository.get_task(db, task_id, include_archived=True) is not None:
+            raise HTTPException(
+                status_code=status.HTTP_412_PRECONDITION_FAILED,
+                detail="Task was modified by another request"
+            )
         raise HTTPException(status_code=404, detail="Task not found")
-    # Обновление полей задачи из переданных данных
-    update_data = task_update.model_dump(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(db_task, key, value)
     # Сохранение изменений
     await db.commit()
-    # Обновление объекта из базы
-    await db.refresh(db_task)
-    # Уведомление клиентов об обновлении
-    for connection in active_connections:
-        await connection.send_text(f"Task {db_task.id} updated")
+    # Write-through: в кэше сразу новая версия задачи
+    await cache.set(task_id, db_task)
+    # Уведомление клиентов владельца об обновлении
+    fields = {**update_data, "version": db_task["version"]}
+    event = task_event(TASK_UPDATED, task_id, fields, db_task["change_seq"])
+    pubsub.publish(db_task["owner_id"], event, [task_id])
+    response.headers["ETag"] = task_etag(db_task)
     return db_task
 
 # Удаление задачи
-@router.delete("/delete-task/{task_id}", response_model=TaskResponse)
-async def delete_task(task_id: int, db: AsyncSession = Depends(get_async_session)):
-    # Поиск задачи для удаления
-    stmt = select(Task).where(Task.id == task_id)
-    result = await db.execute(stmt)
-    task = result.scalar_one_or_none()
+@router.delete("/delete-task/{task_id}", response_model=TaskResponse, dependencies=TASK_WRITE_LIMIT_BY_IP)
+async def delete_task(task_id: int, db: AsyncSession = Depends(get_async_session),
+                      cache: TaskCache = Depends(get_task_cache)):
+    # Один DELETE ... RETURNING: если строка не вернулась — задачи нет
+    task = await task_repository.delete_task(db, task_id)
     if task is None:
         raise HTTPException(status_code=404, detail="Task not found")
-    # Удаление задачи из базы данных
-    await db.delete(task)
     await db.commit()
-    # Уведомление клиентов об удалении
-    for connection in active_connections:
-        await connection.send_text(f"Task {task.id} deleted")
+    await cache.set_missing(task_id)
+    # Уведомление клиентов владельца об удалении
+    pubsub.publish(task["owner_id"], task_event(TASK_DELETED, task_id, seq=task["change_seq"]), [task_id])
     return task
 
 
+def last_seq(rows: List[dict]) -> int:
+    return max(row["change_seq"] for row in rows)
+
+
+# Пакетные операции: каждый запрос — один многострочный INSERT/UPDATE/DELETE ... RETURNING
+# в одной транзакции и одно агрегированное WebSocket-событие.
+# Обновление и удаление затрагивают только задачи текущего пользователя; id, которых нет
+# среди его задач, возвращаются в списке errors, остальные элементы применяются.
+# Размер пакета проверяется при разборе тела (422), до валидации элементов.
+
+# Пакетное создание задач
+@router.post("/create-tasks/", response_model=TaskBatchResponse, dependencies=TASK_WRITE_LIMIT)
+async def create_tasks(items: Annotated[List[Any], Body(max_length=settings.TASK_BATCH_MAX_SIZE)],
+                       user: User = Depends(current_user),
+                       db: AsyncSession = Depends(get_async_session),
+                       cache: TaskCache = Depends(get_task_cache)):
+    # Элементы проверяются по TaskCreate по одному: неверные возвращаются в errors
+    tasks, errors = validate_items(items, TaskCreate)
+    if not tasks:
+        return TaskBatchResponse(items=[], errors=errors)
+    rows = await task_repository.create_tasks(db, user.id, tasks)
+    await db.commit()
+    for row in rows:
+        await cache.set(row["id"], row)
+    row_ids = [row["id"] for row in rows]
+    pubsub.publish(user.id, batch_event(TASKS_CREATED, row_ids, rows, last_seq(rows)), row_ids)
+    return TaskBatchResponse(items=rows, errors=errors)
+
+# Пакетное обновление задач
+@router.put("/update-tasks/", response_model=TaskBatchResponse, dependencies=TASK_WRITE_LIMIT)
+async def update_tasks(tasks: Annotated[List[TaskBatchUpdate], Body(max_length=settings.TASK_BATCH_MAX_SIZE)],
+                       user: User = Depends(current_user),
+                       db: AsyncSession = Depends(get_async_session),
+                       cache: TaskCache = Depends(get_task_cache)):
+    task_ids = [task.id for task in tasks]
+    positions, errors = unique_positions(task_ids)
+    rows = []
+    if positions:
+        rows = await task_repository.update_tasks(db, user.id, [tasks[index] for index in positions])
+        await db.commit()
+    for row in rows:
+        await cache.set(row["id"], row)
+    errors += not_found_errors(task_ids, positions, rows)
+    if rows:
+        row_ids = [row["id"] for row in rows]
+        pubsub.publish(user.id, batch_event(TASKS_UPDATED, row_ids, rows, last_seq(rows)), row_ids)
+    return TaskBatchResponse(items=rows, errors=sorted(errors, key=lambda error: error.index))
+
+# Пакетное удаление задач (id передаются в теле запроса)
+@router.post("/delete-tasks/", response_model=TaskBatchResponse, dependencies=TASK_WRITE_LIMIT)
+async def delete_tasks(task_ids: Annotated[List[int], Body(max_length=settings.TASK_BATCH_MAX_SIZE)],
+                       user: User = Depends(current_user),
+                       db: AsyncSession = Depends(get_async_session),
+                       cache: TaskCache = Depends(get_task_cache)):
+    positions, errors = unique_positions(task_ids)
+    rows = []
+    if positions:
+        rows = await task_repository.delete_tasks(db, user.id, [task_ids[index] for index in positions])
+        await db.commit()
+    for row in rows:
+        await cache.set_missing(row["id"])
+    errors += not_found_errors(task_ids, positions, rows)
+    if rows:
+        row_ids = [row["id"] for row in rows]
+        pubsub.publish(user.id, batch_event(TASKS_DELETED, row_ids, seq=last_seq(rows)), row_ids)
+    return TaskBatchResponse(items=rows, errors=sorted(errors, key=lambda error: error.index))
+
+
+# Импорт задач из потока NDJSON или CSV (тело запроса читается по частям).
+# Валидные строки загружаются через COPY в одной транзакции, ошибки возвращаются
+# с номерами строк. Тело ограничено TASK_IMPORT_MAX_BYTES (413), строка —
+# TASK_IMPORT_MAX_LINE_BYTES (ошибка строки). События WebSocket по импортированным
+# задачам не рассылаются: клиенты получают их через /tasks/changes.
+@router.post("/import-tasks/", response_model=TaskImportResult, dependencies=TASK_WRITE_LIMIT)
+async def import_tasks(request: Request, format: Literal["ndjson", "csv"] = "ndjson",
+                       user: User = Depends(current_user),
+                       db: AsyncSession = Depends(get_async_session)):
+    task_import.check_content_length(request.headers.get("content-length"), settings.TASK_IMPORT_MAX_BYTES)
+    chunks = task_import.limit_size(request.stream(), settings.TASK_IMPORT_MAX_BYTES)
+    result = await task_import.import_tasks(db, user.id, chunks, format)
+    await db.commit()
+    return result
+
+# Статистика кэшей процесса: чтобы подобрать размеры и TTL
+@router.get("/cache/stats", tags=["Service"])
+async def cache_stats(user: User = Depends(current_superuser)):
+    return {
+        "users": user_cache.stats(),
+        "tasks": task_cache.stats(),
+    }
+
+
+# Счетчики WebSocket-соединений процесса: событий, кадров и байт на соединение
+@router.get("/ws/stats", tags=["Service"])
+async def websocket_stats(user: User = Depends(current_superuser)):
+    return {
+        "coalesce_window_ms": settings.WS_COALESCE_WINDOW_MS,
+        "connections": broadcaster.stats(),
+    }
+
+
+# Статические файлы доски задач по именам с хешем содержимого (см. src/assets.py)
+@app.get("/static/{filename}", include_in_schema=False)
+async def static_asset(filename: str, if_none_match: Optional[str] = Header(None)):
+    asset = get_asset(filename)
+    if asset is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    headers = {"Cache-Control": IMMUTABLE_CACHE_CONTROL, "ETag": asset.etag}
+    if none_match(if_none_match, asset.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(asset.content, media_type=asset.media_type, headers=headers)
+
+
+# Liveness: процесс жив и цикл событий отвечает. База не проверяется, чтобы
+# недоступность БД не приводила к перезапуску всех воркеров.
+@app.get("/healthz", tags=["Service"])
+async def healthz():
+    return {"status": "ok"}
+
+
+# Readiness: старт завершен (схема проверена, пул прогрет) и база отвечает
+@app.get("/readyz", tags=["Service"])
+async def readyz():
+    if not getattr(app.state, "ready", False):
+        return JSONResponse({"status": "starting"}, status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+    try:
+        async with asyncio.timeout(settings.READINESS_TIMEOUT):
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+    except Exception as e:
+        logger.warning("Readiness check failed: %r", e)
+        return JSONResponse({"status": "database unavailable"}, status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+    return {"status": "ready", "pool_size": engine.pool.size(), "pool_checked_out": engine.pool.checkedout()}
+
+
+# Метрики процесса в текстовом формате Prometheus. Без аутентификации, чтобы
+# их мог собирать Prometheus: доступ снаружи нужно закрыть на уровне прокси.
+@app.get("/metrics", tags=["Service"], response_class=PlainTextResponse)
+async def metrics_endpoint():
+    return PlainTextResponse(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+
 app.include_router(router)
 
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="127.0.0.1", port=8000, ws='auto')
+    # permessage-deflate: сжатие WebSocket-сообщений, если клиент его поддерживает
+    uvicorn.run(app, host="127.0.0.1", port=8000, ws='auto',
+                ws_per_message_deflate=settings.WS_PER_MESSAGE_DEFLATE)
@@ -0,0 +1,232 @@
+import bisect
+import contextvars
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Минимальный реестр метрик в текстовом формате Prometheus (exposition format 0.0.4).
+# Счетчики и гистограммы могут обновляться из пула потоков (хеширование паролей),
+# поэтому изменения защищены блокировкой.
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric(ABC):
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+
+    @abstractmethod
+    def render(self) -> List[str]:
+        ...
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return self.header() + [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}"
+                                for key, value in values]
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # counts по корзинам без накопления, sum, count
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = ([0] * (len(self.buckets) + 1), [0.0, 0])
+            entry[0][index] += 1
+            entry[1][0] += value
+            entry[1][1] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = [(key, list(counts), list(totals)) for key, (counts, totals) in self._values.items()]
+        lines = self.header()
+        for key, counts, (total, count) in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class CallbackMetric(Metric):
+    """
+    Значение читается в момент сбора: состояние уже хранится в другом объекте
+    (число соединений, статистика кэша), дублировать его не нужно.
+    """
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], float], type: str = "gauge"):
+        super().__init__(name, documentation)
+        self.type = type
+        self.callback = callback
+
+    def render(self) -> List[str]:
+        return self.header() + [f"{self.name} {_number(self.callback())}"]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge_callback(self, name: str, documentation: str, callback: Callable[[], float]) -> CallbackMetric:
+        return self.register(CallbackMetric(name, documentation, callback))
+
+    def counter_callback(self, name: str, documentation: str, callback: Callable[[], float]) -> CallbackMetric:
+        return self.register(CallbackMetric(name, documentation, callback, type="counter"))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+HTTP_REQUESTS = registry.counter(
+    "http_requests_total", "HTTP requests by route template and status", ("method", "route", "status"))
+HTTP_LATENCY = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route"))
+HTTP_SQL_STATEMENTS = registry.histogram(
+    "http_request_sql_statements", "SQL statements executed per HTTP request", ("method", "route"),
+    buckets=COUNT_BUCKETS)
+HTTP_SQL_DURATION = registry.histogram(
+    "http_request_sql_duration_seconds", "Time spent in SQL per HTTP request", ("method", "route"))
+
+SQL_STATEMENTS = registry.counter("db_statements_total", "SQL statements executed")
+SQL_DURATION = registry.histogram("db_statement_duration_seconds", "SQL statement execution time")
+SQL_SLOW = registry.counter("db_slow_statements_total", "SQL statements slower than SLOW_QUERY_MS")
+POOL_CHECKOUT_WAIT = registry.histogram(
+    "db_pool_checkout_wait_seconds", "Time waiting for a connection from the pool")
+
+PASSWORD_HASH_QUEUE_WAIT = registry.histogram(
+    "password_hash_queue_wait_seconds", "Time a password hash job waits for a worker thread")
+
+
+class RequestStats:
+    __slots__ = ("statements", "sql_duration")
+
+    def __init__(self):
+        self.statements = 0
+        self.sql_duration = 0.0
+
+
+# Статистика SQL текущего HTTP-запроса. Синхронный код SQLAlchemy выполняется
+# в greenlet с тем же контекстом, поэтому события движка видят значение запроса.
+request_stats: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar(
+    "request_stats", default=None)
+
+
+def record_statement(duration: float) -> None:
+    SQL_STATEMENTS.inc()
+    SQL_DURATION.observe(duration)
+    stats = request_stats.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.sql_duration += duration
+
+
+class MetricsMiddleware:
+    """
+    ASGI-middleware: задержка, статус и число SQL-запросов по шаблону маршрута
+    (/tasks/{task_id}, а не /tasks/42 — иначе число рядов метрики не ограничено).
+    Чистый ASGI, а не BaseHTTPMiddleware: не буферизует потоковые ответы.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        stats = RequestStats()
+        token = request_stats.set(stats)
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            request_stats.reset(token)
+            route = scope.get("route")
+            labels = (scope["method"], getattr(route, "path", "unmatched"))
+            HTTP_REQUESTS.inc(*labels, str(status_code))
+            HTTP_LATENCY.observe(elapsed, *labels)
+            HTTP_SQL_STATEMENTS.observe(stats.statements, *labels)
+            HTTP_SQL_DURATION.observe(stats.sql_duration, *labels)
+
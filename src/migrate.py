@@ -0,0 +1,111 @@
+"""
+Применение SQL-миграций из src/migrations.
+
+Миграция — файл NNNN_описание.sql. Каждая применяется в своей транзакции
+и записывается в таблицу schema_version. Параллельные запуски (несколько
+подов при выкатке) сериализуются advisory-блокировкой. Приложение при старте
+миграции не применяет, а только проверяет версию схемы.
+
+    python -m src.migrate          # применить недостающие миграции
+    python -m src.migrate --check  # код возврата 1, если есть непримененные
+"""
+import argparse
+import asyncio
+import os
+import re
+import sys
+from typing import List, NamedTuple
+
+import asyncpg
+
+from src.config import settings
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "migrations")
+
+# Произвольный ключ advisory-блокировки на время применения миграций
+MIGRATION_LOCK_ID = 7_311_017
+
+CREATE_VERSION_TABLE = """
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INTEGER PRIMARY KEY,
+    name VARCHAR NOT NULL,
+    applied_at TIMESTAMP WITHOUT TIME ZONE DEFAULT timezone('utc', now()) NOT NULL
+)
+"""
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    path: str
+
+
+def load_migrations() -> List[Migration]:
+    migrations = []
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        match = re.fullmatch(r"(\d+)_(\w+)\.sql", filename)
+        if match:
+            migrations.append(Migration(int(match[1]), match[2], os.path.join(MIGRATIONS_DIR, filename)))
+    return migrations
+
+
+# Версия схемы, которую ожидает этот код
+LATEST_VERSION = max((migration.version for migration in load_migrations()), default=0)
+
+
+async def connect() -> asyncpg.Connection:
+    return await asyncpg.connect(
+        host=settings.DB_HOST, port=int(settings.DB_PORT), user=settings.DB_USER,
+        password=settings.DB_PASS or None, database=settings.DB_NAME,
+    )
+
+
+# Текущая версия схемы; 0 — миграции не применялись
+async def current_version(conn: asyncpg.Connection) -> int:
+    if await conn.fetchval("SELECT to_regclass('schema_version')") is None:
+        return 0
+    return await conn.fetchval("SELECT coalesce(max(version), 0) FROM schema_version")
+
+
+async def migrate(conn: asyncpg.Connection, log=print) -> int:
+    await conn.execute("SELECT pg_advisory_lock($1)", MIGRATION_LOCK_ID)
+    try:
+        await conn.execute(CREATE_VERSION_TABLE)
+        version = await current_version(conn)
+        for migration in load_migrations():
+            if migration.version <= version:
+                continue
+            with open(migration.path) as f:
+                sql = f.read()
+            async with conn.transaction():
+                await conn.execute(sql)
+                await conn.execute(
+                    "INSERT INTO schema_version (version, name) VALUES ($1, $2)",
+                    migration.version, migration.name,
+                )
+            log(f"applied {migration.version:04d}_{migration.name}")
+            version = migration.version
+        return version
+    finally:
+        await conn.execute("SELECT pg_advisory_unlock($1)", MIGRATION_LOCK_ID)
+
+
+async def main(check: bool) -> int:
+    conn = await connect()
+    try:
+        if check:
+            version = await current_version(conn)
+            print(f"schema version {version}, latest {LATEST_VERSION}")
+            return 0 if version >= LATEST_VERSION else 1
+        version = await migrate(conn)
+        print(f"schema version {version}")
+        return 0
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check", action="store_true", help="только проверить версию схемы")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.check)))
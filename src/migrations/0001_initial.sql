@@ -0,0 +1,68 @@
+-- Исходная схема: роли, пользователи, задачи.
+-- IF NOT EXISTS: миграция применяется и к базам, созданным раньше через create_all и init.sql.
+
+CREATE TABLE IF NOT EXISTS role (
+    id SERIAL NOT NULL,
+    name VARCHAR NOT NULL,
+    permissions JSON,
+    PRIMARY KEY (id)
+);
+
+CREATE TABLE IF NOT EXISTS person (
+    id SERIAL NOT NULL,
+    email VARCHAR NOT NULL,
+    username VARCHAR NOT NULL,
+    registered_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    role_id INTEGER NOT NULL,
+    hashed_password VARCHAR(1024) NOT NULL,
+    is_active BOOLEAN NOT NULL,
+    is_superuser BOOLEAN NOT NULL,
+    is_verified BOOLEAN NOT NULL,
+    PRIMARY KEY (id),
+    FOREIGN KEY (role_id) REFERENCES role (id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_person_id ON person (id);
+
+CREATE TABLE IF NOT EXISTS task (
+    id SERIAL NOT NULL,
+    title VARCHAR NOT NULL,
+    description VARCHAR NOT NULL,
+    completed BOOLEAN NOT NULL,
+    version INTEGER DEFAULT 1 NOT NULL,
+    updated_at TIMESTAMP WITHOUT TIME ZONE DEFAULT timezone('utc', now()) NOT NULL,
+    owner_id INTEGER NOT NULL,
+    -- Вычисляемый tsvector для полнотекстового поиска: заголовок весомее описания
+    search_vector TSVECTOR GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+    ) STORED NOT NULL,
+    PRIMARY KEY (id),
+    FOREIGN KEY (owner_id) REFERENCES person (id)
+);
+
+-- В базе, созданной через create_all, таблица task уже есть, но без колонок,
+-- добавленных позже: CREATE TABLE IF NOT EXISTS ее пропускает, поэтому
+-- колонки добавляются отдельно (в новой базе эти команды ничего не делают)
+ALTER TABLE task ADD COLUMN IF NOT EXISTS version INTEGER DEFAULT 1 NOT NULL;
+ALTER TABLE task ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITHOUT TIME ZONE
+    DEFAULT timezone('utc', now()) NOT NULL;
+ALTER TABLE task ADD COLUMN IF NOT EXISTS search_vector TSVECTOR GENERATED ALWAYS AS (
+    setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+) STORED NOT NULL;
+-- B-tree по описанию из create_all заменен полнотекстовым индексом ix_task_search_vector
+DROP INDEX IF EXISTS ix_task_description;
+
+CREATE INDEX IF NOT EXISTS ix_task_id ON task (id);
+CREATE INDEX IF NOT EXISTS ix_task_title ON task (title);
+-- Keyset-пагинация: WHERE owner_id = ? AND id > ? ORDER BY id
+CREATE INDEX IF NOT EXISTS ix_task_owner_id_id ON task (owner_id, id);
+-- Полнотекстовый поиск: WHERE search_vector @@ tsquery
+CREATE INDEX IF NOT EXISTS ix_task_search_vector ON task USING gin (search_vector);
+
+-- Базовые роли
+INSERT INTO role (id, name, permissions) VALUES
+(1, 'user', '["read", "write"]'),
+(2, 'admin', '["read", "write", "delete"]')
+ON CONFLICT (id) DO NOTHING;
@@ -0,0 +1,85 @@
+-- Счетчики задач по владельцам: всего и выполненных (открытые = total - completed).
+-- Поддерживаются триггерами уровня оператора с transition-таблицами: одиночные,
+-- пакетные изменения и импорт обновляют счетчики в той же транзакции, одним
+-- UPSERT на владельца за оператор.
+
+CREATE TABLE IF NOT EXISTS task_counter (
+    owner_id INTEGER NOT NULL,
+    total BIGINT DEFAULT 0 NOT NULL,
+    completed BIGINT DEFAULT 0 NOT NULL,
+    PRIMARY KEY (owner_id),
+    FOREIGN KEY (owner_id) REFERENCES person (id) ON DELETE CASCADE
+);
+
+-- Новые задачи прибавляются к счетчикам владельцев, удаленные вычитаются
+CREATE OR REPLACE FUNCTION task_counter_after_insert() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO task_counter AS c (owner_id, total, completed)
+    SELECT owner_id, count(*), count(*) FILTER (WHERE completed)
+    FROM new_rows
+    GROUP BY owner_id
+    ON CONFLICT (owner_id) DO UPDATE
+        SET total = c.total + EXCLUDED.total, completed = c.completed + EXCLUDED.completed;
+    RETURN NULL;
+END
+$$;
+
+CREATE OR REPLACE FUNCTION task_counter_after_delete() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE task_counter AS c
+    SET total = c.total - d.total, completed = c.completed - d.completed
+    FROM (
+        SELECT owner_id, count(*) AS total, count(*) FILTER (WHERE completed) AS completed
+        FROM old_rows
+        GROUP BY owner_id
+    ) AS d
+    WHERE c.owner_id = d.owner_id;
+    RETURN NULL;
+END
+$$;
+
+-- Изменение completed или owner_id: новые строки со знаком +, старые со знаком -
+CREATE OR REPLACE FUNCTION task_counter_after_update() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO task_counter AS c (owner_id, total, completed)
+    SELECT owner_id, sum(total), sum(completed)
+    FROM (
+        SELECT owner_id, 1 AS total, completed::int AS completed FROM new_rows
+        UNION ALL
+        SELECT owner_id, -1, -completed::int FROM old_rows
+    ) AS delta
+    GROUP BY owner_id
+    HAVING sum(total) <> 0 OR sum(completed) <> 0
+    ON CONFLICT (owner_id) DO UPDATE
+        SET total = c.total + EXCLUDED.total, completed = c.completed + EXCLUDED.completed;
+    RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS task_counter_insert ON task;
+CREATE TRIGGER task_counter_insert
+    AFTER INSERT ON task
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION task_counter_after_insert();
+
+DROP TRIGGER IF EXISTS task_counter_delete ON task;
+CREATE TRIGGER task_counter_delete
+    AFTER DELETE ON task
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION task_counter_after_delete();
+
+-- Postgres не допускает transition-таблицы вместе со списком столбцов (UPDATE OF ...),
+-- поэтому триггер срабатывает на любой UPDATE; при правке только заголовка разности
+-- нулевые, HAVING их отбрасывает и строки task_counter не меняются
+DROP TRIGGER IF EXISTS task_counter_update ON task;
+CREATE TRIGGER task_counter_update
+    AFTER UPDATE ON task
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION task_counter_after_update();
+
+-- Начальные значения по существующим задачам
+INSERT INTO task_counter AS c (owner_id, total, completed)
+SELECT owner_id, count(*), count(*) FILTER (WHERE completed)
+FROM task
+GROUP BY owner_id
+ON CONFLICT (owner_id) DO UPDATE SET total = EXCLUDED.total, completed = EXCLUDED.completed;
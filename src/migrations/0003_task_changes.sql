@@ -0,0 +1,26 @@
+-- Лента изменений задач для /tasks/changes.
+-- Каждая запись задачи (создание, изменение) получает новый номер из общей
+-- последовательности task_change_seq, удаление оставляет tombstone с номером из
+-- той же последовательности. Клиент запрашивает изменения после последнего
+-- известного ему номера.
+-- Значение по умолчанию с nextval перезаписывает таблицу task целиком
+-- (существующие строки получают номера): на больших таблицах выполнять вне пиковой нагрузки.
+
+CREATE SEQUENCE IF NOT EXISTS task_change_seq AS BIGINT;
+
+ALTER TABLE task ADD COLUMN IF NOT EXISTS change_seq BIGINT DEFAULT nextval('task_change_seq') NOT NULL;
+ALTER SEQUENCE task_change_seq OWNED BY task.change_seq;
+
+-- Изменения владельца после номера: WHERE owner_id = ? AND change_seq > ? ORDER BY change_seq
+CREATE INDEX IF NOT EXISTS ix_task_owner_id_change_seq ON task (owner_id, change_seq);
+
+CREATE TABLE IF NOT EXISTS task_tombstone (
+    task_id INTEGER NOT NULL,
+    owner_id INTEGER NOT NULL,
+    change_seq BIGINT DEFAULT nextval('task_change_seq') NOT NULL,
+    deleted_at TIMESTAMP WITHOUT TIME ZONE DEFAULT timezone('utc', now()) NOT NULL,
+    PRIMARY KEY (task_id),
+    FOREIGN KEY (owner_id) REFERENCES person (id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS ix_task_tombstone_owner_id_change_seq ON task_tombstone (owner_id, change_seq);
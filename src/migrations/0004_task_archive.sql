@@ -0,0 +1,38 @@
+-- Холодное хранилище выполненных задач. Фоновая задача (src/task_logic/task_archive.py)
+-- переносит из task выполненные задачи старше TASK_ARCHIVE_AFTER_DAYS: таблица task,
+-- ее индексы и vacuum остаются размером с рабочий набор. Архивные задачи только читаются.
+
+CREATE TABLE IF NOT EXISTS task_archive (
+    id INTEGER NOT NULL,
+    title VARCHAR NOT NULL,
+    description VARCHAR NOT NULL,
+    completed BOOLEAN NOT NULL,
+    version INTEGER NOT NULL,
+    updated_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    owner_id INTEGER NOT NULL,
+    change_seq BIGINT NOT NULL,
+    archived_at TIMESTAMP WITHOUT TIME ZONE DEFAULT timezone('utc', now()) NOT NULL,
+    PRIMARY KEY (id),
+    FOREIGN KEY (owner_id) REFERENCES person (id)
+);
+
+-- Страницы архивных задач владельца в порядке id, как ix_task_owner_id_id
+CREATE INDEX IF NOT EXISTS ix_task_archive_owner_id_id ON task_archive (owner_id, id);
+
+-- Кандидаты на перенос: частичный индекс только по выполненным задачам
+CREATE INDEX IF NOT EXISTS ix_task_completed_updated_at ON task (updated_at) WHERE completed;
+
+-- Счетчики task_counter учитывают и архив: перенос вычитает задачу триггером
+-- удаления на task и прибавляет триггером вставки на task_archive (те же функции
+-- из миграции 0002), итог по владельцу не меняется
+DROP TRIGGER IF EXISTS task_archive_counter_insert ON task_archive;
+CREATE TRIGGER task_archive_counter_insert
+    AFTER INSERT ON task_archive
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION task_counter_after_insert();
+
+DROP TRIGGER IF EXISTS task_archive_counter_delete ON task_archive;
+CREATE TRIGGER task_archive_counter_delete
+    AFTER DELETE ON task_archive
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION task_counter_after_delete();
@@ -0,0 +1,52 @@
+-- Номера ленты изменений в порядке фиксации.
+-- Номер из task_change_seq выдается при записи, а видна запись после фиксации:
+-- транзакция, которая взяла номер раньше соседней, но фиксируется позже, появлялась
+-- в /tasks/changes уже после того, как клиент сохранил больший next_since, и
+-- клиент ее пропускал. Теперь номер берется под advisory-блокировкой владельца,
+-- которая держится до конца транзакции: изменения задач одного владельца получают
+-- номера в порядке фиксации, и любой прочитанный номер — безопасная отметка.
+-- Записи одного владельца из-за этого выполняются по очереди; записи разных
+-- владельцев друг друга не ждут.
+
+-- Блокировка ленты владельца до конца транзакции (повторный вызов в той же
+-- транзакции не ждет). Возвращает true, чтобы ее можно было вызвать в WHERE:
+-- UPDATE и DELETE должны взять ее до блокировки строк, иначе пакетное изменение
+-- и одиночное изменение той же задачи могли бы ждать друг друга по кругу.
+CREATE OR REPLACE FUNCTION task_change_lock(owner INTEGER) RETURNS BOOLEAN LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM pg_advisory_xact_lock(7311020, owner);
+    RETURN true;
+END
+$$;
+
+-- Следующий номер изменения задачи владельца: под его блокировкой
+CREATE OR REPLACE FUNCTION task_next_change_seq(owner INTEGER) RETURNS BIGINT LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM pg_advisory_xact_lock(7311020, owner);
+    RETURN nextval('task_change_seq');
+END
+$$;
+
+-- Новые задачи (в том числе из импорта) и tombstone получают номер триггером:
+-- значение по умолчанию вычислялось бы до блокировки. Блокировка и nextval без
+-- вложенных вызовов функций: на массовой вставке триггер добавляет ~6% вместо ~30%
+CREATE OR REPLACE FUNCTION task_change_seq_before_insert() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM pg_advisory_xact_lock(7311020, NEW.owner_id);
+    NEW.change_seq := nextval('task_change_seq');
+    RETURN NEW;
+END
+$$;
+
+ALTER TABLE task ALTER COLUMN change_seq DROP DEFAULT;
+ALTER TABLE task_tombstone ALTER COLUMN change_seq DROP DEFAULT;
+
+DROP TRIGGER IF EXISTS task_change_seq_insert ON task;
+CREATE TRIGGER task_change_seq_insert
+    BEFORE INSERT ON task
+    FOR EACH ROW EXECUTE FUNCTION task_change_seq_before_insert();
+
+DROP TRIGGER IF EXISTS task_tombstone_change_seq_insert ON task_tombstone;
+CREATE TRIGGER task_tombstone_change_seq_insert
+    BEFORE INSERT ON task_tombstone
+    FOR EACH ROW EXECUTE FUNCTION task_change_seq_before_insert();
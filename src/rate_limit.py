@@ -0,0 +1,149 @@
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+from fastapi import Depends, HTTPException, Request, status
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src import metrics
+from src.auth.auth_config import current_user
+from src.auth.models import User
+from src.config import settings
+
+# Ограничение нагрузки в памяти процесса: token bucket на пользователя (или IP
+# для маршрутов без аутентификации) с бюджетом на группу маршрутов и общий
+# предел одновременных запросов. Каждый воркер считает независимо: при N
+# воркерах клиент может получить до N бюджетов.
+
+RATE_LIMIT_DECISIONS = metrics.registry.counter(
+    "rate_limit_decisions_total", "Rate limiter decisions by budget", ("limit", "decision"))
+REQUESTS_SHED = metrics.registry.counter(
+    "http_requests_shed_total", "Requests rejected because too many were in flight")
+
+
+def parse_rate(value: str) -> Tuple[float, float]:
+    """
+    "N/S" — не больше N запросов за S секунд: емкость корзины N (допустимый
+    всплеск), пополнение N/S токенов в секунду.
+    """
+    try:
+        count, period = value.split("/")
+        capacity, seconds = float(count), float(period)
+    except ValueError:
+        raise ValueError(f"Invalid rate limit {value!r}, expected N/SECONDS") from None
+    if capacity <= 0 or seconds <= 0:
+        raise ValueError(f"Invalid rate limit {value!r}, N and SECONDS must be positive")
+    return capacity, capacity / seconds
+
+
+class TokenBucketLimiter:
+    """
+    Корзины токенов по ключу. Корзина хранит (токены, время обновления) и
+    пополняется лениво при обращении, поэтому фоновая задача не нужна.
+    Число ключей ограничено max_keys: давно не использованные корзины
+    вытесняются (LRU) — вытесненный ключ начинает с полной корзины.
+    """
+
+    def __init__(self, name: str, rate: str, max_keys: int):
+        self.name = name
+        self.capacity, self.refill_rate = parse_rate(rate)
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    # 0 — запрос разрешен, иначе — через сколько секунд появится токен
+    def acquire(self, key: str) -> float:
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - updated) * self.refill_rate)
+        if tokens >= 1:
+            tokens -= 1
+            retry_after = 0.0
+        else:
+            retry_after = (1 - tokens) / self.refill_rate
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        RATE_LIMIT_DECISIONS.inc(self.name, "limited" if retry_after else "allowed")
+        return retry_after
+
+
+limiters: Dict[str, TokenBucketLimiter] = {
+    name: TokenBucketLimiter(name, rate, settings.RATE_LIMIT_MAX_KEYS)
+    for name, rate in (
+        ("login", settings.RATE_LIMIT_LOGIN),
+        ("register", settings.RATE_LIMIT_REGISTER),
+        ("task_read", settings.RATE_LIMIT_TASK_READ),
+        ("task_write", settings.RATE_LIMIT_TASK_WRITE),
+    )
+}
+
+
+def _check(name: str, key: str) -> None:
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+    retry_after = limiters[name].acquire(key)
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
+
+def client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+# Dependency: бюджет name на пользователя. current_user кэшируется FastAPI в пределах
+# запроса, поэтому в маршрутах с current_user повторной аутентификации нет.
+def limit_user(name: str):
+    async def dependency(user: User = Depends(current_user)) -> None:
+        _check(name, f"user:{user.id}")
+    return dependency
+
+
+# Dependency: бюджет name на IP-адрес клиента — для маршрутов без аутентификации
+def limit_ip(name: str):
+    async def dependency(request: Request) -> None:
+        _check(name, f"ip:{client_ip(request)}")
+    return dependency
+
+
+class InFlightLimitMiddleware:
+    """
+    Общий предел одновременных HTTP-запросов воркера. Сверх предела запрос
+    сразу получает 503 с Retry-After, не занимая цикл событий и пул соединений:
+    лучше быстро отказать части клиентов, чем отвечать всем с таймаутами.
+    Пробы и метрики (exempt_paths) проходят всегда.
+    """
+
+    def __init__(self, app: ASGIApp, max_in_flight: int, retry_after: int,
+                 exempt_paths: Tuple[str, ...] = ("/healthz", "/readyz", "/metrics")):
+        self.app = app
+        self.max_in_flight = max_in_flight
+        self.retry_after = retry_after
+        self.exempt_paths = exempt_paths
+        self.in_flight = 0
+        metrics.registry.gauge_callback(
+            "http_requests_in_flight", "HTTP requests currently being processed", lambda: self.in_flight)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self.max_in_flight <= 0 or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+        if self.in_flight >= self.max_in_flight:
+            REQUESTS_SHED.inc()
+            response = JSONResponse(
+                {"detail": "Server is overloaded"},
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": str(self.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
@@ -0,0 +1,30 @@
+"""
+Сверка счетчиков задач (task_counter) с таблицами task и task_archive.
+
+Счетчики поддерживаются триггерами, расхождения возможны только после
+изменений в обход них (ручной SQL, восстановление данных). Скрипт можно
+запускать по расписанию: если расхождений нет, он ничего не меняет.
+
+    python -m src.reconcile_counters
+    python -m src.reconcile_counters --owner-id 42
+"""
+import argparse
+import asyncio
+
+from src.database import async_session_maker, engine
+from src.task_logic.task_counters import reconcile_task_counters
+
+
+async def main(owner_id):
+    async with async_session_maker() as session:
+        corrected = await reconcile_task_counters(session, owner_id)
+        await session.commit()
+    await engine.dispose()
+    print(f"corrected {corrected} owner(s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--owner-id", type=int, help="сверить только одного владельца")
+    args = parser.parse_args()
+    asyncio.run(main(args.owner_id))
@@ -0,0 +1,577 @@
+const userId = document.getElementById('userId').value;
+
+// Переменная для хранения WebSocket соединения
+let socket;
+// Получаем ссылки на DOM элементы
+const messagesDiv = document.getElementById("messages");
+const statusDiv = document.getElementById("status");
+// Переменные для пагинации
+let currentPage = 1;
+const tasksPerPage = 5;
+// Курсоры страниц: pageCursors[i] — курсор, с которого начинается страница i + 1
+let pageCursors = [null];
+// Задачи текущей страницы
+let currentTasks = [];
+// Номер последнего известного изменения задач (лента /tasks/changes)
+let lastSeq = null;
+// Ключ для хранения истории чата в LocalStorage
+const CHAT_HISTORY_KEY = 'websocket_chat_history';
+
+// Функция загрузки истории чата из LocalStorage
+function loadChatHistory() {
+    try {
+        // Получаем историю чата из LocalStorage
+        const savedHistory = localStorage.getItem(CHAT_HISTORY_KEY);
+        if (savedHistory) {
+            // Парсим сохраненную историю
+            const history = JSON.parse(savedHistory);
+            // Очищаем текущие сообщения
+            messagesDiv.innerHTML = '';
+            // Добавляем каждое сообщение из истории
+            history.forEach(message => {
+                addMessageToDisplay(message);
+            });
+            console.log('История чата загружена из LocalStorage');
+        }
+    } catch (error) {
+        console.error('Ошибка при загрузке истории чата:', error);
+    }
+}
+
+// Функция сохранения истории чата в LocalStorage
+function saveChatHistory() {
+    try {
+        // Собираем все текущие сообщения
+        const messageElements = messagesDiv.querySelectorAll('.message');
+        const messages = Array.from(messageElements).map(el => el.textContent);
+        // Сохраняем в LocalStorage
+        localStorage.setItem(CHAT_HISTORY_KEY, JSON.stringify(messages));
+    } catch (error) {
+        console.error('Ошибка при сохранении истории чата:', error);
+    }
+}
+
+// Функция очистки истории чата
+function clearChatHistory() {
+    // Очищаем LocalStorage
+    localStorage.removeItem(CHAT_HISTORY_KEY);
+    // Очищаем отображение сообщений
+    messagesDiv.innerHTML = '';
+    console.log('История чата очищена');
+}
+
+// Функция добавления сообщения в отображение (без сохранения)
+function addMessageToDisplay(message) {
+    const messageElement = document.createElement("div");
+    messageElement.className = "message";
+    messageElement.textContent = message;
+    messagesDiv.appendChild(messageElement);
+    // Прокручиваем к последнему сообщению
+    messagesDiv.scrollTop = messagesDiv.scrollHeight;
+}
+
+// Функция добавления сообщения в чат и сохранения в историю
+function addMessage(message) {
+    // Добавляем сообщение в отображение
+    addMessageToDisplay(message);
+    // Сохраняем обновленную историю
+    saveChatHistory();
+}
+
+// Функция обработки кадра сервера: одно событие или пакет {"type": "batch", "events": [...]}
+function handleMessage(data) {
+    let event;
+    try {
+        event = JSON.parse(data);
+    } catch (error) {
+        addMessage("Server: " + data);
+        return;
+    }
+    const events = event.type === 'batch' ? event.events : [event];
+    events.forEach(item => addMessage("Server: " + formatEvent(item)));
+    applyEvents(events);
+    if (event.seq !== undefined && event.seq !== null) {
+        lastSeq = Math.max(lastSeq || 0, event.seq);
+    }
+}
+
+// Функция преобразования события сервера в текст для чата
+function formatEvent(event) {
+    switch (event.type) {
+        case 'task.created':
+            return `New task created: ${event.fields.title}`;
+        case 'task.updated':
+            return `Task ${event.task_id} updated`;
+        case 'task.deleted':
+            return `Task ${event.task_id} deleted`;
+        case 'tasks.created':
+            return `${event.task_ids.length} tasks created`;
+        case 'tasks.updated':
+            return `${event.task_ids.length} tasks updated`;
+        case 'tasks.deleted':
+            return `${event.task_ids.length} tasks deleted`;
+        case 'message':
+            return `Client with ${event.client_id} wrote ${event.text}!`;
+        default:
+            return JSON.stringify(event);
+    }
+}
+
+// Функция применения событий задач к текущей странице без повторной загрузки
+function applyEvents(events) {
+    events.forEach(applyEvent);
+    // Новые задачи попадают в конец списка: видны при переходе на последнюю страницу
+    if (events.some(event => event.seq !== undefined)) {
+        displayTasks(currentTasks);
+    }
+}
+
+function applyEvent(event) {
+    switch (event.type) {
+        case 'task.updated':
+            currentTasks = currentTasks.map(task => task.id === event.task_id ? { ...task, ...event.fields } : task);
+            break;
+        case 'tasks.updated': {
+            const updated = new Map(event.items.map(item => [item.id, item]));
+            currentTasks = currentTasks.map(task => updated.get(task.id) || task);
+            break;
+        }
+        case 'task.deleted':
+            currentTasks = currentTasks.filter(task => task.id !== event.task_id);
+            break;
+        case 'tasks.deleted':
+            currentTasks = currentTasks.filter(task => !event.task_ids.includes(task.id));
+            break;
+    }
+}
+
+// Функция загрузки изменений задач после lastSeq (при первом вызове — только номер)
+async function syncChanges() {
+    try {
+        let hasMore = true;
+        while (hasMore) {
+            const params = lastSeq === null ? '' : `?since=${lastSeq}`;
+            const response = await fetch(`${apiBase}/tasks/changes${params}`);
+            if (!response.ok) {
+                return;
+            }
+            const changes = await response.json();
+            const changed = new Map(changes.tasks.map(task => [task.id, task]));
+            const deleted = new Set(changes.deleted.map(item => item.id));
+            currentTasks = currentTasks
+                .filter(task => !deleted.has(task.id))
+                .map(task => changed.get(task.id) || task);
+            lastSeq = changes.next_since;
+            hasMore = changes.has_more;
+        }
+        displayTasks(currentTasks);
+        loadStats();
+    } catch (error) {
+        console.error('Error:', error);
+    }
+}
+
+// Функция подключения к WebSocket серверу
+function connectWebSocket() {
+    try {
+        socket = new WebSocket(`ws://localhost:8000/ws/tasks/${userId}`);
+
+        // Обработчик события открытия соединения
+        socket.onopen = function(event) {
+            statusDiv.textContent = "Status: Connected";
+            statusDiv.className = "connection-status status-connected";
+            addMessage("System: Connected to server");
+            // После переподключения догружаем изменения, пропущенные без соединения
+            if (lastSeq !== null) {
+                syncChanges();
+            }
+        };
+
+        // Обработчик входящих сообщений от сервера
+        socket.onmessage = function(event) {
+            handleMessage(event.data);
+        };
+
+        // Обработчик закрытия соединения
+        socket.onclose = function(event) {
+            statusDiv.textContent = "Status: Disconnected";
+            statusDiv.className = "connection-status status-disconnected";
+            // Добавляем сообщение о разрыве соединения
+            addMessage("System: Connection closed");
+            clearChatHistory();
+            console.log('Соединение закрыто, история удалена');
+            setTimeout(connectWebSocket, 3000);
+        };
+
+        // Обработчик ошибок соединения
+        socket.onerror = function(error) {
+            statusDiv.textContent = "Status: Error";
+            statusDiv.className = "connection-status status-disconnected";
+            addMessage("System: Connection error");
+        };
+
+    } catch (error) {
+        addMessage("System: Failed to connect - " + error);
+        // Попробовать переподключиться через 3 секунды при ошибке
+        setTimeout(connectWebSocket, 3000);
+    }
+}
+
+// Функция отправки сообщения через WebSocket
+function sendMessage() {
+    const messageInput = document.getElementById("messageInput");
+    const message = messageInput.value.trim();
+
+    if (message && socket && socket.readyState === WebSocket.OPEN) {
+        socket.send(message);
+        addMessage("You: " + message);
+        messageInput.value = "";
+    } else if (!message) {
+        alert("Please enter a message");
+    } else {
+        alert("WebSocket is not connected");
+    }
+}
+
+// Базовый URL API
+const apiBase = 'http://localhost:8000';
+
+// Обработчик отправки формы создания задачи
+document.getElementById('createTaskForm').addEventListener('submit', async function(e) {
+    e.preventDefault();
+
+    // Получаем значения из формы
+    const title = document.getElementById('title').value;
+    const description = document.getElementById('description').value;
+
+    try {
+        // Отправляем POST запрос для создания задачи
+        const response = await fetch(`${apiBase}/create-task/`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+                title: title,
+                description: description
+            })
+        });
+
+        if (response.ok) {
+            const task = await response.json();
+            addMessage(`Task created: ${task.title}`);
+            // Очищаем форму
+            document.getElementById('createTaskForm').reset();
+            // Обновляем список задач
+            loadTasks();
+        } else {
+            const error = await response.json();
+            alert(`Error creating task: ${error.detail}`);
+        }
+    } catch (error) {
+        console.error('Error:', error);
+        alert('Failed to create task');
+    }
+});
+
+// Функция получения задачи по ID
+async function getTaskById() {
+    const taskId = document.getElementById('taskIdInput').value;
+
+    if (!taskId) {
+        alert('Please enter a task ID');
+        return;
+    }
+
+    try {
+        // Отправляем GET запрос для получения задачи по ID
+        const response = await fetch(`${apiBase}/tasks/${taskId}`);
+
+        if (response.ok) {
+            const task = await response.json();
+            displaySingleTask(task);
+        } else if (response.status === 404) {
+            document.getElementById('singleTaskResult').innerHTML = '<p>Task not found</p>';
+        } else {
+            const error = await response.json();
+            alert(`Error: ${error.detail}`);
+        }
+    } catch (error) {
+        console.error('Error:', error);
+        alert('Failed to fetch task');
+    }
+}
+
+// Функция отображения одной задачи
+function displaySingleTask(task) {
+    const taskElement = document.createElement('div');
+    taskElement.className = `task-item ${task.completed ? 'completed' : ''}`;
+    taskElement.innerHTML = `
+        <div class="task-header">
+            <div class="task-title">${task.title}</div>
+            <span class="task-status ${task.completed ? 'status-completed' : 'status-pending'}">
+                ${task.completed ? 'Completed' : 'Pending'}
+            </span>
+        </div>
+        <div class="task-description">${task.description}</div>
+        <div class="task-actions">
+            <button class="update" onclick="updateTaskPrompt(${task.id}, '${task.title}', '${task.description}', ${task.completed}, ${task.version})">Update</button>
+            <button class="delete" onclick="deleteTask(${task.id})">Delete</button>
+        </div>
+    `;
+
+    document.getElementById('singleTaskResult').innerHTML = '';
+    document.getElementById('singleTaskResult').appendChild(taskElement);
+}
+
+// Функция загрузки задач с пагинацией по курсору
+async function loadTasks(page = 1) {
+    // Переходить можно только на уже известные страницы
+    if (page > pageCursors.length) {
+        page = pageCursors.length;
+    }
+    currentPage = page;
+    const params = new URLSearchParams({ limit: tasksPerPage });
+    const cursor = pageCursors[page - 1];
+    if (cursor) {
+        params.set('after', cursor);
+    }
+
+    try {
+        // Отправляем GET запрос для получения списка задач
+        const response = await fetch(`${apiBase}/tasks/?${params}`);
+
+        if (response.ok) {
+            const tasks = await response.json();
+            // Курсоры дальше текущей страницы могли устареть — запоминаем только следующий
+            const nextCursor = response.headers.get('X-Next-Cursor');
+            pageCursors.length = page;
+            if (nextCursor) {
+                pageCursors.push(nextCursor);
+            }
+            displayTasks(tasks);
+            updatePagination();
+            loadStats();
+        } else {
+            const error = await response.json();
+            alert(`Error loading tasks: ${error.detail}`);
+        }
+    } catch (error) {
+        console.error('Error:', error);
+        alert('Failed to load tasks');
+    }
+}
+
+// Функция загрузки счетчиков задач (одна строка task_counter, без подсчета задач)
+async function loadStats() {
+    try {
+        const response = await fetch(`${apiBase}/tasks/stats`);
+        if (response.ok) {
+            const stats = await response.json();
+            document.getElementById('taskStats').textContent =
+                `Total: ${stats.total} / Completed: ${stats.completed} / Open: ${stats.open}`;
+        }
+    } catch (error) {
+        console.error('Error:', error);
+    }
+}
+
+// Функция отображения списка задач
+function displayTasks(tasks) {
+    currentTasks = tasks;
+    const taskList = document.getElementById('taskList');
+    taskList.innerHTML = '';
+
+    if (tasks.length === 0) {
+        taskList.innerHTML = '<p>No tasks found</p>';
+        return;
+    }
+
+    const taskListElement = document.createElement('ul');
+    taskListElement.className = 'task-list';
+
+    // Создаем HTML для каждой задачи
+    tasks.forEach(task => {
+        const taskItem = document.createElement('li');
+        taskItem.className = `task-item ${task.completed ? 'completed' : ''}`;
+        taskItem.innerHTML = `
+            <div class="task-header">
+                <div class="task-title">${task.title}</div>
+                <span class="task-status ${task.completed ? 'status-completed' : 'status-pending'}">
+                    ${task.completed ? 'Completed' : 'Pending'}
+                </span>
+            </div>
+            <div class="task-description">${task.description}</div>
+            <div class="task-actions">
+                <button class="update" onclick="updateTaskPrompt(${task.id}, '${task.title}', '${task.description}', ${task.completed}, ${task.version})">Update</button>
+                <button class="delete" onclick="deleteTask(${task.id})">Delete</button>
+            </div>
+        `;
+        taskListElement.appendChild(taskItem);
+    });
+
+    taskList.appendChild(taskListElement);
+}
+
+// Функция обновления пагинации
+function updatePagination() {
+    const pagination = document.getElementById('pagination');
+    pagination.innerHTML = '';
+
+    // Кнопки для всех известных страниц: пройденных и следующей (если есть курсор)
+    for (let i = 1; i <= pageCursors.length; i++) {
+        const pageButton = document.createElement('button');
+        pageButton.textContent = i;
+        pageButton.className = i === currentPage ? 'active' : '';
+        pageButton.onclick = () => loadTasks(i);
+        pagination.appendChild(pageButton);
+    }
+}
+
+// Функция для запроса данных обновления через prompt
+function updateTaskPrompt(id, currentTitle, currentDescription, currentCompleted, version) {
+    const newTitle = prompt('Enter new title:', currentTitle);
+    if (newTitle === null) return;
+
+    const newDescription = prompt('Enter new description:', currentDescription);
+    if (newDescription === null) return;
+
+    const newCompleted = confirm('Is the task completed?');
+
+    updateTask(id, newTitle, newDescription, newCompleted, version);
+}
+
+// Функция обновления задачи.
+// If-Match с версией, которую видел пользователь: чужие изменения не перезаписываются
+async function updateTask(id, title, description, completed, version) {
+    try {
+        // Отправляем PUT запрос для обновления задачи
+        const response = await fetch(`${apiBase}/update-task/${id}`, {
+            method: 'PUT',
+            headers: {
+                'Content-Type': 'application/json',
+                'If-Match': `"${id}-${version}"`,
+            },
+            body: JSON.stringify({
+                title: title,
+                description: description,
+                completed: completed
+            })
+        });
+
+        if (response.ok) {
+            const task = await response.json();
+            addMessage(`Task updated: ${task.title}`);
+            // Обновляем отображение
+            loadTasks(currentPage);
+            // Если просматриваем эту задачу, обновляем и её
+            if (document.getElementById('taskIdInput').value == id) {
+                getTaskById();
+            }
+        } else if (response.status === 412) {
+            alert('Task was changed by someone else. The list has been reloaded, please try again.');
+            loadTasks(currentPage);
+        } else {
+            const error = await response.json();
+            alert(`Error updating task: ${error.detail}`);
+        }
+    } catch (error) {
+        console.error('Error:', error);
+        alert('Failed to update task');
+    }
+}
+
+// Функция завершения всех задач текущей страницы одним пакетным запросом
+async function completeAllTasks() {
+    const pending = currentTasks.filter(task => !task.completed);
+    if (pending.length === 0) {
+        return;
+    }
+
+    try {
+        const response = await fetch(`${apiBase}/update-tasks/`, {
+            method: 'PUT',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify(pending.map(task => ({
+                id: task.id,
+                title: task.title,
+                description: task.description,
+                completed: true
+            })))
+        });
+
+        if (response.ok) {
+            const result = await response.json();
+            addMessage(`Tasks completed: ${result.items.length}`);
+            result.errors.forEach(error => addMessage(`Task ${error.id}: ${error.detail}`));
+            loadTasks(currentPage);
+        } else {
+            const error = await response.json();
+            alert(`Error updating tasks: ${error.detail}`);
+        }
+    } catch (error) {
+        console.error('Error:', error);
+        alert('Failed to update tasks');
+    }
+}
+
+// Функция удаления задачи
+async function deleteTask(id) {
+    if (!confirm('Are you sure you want to delete this task?')) {
+        return;
+    }
+
+    try {
+        // Отправляем DELETE запрос для удаления задачи
+        const response = await fetch(`${apiBase}/delete-task/${id}`, {
+            method: 'DELETE'
+        });
+
+        if (response.ok) {
+            const task = await response.json();
+            addMessage(`Task deleted: ${task.title}`);
+            // Обновляем отображение
+            loadTasks(currentPage);
+            document.getElementById('singleTaskResult').innerHTML = '';
+        } else {
+            const error = await response.json();
+            alert(`Error deleting task: ${error.detail}`);
+        }
+    } catch (error) {
+        console.error('Error:', error);
+        alert('Failed to delete task');
+    }
+}
+
+// Инициализация при загрузке страницы
+window.addEventListener('load', function() {
+    // Загружаем историю чата из LocalStorage
+    loadChatHistory();
+    // Номер последнего изменения, затем WebSocket и задачи
+    syncChanges().then(() => {
+        connectWebSocket();
+        loadTasks(1);
+    });
+
+    // Обработчик Enter для отправки сообщений
+    document.getElementById("messageInput").addEventListener("keypress", function(event) {
+        if (event.key === "Enter") {
+            sendMessage();
+        }
+    });
+
+    // Обработчик Enter для поиска задачи по ID
+    document.getElementById("taskIdInput").addEventListener("keypress", function(event) {
+        if (event.key === "Enter") {
+            getTaskById();
+        }
+    });
+
+    // Обработчик перед закрытием страницы
+    window.addEventListener('beforeunload', function() {
+        // Сохраняем историю перед закрытием страницы
+        saveChatHistory();
+    });
+});
@@ -0,0 +1,52 @@
+from typing import Any, Dict, Iterable, List, Sequence, Set, Tuple, Type, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+from src.task_logic.task_schemas import TaskBatchError
+
+Model = TypeVar("Model", bound=BaseModel)
+
+
+# Текст ошибки валидации одной строкой: "поле: сообщение; ..." (без поля — ошибка всего элемента)
+def validation_detail(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(map(str, e['loc']))}: {e['msg']}" if e["loc"] else e["msg"] for e in exc.errors()
+    )
+
+
+# Элементы пакета, прошедшие проверку модели, и ошибки для остальных: один
+# неверный элемент не отклоняет весь пакет
+def validate_items(items: Sequence[Any], model: Type[Model]) -> Tuple[List[Model], List[TaskBatchError]]:
+    valid: List[Model] = []
+    errors: List[TaskBatchError] = []
+    for index, item in enumerate(items):
+        try:
+            valid.append(model.model_validate(item))
+        except ValidationError as exc:
+            errors.append(TaskBatchError(index=index, detail=validation_detail(exc)))
+    return valid, errors
+
+
+# Позиции первых вхождений id и ошибки для повторов: одна строка не может
+# обновляться или удаляться дважды в одном запросе
+def unique_positions(task_ids: Sequence[int]) -> Tuple[List[int], List[TaskBatchError]]:
+    seen: Set[int] = set()
+    positions: List[int] = []
+    errors: List[TaskBatchError] = []
+    for index, task_id in enumerate(task_ids):
+        if task_id in seen:
+            errors.append(TaskBatchError(index=index, id=task_id, detail="Duplicate task id in batch"))
+            continue
+        seen.add(task_id)
+        positions.append(index)
+    return positions, errors
+
+
+# Ошибки для id, которых нет среди затронутых строк (нет задачи или чужая задача)
+def not_found_errors(task_ids: Sequence[int], positions: Iterable[int], rows: Iterable[Dict]) -> List[TaskBatchError]:
+    found = {row["id"] for row in rows}
+    return [
+        TaskBatchError(index=index, id=task_ids[index], detail="Task not found")
+        for index in positions
+        if task_ids[index] not in found
+    ]
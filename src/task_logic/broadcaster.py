@@ -0,0 +1,214 @@
+import asyncio
+import logging
+from typing import Collection, Dict, List, Set
+
+from fastapi import WebSocket
+
+from src.config import settings
+from src.task_logic.task_events import Event, coalesce, encode_frame
+
+logger = logging.getLogger(__name__)
+
+
+class Subscriber:
+    """
+    Подключенный WebSocket-клиент: собственная ограниченная очередь исходящих
+    сообщений и отдельная задача, которая отправляет их в сокет.
+    """
+
+    def __init__(self, websocket: WebSocket, owner_id: int, queue_size: int):
+        self.websocket = websocket
+        self.owner_id = owner_id
+        # Подписки на отдельные задачи; пустое множество — все задачи владельца
+        self.task_ids: Set[int] = set()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.sender: asyncio.Task = None
+        self.dropped = 0
+        # Событий получено, кадров и байт отправлено: при объединении кадров меньше, чем событий
+        self.events = 0
+        self.frames = 0
+        self.bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {"owner_id": self.owner_id, "events": self.events, "frames": self.frames,
+                "bytes": self.bytes, "dropped": self.dropped, "queued": self.queue.qsize()}
+
+
+class Broadcaster:
+    """
+    Рассылка сообщений WebSocket-клиентам.
+
+    Подписчики проиндексированы по владельцу задач: событие получает только
+    сокеты пользователя owner_id, а не все подключения процесса. Сокет может
+    дополнительно ограничить подписку отдельными задачами (subscribe/unsubscribe).
+
+    publish() не ждёт сетевого ввода-вывода: сообщение кладется в очередь каждого
+    подписчика, а отправкой занимаются задачи подписчиков параллельно. Медленный
+    клиент, у которого переполнилась очередь, либо теряет самые старые сообщения
+    (policy="drop"), либо отключается (policy="disconnect"). Сокет, на который не
+    удалось отправить сообщение, удаляется из рассылки.
+
+    С coalesce_window > 0 задача подписчика после первого события ждет окно,
+    собирает все события, пришедшие за это время, объединяет их (см.
+    task_events.coalesce) и отправляет одним кадром: всплеск изменений
+    превращается в один send вместо десятков. Цена — задержка до coalesce_window.
+    """
+
+    def __init__(self, queue_size: int = 100, send_timeout: float = 5.0, policy: str = "drop",
+                 coalesce_window: float = 0):
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self.policy = policy
+        self.coalesce_window = coalesce_window
+        self._subscribers: Dict[WebSocket, Subscriber] = {}
+        self._by_owner: Dict[int, Set[Subscriber]] = {}
+        # Ссылки на фоновые задачи закрытия, чтобы их не собрал GC
+        self._closing: Set[asyncio.Task] = set()
+        self.dropped_messages = 0
+        self.disconnected_slow = 0
+        self.send_failures = 0
+        self.events_sent = 0
+        self.frames_sent = 0
+        self.bytes_sent = 0
+
+    @property
+    def active_connections(self) -> Set[WebSocket]:
+        return set(self._subscribers)
+
+    # Сообщения, ожидающие отправки во всех очередях
+    @property
+    def queued_messages(self) -> int:
+        return sum(subscriber.queue.qsize() for subscriber in self._subscribers.values())
+
+    # Счетчики по соединениям: сколько событий ушло в сколько кадров
+    def stats(self) -> List[Dict[str, int]]:
+        return [subscriber.stats() for subscriber in self._subscribers.values()]
+
+    async def connect(self, websocket: WebSocket, owner_id: int) -> Subscriber:
+        await websocket.accept()
+        subscriber = Subscriber(websocket, owner_id, self.queue_size)
+        subscriber.sender = asyncio.create_task(self._send_loop(subscriber))
+        self._subscribers[websocket] = subscriber
+        self._by_owner.setdefault(owner_id, set()).add(subscriber)
+        return subscriber
+
+    def disconnect(self, websocket: WebSocket) -> None:
+        # Повторный вызов безопасен: подписчик удаляется один раз
+        subscriber = self._subscribers.pop(websocket, None)
+        if subscriber is None:
+            return
+        owner_subscribers = self._by_owner.get(subscriber.owner_id)
+        if owner_subscribers is not None:
+            owner_subscribers.discard(subscriber)
+            if not owner_subscribers:
+                del self._by_owner[subscriber.owner_id]
+        if subscriber.sender is not asyncio.current_task():
+            subscriber.sender.cancel()
+
+    def subscribe(self, websocket: WebSocket, task_id: int) -> None:
+        subscriber = self._subscribers.get(websocket)
+        if subscriber is not None:
+            subscriber.task_ids.add(task_id)
+
+    def unsubscribe(self, websocket: WebSocket, task_id: int) -> None:
+        subscriber = self._subscribers.get(websocket)
+        if subscriber is not None:
+            subscriber.task_ids.discard(task_id)
+
+    def publish(self, owner_id: int, message: Event, task_ids: Collection[int] = ()) -> None:
+        # Копия множества: подписчики могут удаляться во время рассылки
+        for subscriber in list(self._by_owner.get(owner_id, ())):
+            if subscriber.task_ids and task_ids and subscriber.task_ids.isdisjoint(task_ids):
+                continue
+            self._enqueue(subscriber, message)
+
+    def _enqueue(self, subscriber: Subscriber, message: Event) -> None:
+        try:
+            subscriber.queue.put_nowait(message)
+            return
+        except asyncio.QueueFull:
+            pass
+
+        self.dropped_messages += 1
+        subscriber.dropped += 1
+        if self.policy == "disconnect":
+            self.disconnected_slow += 1
+            self._close(subscriber.websocket, code=1013)  # Try Again Later
+        else:
+            # Освобождаем место за счет самого старого сообщения
+            subscriber.queue.get_nowait()
+            subscriber.queue.put_nowait(message)
+
+    # События, накопленные за окно объединения после первого
+    async def _collect(self, subscriber: Subscriber, first: Event) -> List[Event]:
+        events = [first]
+        try:
+            async with asyncio.timeout(self.coalesce_window):
+                while True:
+                    events.append(await subscriber.queue.get())
+        except TimeoutError:
+            pass
+        return events
+
+    async def _send_loop(self, subscriber: Subscriber) -> None:
+        websocket = subscriber.websocket
+        while True:
+            message = await subscriber.queue.get()
+            if self.coalesce_window > 0:
+                events = await self._collect(subscriber, message)
+                merged = coalesce(events)
+                if not merged:
+                    # Все события взаимно уничтожились (создание и удаление задачи)
+                    subscriber.events += len(events)
+                    self.events_sent += len(events)
+                    continue
+                seqs = [event.data["seq"] for event in events if event.data.get("seq") is not None]
+                text = encode_frame(merged, max(seqs) if seqs else None)
+            else:
+                events = [message]
+                text = message.text
+            try:
+                await asyncio.wait_for(websocket.send_text(text), self.send_timeout)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Клиент отвалился или не успевает принимать — убираем его из рассылки
+                self.send_failures += 1
+                logger.info("Dropping WebSocket subscriber after failed send: %r", e)
+                self._close(websocket, code=1011)
+                return
+            size = len(text.encode())
+            subscriber.events += len(events)
+            subscriber.frames += 1
+            subscriber.bytes += size
+            self.events_sent += len(events)
+            self.frames_sent += 1
+            self.bytes_sent += size
+
+    def _close(self, websocket: WebSocket, code: int) -> None:
+        self.disconnect(websocket)
+        task = asyncio.create_task(self._close_socket(websocket, code))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    @staticmethod
+    async def _close_socket(websocket: WebSocket, code: int) -> None:
+        try:
+            await websocket.close(code=code)
+        except Exception:
+            # Соединение уже закрыто
+            pass
+
+    async def close(self) -> None:
+        for websocket in list(self._subscribers):
+            self._close(websocket, code=1001)  # Going Away
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
+
+
+broadcaster = Broadcaster(
+    queue_size=settings.WS_QUEUE_SIZE,
+    send_timeout=settings.WS_SEND_TIMEOUT,
+    policy=settings.WS_SLOW_CONSUMER_POLICY,
+    coalesce_window=settings.WS_COALESCE_WINDOW_MS / 1000,
+)
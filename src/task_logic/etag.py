@@ -0,0 +1,52 @@
+import hashlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Строгий ETag задачи однозначно определяется парой (id, version)
+
+
+def task_etag(task: Dict) -> str:
+    return f'"{task["id"]}-{task["version"]}"'
+
+
+# ETag страницы списка: хеш от (id, version) всех задач страницы
+def versions_etag(versions: Iterable[Tuple[int, int]]) -> str:
+    digest = hashlib.sha1()
+    for task_id, version in versions:
+        digest.update(f'{task_id}-{version};'.encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def list_etag(tasks: Iterable[Dict]) -> str:
+    return versions_etag((task["id"], task["version"]) for task in tasks)
+
+
+def parse_etags(header: str) -> List[str]:
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+# If-None-Match сравнивается слабо: W/"x" совпадает с "x"
+def none_match(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(tag.removeprefix("W/") == etag for tag in parse_etags(header))
+
+
+# Версии задачи, перечисленные в If-Match.
+# None — заголовка нет или "*", т.е. проверять версию не нужно.
+# Префикс W/ отбрасывается: его добавляет CompressionMiddleware к сжатому ответу,
+# а сам тег "<id>-<version>" по-прежнему однозначно задает версию задачи.
+# Без этого клиент, получивший задачу сжатой, не смог бы выполнить условный PUT.
+def if_match_versions(header: Optional[str], task_id: int) -> Optional[List[int]]:
+    if not header or header.strip() == "*":
+        return None
+    versions = []
+    prefix = f'"{task_id}-'
+    for tag in parse_etags(header):
+        tag = tag.removeprefix("W/")
+        if tag.startswith(prefix) and tag.endswith('"'):
+            version = tag[len(prefix):-1]
+            if version.isdigit():
+                versions.append(int(version))
+    return versions
@@ -0,0 +1,58 @@
+import base64
+import binascii
+import json
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+
+# Курсор непрозрачен для клиента: это base64url от JSON с позицией последней
+# отданной строки. Клиент только передаёт его обратно в параметре `after`.
+def encode_cursor(position: Dict[str, Any]) -> str:
+    raw = json.dumps(position, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Dict[str, Any]]:
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError):
+        position = None
+    if not isinstance(position, dict):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    return position
+
+
+def decode_id_cursor(cursor: Optional[str]) -> Optional[int]:
+    position = decode_cursor(cursor)
+    if position is None:
+        return None
+    last_id = position.get("id")
+    # bool — подкласс int: курсор {"id": true} не должен читаться как id 1
+    if not isinstance(last_id, int) or isinstance(last_id, bool):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    return last_id
+
+
+# Курсор ранжированной выдачи: (ранг, id) последней строки страницы
+def decode_rank_cursor(cursor: Optional[str]) -> Optional[Tuple[float, int]]:
+    position = decode_cursor(cursor)
+    if position is None:
+        return None
+    rank, last_id = position.get("rank"), position.get("id")
+    if not isinstance(rank, (int, float)) or isinstance(rank, bool) \
+            or not isinstance(last_id, int) or isinstance(last_id, bool):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    return float(rank), last_id
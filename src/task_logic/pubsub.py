@@ -0,0 +1,267 @@
+import asyncio
+import json
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Collection, Dict, List, Optional
+
+import asyncpg
+
+from src.config import settings
+from src.database import async_session_maker
+from src.migrate import connect
+from src.task_logic import task_repository
+from src.task_logic.broadcaster import Broadcaster, broadcaster
+from src.task_logic.task_cache import TaskCache, task_cache
+from src.task_logic.task_events import (TASK_CREATED, TASK_DELETED, TASK_UPDATED, TASKS_CREATED, TASKS_DELETED,
+                                        TASKS_UPDATED, Event, batch_event, task_event)
+
+logger = logging.getLogger(__name__)
+
+# Поля событий task.created / task.updated, восстановленные по строке задачи
+EVENT_FIELDS = ("title", "description", "completed", "version")
+# События, которые можно передать одними id задач: созданные и измененные задачи
+# получатель читает из базы, удаленные восстанавливаются по id без запроса
+FETCHED_TYPES = (TASK_CREATED, TASK_UPDATED, TASKS_CREATED, TASKS_UPDATED)
+DELETED_TYPES = (TASK_DELETED, TASKS_DELETED)
+
+
+# id задач, которых касается событие (для сброса кэша)
+def affected_ids(data: Dict[str, Any]) -> List[int]:
+    if "task_ids" in data:
+        return data["task_ids"]
+    if "task_id" in data:
+        return [data["task_id"]]
+    return []
+
+
+class PubSub(ABC):
+    """
+    Рассылка событий задач между воркерами. Маршрут публикует событие один раз,
+    каждый воркер раздает его своим WebSocket-подписчикам через Broadcaster.
+
+    publish() синхронный и не ждет сети: локальные подписчики получают событие
+    сразу, передача другим воркерам идет в фоне.
+    """
+
+    def __init__(self):
+        self.published = 0
+        self.received = 0
+        self.fetched = 0
+        self.dropped = 0
+
+    async def start(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    @abstractmethod
+    def publish(self, owner_id: int, event: Event, task_ids: Collection[int] = ()) -> None:
+        ...
+
+    def stats(self) -> Dict[str, int]:
+        return {"published": self.published, "received": self.received,
+                "fetched": self.fetched, "dropped": self.dropped}
+
+
+class InMemoryPubSub(PubSub):
+    """Один процесс: событие сразу уходит в локальный Broadcaster."""
+
+    def __init__(self, broadcaster: Broadcaster):
+        super().__init__()
+        self.broadcaster = broadcaster
+
+    def publish(self, owner_id: int, event: Event, task_ids: Collection[int] = ()) -> None:
+        self.published += 1
+        self.broadcaster.publish(owner_id, event, task_ids)
+
+
+class PostgresPubSub(PubSub):
+    """
+    Рассылка через LISTEN/NOTIFY в той же базе данных, отдельный сервис не нужен.
+
+    Каждый воркер держит одно выделенное соединение asyncpg вне пула: на нем
+    LISTEN и отправка NOTIFY. Исходящие события копятся в очереди и уходят
+    пачкой — один SELECT pg_notify(...) FROM unnest(...) на все накопленные.
+    Свои уведомления (тот же pid сервера) пропускаются: локальные подписчики
+    уже получили событие при publish().
+
+    Размер уведомления ограничен (8000 байт): событие больше payload_limit
+    передается без полей, только id задач, и получатель читает задачи из базы
+    (для удалений id достаточно). Если и список id не помещается, он делится
+    на несколько уведомлений — получатель рассылает их как отдельные события.
+
+    Полученные события сбрасывают записи кэша задач этого воркера. При потере
+    соединения события других воркеров теряются: после переподключения кэш
+    очищается целиком, а клиенты догружают пропущенное через /tasks/changes.
+    """
+
+    def __init__(self, broadcaster: Broadcaster, cache: TaskCache, channel: str, payload_limit: int):
+        super().__init__()
+        self.broadcaster = broadcaster
+        self.cache = cache
+        self.channel = channel
+        self.payload_limit = payload_limit
+        self._conn: Optional[asyncpg.Connection] = None
+        self._pid: Optional[int] = None
+        self._terminated = asyncio.Event()
+        self._outgoing: "asyncio.Queue[str]" = asyncio.Queue()
+        self._incoming: "asyncio.Queue[str]" = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        await self._connect()
+        self._tasks = [
+            asyncio.create_task(self._supervise()),
+            asyncio.create_task(self._send_loop()),
+            asyncio.create_task(self._receive_loop()),
+        ]
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+    def publish(self, owner_id: int, event: Event, task_ids: Collection[int] = ()) -> None:
+        self.published += 1
+        self.broadcaster.publish(owner_id, event, task_ids)
+        payloads = self._encode(owner_id, event, list(task_ids))
+        if not payloads:
+            self.dropped += 1
+            logger.warning("Event %s is too large for NOTIFY, not sent to other workers", event.type)
+            return
+        for payload in payloads:
+            self._outgoing.put_nowait(payload)
+
+    # Событие целиком, а если не помещается — только тип, номер и id задач,
+    # при необходимости в нескольких уведомлениях. Пустой список — не передать.
+    # task_ids — фильтр подписок Broadcaster, ids — задачи, которые нужно прочитать.
+    def _encode(self, owner_id: int, event: Event, task_ids: List[int]) -> List[str]:
+        payload = f'{{"owner_id": {owner_id}, "task_ids": {json.dumps(task_ids)}, "event": {event.text}}}'
+        if len(payload.encode()) <= self.payload_limit:
+            return [payload]
+        if event.type not in FETCHED_TYPES + DELETED_TYPES:
+            return []
+
+        def encode(ids: List[int]) -> str:
+            # Фильтр подписок сужается до id части (пустой фильтр остается пустым)
+            return json.dumps({"owner_id": owner_id, "task_ids": ids if task_ids else [], "ids": ids,
+                               "type": event.type, "seq": event.data.get("seq")})
+
+        # Каждый id занимает в части свою запись и разделитель ", " в обоих списках
+        base = len(encode([]))
+        payloads, part, size = [], [], base
+        for task_id in affected_ids(event.data):
+            item_size = 2 * (len(str(task_id)) + 2)
+            if part and size + item_size > self.payload_limit:
+                payloads.append(encode(part))
+                part, size = [], base
+            part.append(task_id)
+            size += item_size
+        payloads.append(encode(part))
+        if any(len(payload) > self.payload_limit for payload in payloads):
+            return []
+        return payloads
+
+    async def _connect(self) -> None:
+        conn = await connect()
+        self._terminated.clear()
+        conn.add_termination_listener(lambda connection: self._terminated.set())
+        await conn.add_listener(self.channel, self._on_notify)
+        self._conn = conn
+        self._pid = conn.get_server_pid()
+
+    def _on_notify(self, connection: asyncpg.Connection, pid: int, channel: str, payload: str) -> None:
+        if pid != self._pid:
+            self._incoming.put_nowait(payload)
+
+    # Переподключение с растущей паузой после обрыва выделенного соединения
+    async def _supervise(self) -> None:
+        while True:
+            await self._terminated.wait()
+            self._conn = None
+            logger.warning("Pub/sub connection lost, reconnecting")
+            delay = 0.5
+            while True:
+                try:
+                    await self._connect()
+                    break
+                except Exception as e:
+                    logger.warning("Pub/sub reconnect failed: %r", e)
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, 30)
+            # Пока соединения не было, изменения других воркеров не приходили
+            await self.cache.clear()
+            logger.info("Pub/sub connection restored")
+
+    async def _send_loop(self) -> None:
+        while True:
+            payloads = [await self._outgoing.get()]
+            while not self._outgoing.empty():
+                payloads.append(self._outgoing.get_nowait())
+            conn = self._conn
+            if conn is None or conn.is_closed():
+                self.dropped += len(payloads)
+                continue
+            try:
+                await conn.execute("SELECT pg_notify($1, payload) FROM unnest($2::text[]) AS payload",
+                                   self.channel, payloads)
+            except Exception as e:
+                self.dropped += len(payloads)
+                logger.warning("Failed to send %s pub/sub events: %r", len(payloads), e)
+
+    async def _receive_loop(self) -> None:
+        while True:
+            payload = await self._incoming.get()
+            try:
+                await self._deliver(json.loads(payload))
+            except Exception:
+                logger.exception("Failed to deliver pub/sub event")
+
+    async def _deliver(self, message: Dict[str, Any]) -> None:
+        self.received += 1
+        owner_id, task_ids = message["owner_id"], message["task_ids"]
+        # Кэш сбрасывается до рассылки: клиент, получивший событие, прочитает новую версию
+        await self.cache.invalidate(message["ids"] if "ids" in message else affected_ids(message["event"]))
+        if "event" in message:
+            event = Event(message["event"])
+        elif message["type"] in DELETED_TYPES:
+            event = self._deleted_event(message)
+        else:
+            event = await self._fetch(message)
+            if event is None:
+                return
+        self.broadcaster.publish(owner_id, event, task_ids)
+
+    # Удаленные задачи читать неоткуда, а событию удаления нужны только id
+    @staticmethod
+    def _deleted_event(message: Dict[str, Any]) -> Event:
+        if message["type"] == TASKS_DELETED:
+            return batch_event(TASKS_DELETED, message["ids"], seq=message["seq"])
+        return task_event(TASK_DELETED, message["ids"][0], seq=message["seq"])
+
+    # Событие без полей: задачи читаются из базы (состояние может быть новее события)
+    async def _fetch(self, message: Dict[str, Any]) -> Optional[Event]:
+        self.fetched += 1
+        async with async_session_maker() as db:
+            rows = await task_repository.get_tasks(db, message["ids"])
+        if not rows:
+            return None
+        event_type, seq = message["type"], message["seq"]
+        if event_type in (TASKS_CREATED, TASKS_UPDATED):
+            return batch_event(event_type, [row["id"] for row in rows], rows, seq)
+        row = rows[0]
+        return task_event(event_type, row["id"], {key: row[key] for key in EVENT_FIELDS}, seq)
+
+
+def create_pubsub() -> PubSub:
+    if settings.PUBSUB_BACKEND == "postgres":
+        return PostgresPubSub(broadcaster, task_cache, settings.PUBSUB_CHANNEL, settings.PUBSUB_PAYLOAD_LIMIT)
+    return InMemoryPubSub(broadcaster)
+
+
+pubsub = create_pubsub()
@@ -0,0 +1,96 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import text
+
+from src import metrics
+from src.config import settings
+from src.database import engine
+
+logger = logging.getLogger(__name__)
+
+# Перенос выполненных задач, не менявшихся TASK_ARCHIVE_AFTER_DAYS, из task в
+# task_archive. Рабочая таблица и ее индексы (в том числе GIN поиска) остаются
+# размером с активные задачи, а архив читается только по запросу.
+
+TASKS_ARCHIVED = metrics.registry.counter("tasks_archived_total", "Completed tasks moved to task_archive")
+
+# Ключ advisory-блокировки прохода архивации (ключи миграций и ленты изменений — в migrate.py и 0005)
+ARCHIVE_LOCK_ID = 7_311_024
+
+# Одна пачка одним оператором: выбор самых старых кандидатов по частичному индексу
+# ix_task_completed_updated_at, DELETE ... RETURNING и вставка в архив. Строки,
+# заблокированные изменяющими их запросами, пропускаются (SKIP LOCKED) — проход
+# не ждет API.
+# Tombstone не пишется: задача не удалена, а сменила хранилище. Счетчики
+# task_counter не меняются: триггер удаления на task вычитает, триггер вставки
+# на task_archive прибавляет.
+ARCHIVE_BATCH_SQL = """
+WITH candidates AS (
+    SELECT id FROM task
+    WHERE completed AND updated_at < :cutoff
+    ORDER BY updated_at
+    LIMIT :batch_size
+    FOR UPDATE SKIP LOCKED
+),
+moved AS (
+    DELETE FROM task USING candidates
+    WHERE task.id = candidates.id
+    RETURNING task.id, task.title, task.description, task.completed, task.version, task.updated_at,
+              task.owner_id, task.change_seq
+),
+archived AS (
+    INSERT INTO task_archive (id, title, description, completed, version, updated_at, owner_id, change_seq)
+    SELECT id, title, description, completed, version, updated_at, owner_id, change_seq FROM moved
+    RETURNING 1
+)
+SELECT count(*) FROM archived
+"""
+
+
+# Переносит задачи пачками по batch_size, каждая пачка — отдельная транзакция:
+# блокировки держатся недолго, а прерванный проход продолжается со следующей пачки.
+# Возвращает число перенесенных задач.
+#
+# Одновременно выполняется только один проход (архиватор запускает каждый воркер):
+# пачка обновляет строки task_counter многих владельцев триггерами уровня оператора
+# в произвольном порядке, и пачки двух проходов могли бы заблокировать друг друга.
+# Проход, не получивший блокировку, пропускается (None) — ее держит соединение
+# прохода, и при обрыве соединения она снимается сама.
+async def archive_completed_tasks(after_days: int, batch_size: int) -> Optional[int]:
+    cutoff = datetime.utcnow() - timedelta(days=after_days)
+    total = 0
+    async with engine.connect() as conn:
+        if not await conn.scalar(text("SELECT pg_try_advisory_lock(:key)"), {"key": ARCHIVE_LOCK_ID}):
+            await conn.rollback()
+            logger.debug("Task archiving is running in another worker, pass skipped")
+            return None
+        await conn.commit()
+        try:
+            while True:
+                async with conn.begin():
+                    moved = await conn.scalar(text(ARCHIVE_BATCH_SQL), {"cutoff": cutoff, "batch_size": batch_size})
+                TASKS_ARCHIVED.inc(amount=moved)
+                total += moved
+                # Неполная пачка — кандидатов больше нет (или остальные сейчас заблокированы)
+                if moved < batch_size:
+                    break
+        finally:
+            await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": ARCHIVE_LOCK_ID})
+            await conn.commit()
+    if total:
+        logger.info("Archived %s completed task(s)", total)
+    return total
+
+
+# Фоновая задача воркера: проход раз в interval секунд. Ошибка прохода не
+# останавливает задачу — следующий проход продолжит с того же места.
+async def run_archiver(interval: float) -> None:
+    while True:
+        try:
+            await archive_completed_tasks(settings.TASK_ARCHIVE_AFTER_DAYS, settings.TASK_ARCHIVE_BATCH_SIZE)
+        except Exception:
+            logger.exception("Task archiving failed")
+        await asyncio.sleep(interval)
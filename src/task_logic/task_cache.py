@@ -0,0 +1,86 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable
+
+from src.cache import MISSING, TTLCache
+from src.config import settings
+
+
+class TaskCache(ABC):
+    """
+    Кэш чтения отдельных задач (read-through перед GET /tasks/{task_id}).
+
+    get() возвращает словарь задачи, None для закэшированного отсутствия (404)
+    или MISSING при промахе. Методы асинхронные, чтобы вместо кэша в памяти
+    процесса можно было подключить общий (например, Redis) без изменения маршрутов.
+    """
+
+    @abstractmethod
+    async def get(self, task_id: int) -> Any:
+        ...
+
+    @abstractmethod
+    async def set(self, task_id: int, task: Dict) -> None:
+        ...
+
+    @abstractmethod
+    async def set_missing(self, task_id: int) -> None:
+        ...
+
+    @abstractmethod
+    async def invalidate(self, task_ids: Iterable[int]) -> None:
+        ...
+
+    @abstractmethod
+    async def clear(self) -> None:
+        ...
+
+    @abstractmethod
+    def stats(self) -> Dict[str, float]:
+        ...
+
+
+class InMemoryTaskCache(TaskCache):
+    """
+    LRU-кэш с TTL в памяти процесса. Отсутствующие задачи кэшируются на
+    более короткий срок negative_ttl. Каждый воркер держит свой кэш: записи
+    других воркеров становятся видны не позже чем через ttl, а с
+    PUBSUB_BACKEND=postgres — сразу по событию (см. task_logic/pubsub.py).
+    """
+
+    def __init__(self, max_size: int, ttl: float, negative_ttl: float):
+        self._cache = TTLCache(max_size=max_size, ttl=ttl)
+        self.negative_ttl = negative_ttl
+
+    async def get(self, task_id: int) -> Any:
+        return self._cache.get(task_id, MISSING)
+
+    async def set(self, task_id: int, task: Dict) -> None:
+        self._cache.set(task_id, task)
+
+    async def set_missing(self, task_id: int) -> None:
+        if self.negative_ttl > 0:
+            self._cache.set(task_id, None, ttl=self.negative_ttl)
+        else:
+            self._cache.delete(task_id)
+
+    async def invalidate(self, task_ids: Iterable[int]) -> None:
+        for task_id in task_ids:
+            self._cache.delete(task_id)
+
+    async def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, float]:
+        return self._cache.stats()
+
+
+task_cache = InMemoryTaskCache(
+    max_size=settings.TASK_CACHE_MAX_SIZE,
+    ttl=settings.TASK_CACHE_TTL,
+    negative_ttl=settings.TASK_CACHE_NEGATIVE_TTL,
+)
+
+
+# Dependency: в тестах и бенчмарках реализацию можно подменить через app.dependency_overrides
+def get_task_cache() -> TaskCache:
+    return task_cache
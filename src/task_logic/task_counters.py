@@ -0,0 +1,64 @@
+import logging
+from typing import Optional
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.auth.models import TaskCounter
+from src.task_logic.task_schemas import TaskStats
+
+logger = logging.getLogger(__name__)
+
+# Счетчики задач владельцев из task_counter. Изменения задач обновляют их
+# триггерами в той же транзакции; сверка нужна только после правок в обход
+# триггеров (ручной SQL, восстановление из бэкапа, TRUNCATE).
+
+
+# Одна строка по первичному ключу; нет строки — у владельца нет задач
+async def get_task_stats(db: AsyncSession, owner_id: int) -> TaskStats:
+    result = await db.execute(
+        select(TaskCounter.total, TaskCounter.completed).where(TaskCounter.owner_id == owner_id)
+    )
+    row = result.one_or_none()
+    total, completed = row if row is not None else (0, 0)
+    return TaskStats(total=total, completed=completed, open=total - completed)
+
+
+# Пересчет по таблицам task и task_archive одним оператором. Блокировка EXCLUSIVE на task_counter
+# ждет завершения транзакций, уже изменивших счетчики, и не дает триггерам
+# менять их до конца сверки: пересчет видит согласованное состояние.
+# Возвращает число исправленных владельцев.
+RECONCILE_SQL = """
+WITH actual AS (
+    SELECT owner_id, count(*) AS total, count(*) FILTER (WHERE completed) AS completed
+    FROM (SELECT owner_id, completed FROM task
+          UNION ALL
+          SELECT owner_id, completed FROM task_archive) AS t
+    WHERE CAST(:owner_id AS INTEGER) IS NULL OR owner_id = :owner_id
+    GROUP BY owner_id
+),
+fixed AS (
+    INSERT INTO task_counter AS c (owner_id, total, completed)
+    SELECT owner_id, total, completed FROM actual
+    ON CONFLICT (owner_id) DO UPDATE
+        SET total = EXCLUDED.total, completed = EXCLUDED.completed
+        WHERE (c.total, c.completed) IS DISTINCT FROM (EXCLUDED.total, EXCLUDED.completed)
+    RETURNING owner_id
+),
+stale AS (
+    UPDATE task_counter AS c SET total = 0, completed = 0
+    WHERE (CAST(:owner_id AS INTEGER) IS NULL OR c.owner_id = :owner_id)
+      AND (c.total <> 0 OR c.completed <> 0)
+      AND NOT EXISTS (SELECT 1 FROM actual WHERE actual.owner_id = c.owner_id)
+    RETURNING owner_id
+)
+SELECT (SELECT count(*) FROM fixed) + (SELECT count(*) FROM stale)
+"""
+
+
+async def reconcile_task_counters(db: AsyncSession, owner_id: Optional[int] = None) -> int:
+    await db.execute(text("LOCK TABLE task_counter IN EXCLUSIVE MODE"))
+    corrected = await db.scalar(text(RECONCILE_SQL), {"owner_id": owner_id})
+    if corrected:
+        logger.warning("Corrected task counters for %s owner(s)", corrected)
+    return corrected
@@ -0,0 +1,139 @@
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+# Типы событий, которые получают подписчики /ws/tasks/{client_id}
+TASK_CREATED = "task.created"
+TASK_UPDATED = "task.updated"
+TASK_DELETED = "task.deleted"
+# Агрегированные события пакетных операций
+TASKS_CREATED = "tasks.created"
+TASKS_UPDATED = "tasks.updated"
+TASKS_DELETED = "tasks.deleted"
+CHAT_MESSAGE = "message"
+# Кадр с несколькими событиями, объединенными за окно WS_COALESCE_WINDOW_MS
+BATCH = "batch"
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _dumps(data: Dict[str, Any]) -> str:
+    return json.dumps(data, ensure_ascii=False, default=_encode)
+
+
+class Event:
+    """
+    Событие для рассылки. Один объект ставится в очереди всех подписчиков,
+    поэтому JSON кодируется один раз, при первой отправке. Событие не изменяется:
+    объединение создает новые объекты.
+    """
+
+    __slots__ = ("data", "_text")
+
+    def __init__(self, data: Dict[str, Any]):
+        self.data = data
+        self._text: Optional[str] = None
+
+    @property
+    def type(self) -> str:
+        return self.data["type"]
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = _dumps(self.data)
+        return self._text
+
+
+# seq — номер изменения в ленте /tasks/changes (для пакетов — наибольший):
+# после переподключения клиент запрашивает изменения после последнего полученного номера
+def task_event(event_type: str, task_id: int, fields: Optional[Dict[str, Any]] = None,
+               seq: Optional[int] = None) -> Event:
+    return Event({
+        "type": event_type,
+        "task_id": task_id,
+        "fields": fields or {},
+        "seq": seq,
+    })
+
+
+def batch_event(event_type: str, task_ids: Sequence[int], items: Optional[List[Dict[str, Any]]] = None,
+                seq: Optional[int] = None) -> Event:
+    return Event({
+        "type": event_type,
+        "task_ids": list(task_ids),
+        "items": items or [],
+        "seq": seq,
+    })
+
+
+def chat_event(client_id: int, text: str) -> Event:
+    return Event({
+        "type": CHAT_MESSAGE,
+        "client_id": client_id,
+        "text": text,
+    })
+
+
+def _merge(first: Event, second: Event) -> Event:
+    # Более поздние значения полей перекрывают ранние, тип остается от первого
+    # (created + updated — это created с актуальными полями)
+    return Event({**first.data, "fields": {**first.data["fields"], **second.data["fields"]},
+                  "seq": second.data["seq"]})
+
+
+def coalesce(events: Sequence[Event]) -> List[Event]:
+    """
+    Объединяет события, накопленные для одного соединения:
+    - повторные изменения задачи — одно событие с последним состоянием полей;
+    - создание и изменения задачи — одно событие создания;
+    - создание и удаление задачи в одном окне взаимно уничтожаются;
+    - изменения и удаление задачи — только удаление.
+    Объединяются только события одной задачи, между которыми нет пакетного
+    события с этой задачей: иначе нарушился бы порядок применения. Пакетные
+    события и сообщения чата передаются без изменений, в исходном порядке.
+    """
+    merged: List[Optional[Event]] = []
+    # Позиция последнего одиночного события задачи, с которым можно объединять
+    last: Dict[int, int] = {}
+    for event in events:
+        event_type = event.type
+        if event_type not in (TASK_CREATED, TASK_UPDATED, TASK_DELETED):
+            for task_id in event.data.get("task_ids", ()):
+                last.pop(task_id, None)
+            merged.append(event)
+            continue
+
+        task_id = event.data["task_id"]
+        position = last.get(task_id)
+        previous = merged[position] if position is not None else None
+        if previous is None or previous.type == TASK_DELETED:
+            last[task_id] = len(merged)
+            merged.append(event)
+        elif event_type == TASK_UPDATED:
+            merged[position] = _merge(previous, event)
+        elif event_type == TASK_DELETED and previous.type == TASK_CREATED:
+            merged[position] = None
+            del last[task_id]
+        elif event_type == TASK_DELETED:
+            merged[position] = event
+        else:
+            last[task_id] = len(merged)
+            merged.append(event)
+    return [event for event in merged if event is not None]
+
+
+def encode_frame(events: Sequence[Event], seq: Optional[int]) -> str:
+    """
+    Текст кадра для списка событий: одно событие отправляется как есть (формат
+    не отличается от рассылки без объединения), несколько — кадром
+    {"type": "batch", "events": [...], "seq": S}, где seq — наибольший номер
+    среди исходных событий, включая взаимно уничтоженные.
+    """
+    if len(events) == 1 and events[0].data.get("seq") == seq:
+        return events[0].text
+    return _dumps({"type": BATCH, "events": [event.data for event in events], "seq": seq})
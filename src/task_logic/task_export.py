@@ -0,0 +1,93 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator, Optional, Sequence
+
+from sqlalchemy import Select, select
+
+from src.auth.models import Task, TaskArchive
+from src.config import settings
+from src.database import async_session_maker
+from src.task_logic.task_repository import TASK_COLUMNS
+
+# Номер ленты изменений — внутреннее состояние базы, в выгрузку не попадает
+EXPORT_COLUMNS = tuple(column for column in TASK_COLUMNS if column.key != "change_seq")
+EXPORT_FIELDS = [column.key for column in EXPORT_COLUMNS]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+# Строки задач пачками по TASK_EXPORT_BATCH_SIZE через серверный курсор:
+# в памяти одновременно находится только одна пачка, независимо от размера таблицы.
+# Сессия открывается внутри генератора: dependency-сессия запроса закрывается
+# раньше, чем StreamingResponse дочитает данные.
+# include_archived — после задач из task задачи из task_archive, тоже по id. Таблицы
+# читаются друг за другом: общий порядок по id потребовал бы сортировки всей выгрузки.
+# Обе выборки выполняются в одной транзакции (REPEATABLE READ): задача, которую
+# архивация переносит во время выгрузки, не пропадет и не попадет в нее дважды.
+async def stream_task_rows(owner_id: Optional[int], completed: Optional[bool],
+                           include_archived: bool = False) -> AsyncIterator[Sequence]:
+    def rows(model) -> Select:
+        stmt = select(*[getattr(model, column.key) for column in EXPORT_COLUMNS]).order_by(model.id)
+        if owner_id is not None:
+            stmt = stmt.where(model.owner_id == owner_id)
+        if completed is not None:
+            stmt = stmt.where(model.completed == completed)
+        return stmt.execution_options(yield_per=settings.TASK_EXPORT_BATCH_SIZE)
+
+    models = (Task, TaskArchive) if include_archived else (Task,)
+    async with async_session_maker() as session:
+        if include_archived:
+            await session.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        for model in models:
+            result = await session.stream(rows(model))
+            async for partition in result.partitions():
+                yield partition
+
+
+# Значение поля в выгрузке: даты в ISO 8601 в обоих форматах, чтобы выгрузку
+# можно было читать одним кодом независимо от формата
+def _format(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _encode(value):
+    formatted = _format(value)
+    if formatted is value:
+        raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+    return formatted
+
+
+async def export_ndjson(rows: AsyncIterator[Sequence]) -> AsyncIterator[bytes]:
+    async for partition in rows:
+        chunk = "".join(
+            json.dumps(dict(zip(EXPORT_FIELDS, row)), ensure_ascii=False, default=_encode) + "\n"
+            for row in partition
+        )
+        yield chunk.encode()
+
+
+async def export_csv(rows: AsyncIterator[Sequence]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    async for partition in rows:
+        writer.writerows([_format(value) for value in row] for row in partition)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    # Пустая выгрузка: только заголовок
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+EXPORTERS = {
+    "ndjson": export_ndjson,
+    "csv": export_csv,
+}
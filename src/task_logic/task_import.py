@@ -0,0 +1,206 @@
+import csv
+import json
+from typing import AsyncIterator, Callable, List, Optional, Tuple, Union
+
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config import settings
+from src.task_logic.batch import validation_detail
+from src.task_logic.task_schemas import TaskCreate, TaskImportError, TaskImportResult
+
+# Импорт задач из потока NDJSON или CSV. Строки проверяются по TaskCreate пачками
+# по TASK_IMPORT_CHUNK_SIZE, валидные загружаются протоколом COPY во временную
+# таблицу и одним INSERT ... SELECT переносятся в task. Всё выполняется в одной
+# транзакции: при сбое не остается частично загруженных задач.
+
+STAGING_TABLE = "task_import_staging"
+STAGING_COLUMNS = ("line", "title", "description")
+
+FORMATS = ("ndjson", "csv")
+
+# Номер строки и ее текст или ошибка (строка длиннее TASK_IMPORT_MAX_LINE_BYTES или не в UTF-8)
+Line = Tuple[int, Union[str, ValueError]]
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Import is limited to {max_bytes} bytes"
+    )
+
+
+# Заведомо слишком большое тело (по Content-Length) отклоняется до чтения
+def check_content_length(content_length: Optional[str], max_bytes: int) -> None:
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+        raise _too_large(max_bytes)
+
+
+# Тело без Content-Length или с неверным — по мере чтения: сверх max_bytes — 413,
+# транзакция импорта откатывается
+async def limit_size(chunks: AsyncIterator[bytes], max_bytes: int) -> AsyncIterator[bytes]:
+    received = 0
+    async for chunk in chunks:
+        received += len(chunk)
+        if received > max_bytes:
+            raise _too_large(max_bytes)
+        yield chunk
+
+
+# Текст строки или ошибка, если строка не в UTF-8. Перевод строки не встречается
+# внутри многобайтных символов, поэтому каждая строка декодируется отдельно
+def _decode(line: bytes) -> Union[str, ValueError]:
+    try:
+        return line.decode("utf-8").rstrip("\r")
+    except UnicodeDecodeError as exc:
+        return ValueError(f"Invalid UTF-8 at byte {exc.start + 1}: {exc.reason}")
+
+
+# Строки потока с номерами. Строка длиннее max_line байт не накапливается в памяти:
+# ее остаток пропускается до перевода строки, а вместо текста возвращается ошибка.
+async def iter_lines(chunks: AsyncIterator[bytes], max_line: Optional[int] = None) -> AsyncIterator[Line]:
+    max_line = max_line or settings.TASK_IMPORT_MAX_LINE_BYTES
+    too_long = ValueError(f"Line is longer than {max_line} bytes")
+    line_no = 0
+    tail = b""
+    skipping = False
+    async for chunk in chunks:
+        lines = (tail + chunk).split(b"\n")
+        tail = lines.pop()
+        for line in lines:
+            line_no += 1
+            if skipping or len(line) > max_line:
+                skipping = False
+                yield line_no, too_long
+            else:
+                yield line_no, _decode(line)
+        if len(tail) > max_line:
+            skipping, tail = True, b""
+    if skipping:
+        yield line_no + 1, too_long
+    elif tail:
+        yield line_no + 1, _decode(tail)
+
+
+# Объект из строки NDJSON; пустые строки пропускаются
+async def parse_ndjson(lines: AsyncIterator[Line]) -> AsyncIterator[Tuple[int, object]]:
+    async for line_no, line in lines:
+        if isinstance(line, ValueError):
+            yield line_no, line
+            continue
+        if not line.strip():
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except ValueError as exc:
+            yield line_no, ValueError(f"Invalid JSON: {exc}")
+
+
+# Словарь по заголовку CSV. Поле в кавычках может содержать перевод строки:
+# запись собирается из строк, пока число кавычек в ней нечетное. Слишком длинная
+# строка — ошибка всей записи, сборка начинается заново со следующей строки.
+async def parse_csv(lines: AsyncIterator[Line]) -> AsyncIterator[Tuple[int, object]]:
+    header: Optional[List[str]] = None
+    record: List[str] = []
+    quotes = 0
+    start = 0
+    async for line_no, line in lines:
+        if not record:
+            start = line_no
+        if isinstance(line, ValueError):
+            yield start, line
+            record, quotes = [], 0
+            continue
+        record.append(line)
+        quotes += line.count('"')
+        if quotes % 2:
+            continue
+        raw = "\n".join(record)
+        record, quotes = [], 0
+        if not raw.strip():
+            continue
+        try:
+            values = next(csv.reader([raw]))
+        except csv.Error as exc:
+            yield start, ValueError(f"Invalid CSV: {exc}")
+            continue
+        if header is None:
+            header = values
+            continue
+        if len(values) != len(header):
+            yield start, ValueError(f"Expected {len(header)} fields, got {len(values)}")
+            continue
+        yield start, dict(zip(header, values))
+    if record:
+        yield start, ValueError("Invalid CSV: unterminated quoted field")
+
+
+PARSERS = {
+    "ndjson": parse_ndjson,
+    "csv": parse_csv,
+}
+
+
+def validate(line_no: int, item: object) -> Tuple[Optional[tuple], Optional[TaskImportError]]:
+    if isinstance(item, ValueError):
+        return None, TaskImportError(line=line_no, detail=str(item))
+    if not isinstance(item, dict):
+        return None, TaskImportError(line=line_no, detail="Expected an object")
+    try:
+        task = TaskCreate.model_validate(item)
+    except ValidationError as exc:
+        return None, TaskImportError(line=line_no, detail=validation_detail(exc))
+    return (line_no, task.title, task.description), None
+
+
+async def _copy_chunk(db: AsyncSession, records: List[tuple]) -> None:
+    connection = await db.connection()
+    raw = await connection.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(
+        STAGING_TABLE, records=records, columns=STAGING_COLUMNS
+    )
+
+
+async def import_tasks(
+        db: AsyncSession,
+        owner_id: int,
+        chunks: AsyncIterator[bytes],
+        format: str = "ndjson",
+        progress: Optional[Callable[[TaskImportResult], None]] = None,
+) -> TaskImportResult:
+    result = TaskImportResult()
+    await db.execute(text(
+        f"CREATE TEMPORARY TABLE {STAGING_TABLE} "
+        "(line integer, title text, description text) ON COMMIT DROP"
+    ))
+
+    records: List[tuple] = []
+    async for line_no, item in PARSERS[format](iter_lines(chunks)):
+        record, error = validate(line_no, item)
+        if error is not None:
+            result.error_count += 1
+            if len(result.errors) < settings.TASK_IMPORT_MAX_ERRORS:
+                result.errors.append(error)
+        else:
+            records.append(record)
+        result.lines = line_no
+        if len(records) >= settings.TASK_IMPORT_CHUNK_SIZE:
+            await _copy_chunk(db, records)
+            result.staged += len(records)
+            records = []
+            if progress is not None:
+                progress(result)
+    if records:
+        await _copy_chunk(db, records)
+        result.staged += len(records)
+
+    inserted = await db.execute(text(
+        "INSERT INTO task (title, description, completed, owner_id) "
+        f"SELECT title, description, false, :owner_id FROM {STAGING_TABLE} ORDER BY line"
+    ), {"owner_id": owner_id})
+    result.imported = inserted.rowcount
+    if progress is not None:
+        progress(result)
+    return result
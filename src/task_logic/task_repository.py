@@ -0,0 +1,275 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import (Boolean, Integer, String, and_, column, delete, false, func, insert, literal, null,
+                        or_, select, true, union_all, update, values)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.auth.models import TASK_SEARCH_CONFIG, Task, TaskArchive, TaskTombstone
+from src.task_logic.task_schemas import TaskBatchUpdate, TaskCreate
+
+# Репозиторий задач: каждая операция — ровно один SQL-запрос. Записи возвращают
+# строку через RETURNING, поэтому повторный SELECT (db.refresh) не нужен, а
+# отсутствие строки в результате означает, что задачи нет.
+# Фиксацию транзакции выполняет вызывающий код.
+
+# Колонки, которые возвращают запросы (в том числе RETURNING)
+TASK_COLUMNS = (Task.id, Task.title, Task.description, Task.completed, Task.version, Task.updated_at,
+                Task.owner_id, Task.change_seq)
+
+# Значения, которые выставляет каждое изменение задачи. Номер изменения берется под
+# блокировкой ленты владельца (миграция 0005): SET вычисляется до блокировки строки
+BUMP_VERSION = {"version": Task.version + 1, "updated_at": func.timezone("utc", func.now()),
+                "change_seq": func.task_next_change_seq(Task.owner_id)}
+
+
+# Блокировка ленты владельца в WHERE удаления: берется до блокировки строк,
+# tombstone и возвращенные из архива задачи получают номера уже под ней
+def _change_lock(model=Task) -> Any:
+    return func.task_change_lock(model.owner_id, type_=Boolean)
+
+
+# Те же колонки архивной таблицы (task_archive), в том же порядке
+def _archive_columns(columns: Sequence) -> List:
+    return [getattr(TaskArchive, column.key) for column in columns]
+
+
+# include_archived — если в task задачи нет, искать в архиве (два поиска по первичному ключу)
+async def get_task(db: AsyncSession, task_id: int, include_archived: bool = False) -> Optional[Dict]:
+    stmt = select(*TASK_COLUMNS).where(Task.id == task_id)
+    if include_archived:
+        archived = select(*_archive_columns(TASK_COLUMNS)).where(TaskArchive.id == task_id)
+        stmt = union_all(stmt, archived).limit(1)
+    result = await db.execute(stmt)
+    row = result.mappings().one_or_none()
+    return dict(row) if row is not None else None
+
+
+# Несколько задач по id одним запросом, в порядке id; отсутствующие пропускаются
+async def get_tasks(db: AsyncSession, task_ids: Sequence[int]) -> List[Dict]:
+    result = await db.execute(select(*TASK_COLUMNS).where(Task.id.in_(task_ids)).order_by(Task.id))
+    return [dict(row) for row in result.mappings()]
+
+
+# Колонки TaskResponse в порядке полей схемы (быстрый режим списка)
+TASK_RESPONSE_COLUMNS = (Task.id, Task.title, Task.description, Task.completed, Task.version,
+                         Task.updated_at)
+TASK_RESPONSE_FIELDS = [column.key for column in TASK_RESPONSE_COLUMNS]
+
+
+def _owner_page(model, columns: Sequence, owner_id: int, limit: int, after_id: Optional[int], skip: int):
+    stmt = select(*columns).where(model.owner_id == owner_id).order_by(model.id).limit(limit)
+    if after_id is not None:
+        stmt = stmt.where(model.id > after_id)
+    elif skip:
+        stmt = stmt.offset(skip)
+    return stmt
+
+
+# Страница задач владельца в порядке id: keyset по after_id или OFFSET для совместимости.
+# По умолчанию только рабочая таблица task. С include_archived каждая таблица
+# отдает первые skip + limit строк по своему индексу (owner_id, id), а порядок,
+# OFFSET и LIMIT применяются к их объединению.
+def _page(columns: Sequence, owner_id: int, limit: int, after_id: Optional[int], skip: int,
+          include_archived: bool = False):
+    if not include_archived:
+        return _owner_page(Task, columns, owner_id, limit, after_id, skip)
+    hot = _owner_page(Task, columns, owner_id, skip + limit, after_id, 0).subquery()
+    cold = _owner_page(TaskArchive, _archive_columns(columns), owner_id, skip + limit, after_id, 0).subquery()
+    merged = union_all(select(hot), select(cold)).subquery()
+    stmt = select(*(merged.c[column.key] for column in columns)).order_by(merged.c.id).limit(limit)
+    if after_id is None and skip:
+        stmt = stmt.offset(skip)
+    return stmt
+
+
+async def list_tasks(db: AsyncSession, owner_id: int, limit: int, after_id: Optional[int] = None,
+                     skip: int = 0, include_archived: bool = False) -> List[Dict]:
+    result = await db.execute(_page(TASK_COLUMNS, owner_id, limit, after_id, skip, include_archived))
+    return [dict(row) for row in result.mappings()]
+
+
+# Та же страница кортежами TASK_RESPONSE_COLUMNS, без построения словарей
+async def list_task_rows(db: AsyncSession, owner_id: int, limit: int, after_id: Optional[int] = None,
+                         skip: int = 0, include_archived: bool = False) -> List[Tuple]:
+    result = await db.execute(_page(TASK_RESPONSE_COLUMNS, owner_id, limit, after_id, skip, include_archived))
+    return result.all()
+
+
+# Полнотекстовый поиск по заголовку и описанию задач владельца (GIN-индекс по search_vector).
+# Выдача упорядочена по убыванию ранга, keyset-курсор — (ранг, id) последней строки.
+async def search_tasks(db: AsyncSession, owner_id: int, query: str, limit: int,
+                       completed: Optional[bool] = None,
+                       after: Optional[Tuple[float, int]] = None) -> List[Dict]:
+    tsquery = func.websearch_to_tsquery(TASK_SEARCH_CONFIG, query)
+    rank = func.ts_rank_cd(Task.search_vector, tsquery)
+    stmt = (
+        select(*TASK_COLUMNS, rank.label("rank"))
+        .where(Task.owner_id == owner_id, Task.search_vector.op("@@")(tsquery))
+        .order_by(rank.desc(), Task.id)
+        .limit(limit)
+    )
+    if completed is not None:
+        stmt = stmt.where(Task.completed == completed)
+    if after is not None:
+        after_rank, after_id = after
+        stmt = stmt.where(or_(rank < after_rank, and_(rank == after_rank, Task.id > after_id)))
+    result = await db.execute(stmt)
+    return [dict(row) for row in result.mappings()]
+
+
+# Изменения задач владельца с номером больше since в порядке номеров: измененные
+# задачи и tombstone удаленных одним запросом (UNION ALL по двум индексам
+# (owner_id, change_seq)). Для удаленных поля задачи — NULL, deleted — true.
+async def list_changes(db: AsyncSession, owner_id: int, since: int, limit: int) -> List[Dict]:
+    changed = select(*TASK_RESPONSE_COLUMNS, Task.change_seq, false().label("deleted")).where(
+        Task.owner_id == owner_id, Task.change_seq > since
+    )
+    deleted = select(
+        TaskTombstone.task_id, null(), null(), null(), null(), null(), TaskTombstone.change_seq,
+        true().label("deleted"),
+    ).where(TaskTombstone.owner_id == owner_id, TaskTombstone.change_seq > since)
+    stmt = union_all(changed, deleted).order_by("change_seq").limit(limit)
+    result = await db.execute(stmt)
+    return [dict(row) for row in result.mappings()]
+
+
+# Номер последнего изменения задач владельца (0 — изменений не было)
+async def last_change_seq(db: AsyncSession, owner_id: int) -> int:
+    changed = select(func.max(Task.change_seq)).where(Task.owner_id == owner_id).scalar_subquery()
+    deleted = select(func.max(TaskTombstone.change_seq)).where(TaskTombstone.owner_id == owner_id).scalar_subquery()
+    return await db.scalar(select(func.greatest(func.coalesce(changed, 0), func.coalesce(deleted, 0))))
+
+
+# Архив прозрачен для записи. Изменение задачи из архива возвращает ее в task:
+# строка удаляется из task_archive и вставляется в task уже с новыми значениями
+# (version + 1, номер изменения — триггером вставки). Удаление удаляет задачу из
+# той таблицы, где она есть, и пишет tombstone. Задача лежит ровно в одной из
+# таблиц, поэтому обе части оператора вместе затрагивают ее один раз.
+
+# UPDATE задач из task и возврат задач из архива одним запросом (data-modifying CTE):
+# update — UPDATE ... RETURNING, restore — DELETE из task_archive ... RETURNING,
+# values — новые значения колонок по строке restore
+def _update_or_restore(update_stmt, restore_stmt, values_for) -> Any:
+    updated = update_stmt.returning(*TASK_COLUMNS).cte("updated")
+    restored = restore_stmt.returning(*_archive_columns(TASK_COLUMNS)).cte("restored")
+    new_values = values_for(restored)
+    columns = ["id", *new_values, "version", "updated_at", "owner_id"]
+    reinserted = (
+        insert(Task)
+        .from_select(columns, select(
+            restored.c.id, *new_values.values(), restored.c.version + 1, func.timezone("utc", func.now()),
+            restored.c.owner_id,
+        ))
+        .returning(*TASK_COLUMNS)
+        .cte("reinserted")
+    )
+    return union_all(select(*updated.c), select(*reinserted.c))
+
+
+# DELETE ... RETURNING из task и task_archive и запись tombstone одним запросом
+# (data-modifying CTE). change_seq в результате — номер удаления из tombstone.
+def _delete_with_tombstones(stmt, archived_stmt) -> Any:
+    removed_hot = stmt.returning(*TASK_COLUMNS).cte("removed_hot")
+    removed_cold = archived_stmt.returning(*_archive_columns(TASK_COLUMNS)).cte("removed_cold")
+    removed = union_all(select(*removed_hot.c), select(*removed_cold.c)).cte("removed")
+    tombstones = (
+        insert(TaskTombstone)
+        .from_select(["task_id", "owner_id"], select(removed.c.id, removed.c.owner_id))
+        .returning(TaskTombstone.task_id, TaskTombstone.change_seq)
+        .cte("tombstones")
+    )
+    columns = [removed.c[column.key] for column in TASK_COLUMNS if column.key != "change_seq"]
+    return (
+        select(*columns, tombstones.c.change_seq)
+        .join_from(removed, tombstones, tombstones.c.task_id == removed.c.id)
+        .order_by(removed.c.id)
+    )
+
+
+# INSERT ... RETURNING вместо add + commit + refresh
+async def create_task(db: AsyncSession, owner_id: int, task: TaskCreate) -> Dict:
+    stmt = (
+        insert(Task)
+        .values(**task.model_dump(), completed=False, owner_id=owner_id)
+        .returning(*TASK_COLUMNS)
+    )
+    result = await db.execute(stmt)
+    return dict(result.mappings().one())
+
+
+# UPDATE ... RETURNING вместо SELECT + setattr + commit + refresh (задача из архива
+# возвращается в task); None — задачи нет или ее версия не входит в expected_versions
+# (оптимистичная блокировка)
+async def update_task(db: AsyncSession, task_id: int, data: Dict[str, Any],
+                      expected_versions: Optional[Sequence[int]] = None) -> Optional[Dict]:
+    update_stmt = update(Task).where(Task.id == task_id).values(**data, **BUMP_VERSION)
+    restore_stmt = delete(TaskArchive).where(TaskArchive.id == task_id, _change_lock(TaskArchive))
+    if expected_versions is not None:
+        update_stmt = update_stmt.where(Task.version.in_(expected_versions))
+        restore_stmt = restore_stmt.where(TaskArchive.version.in_(expected_versions))
+    stmt = _update_or_restore(update_stmt, restore_stmt, lambda restored: {
+        key: literal(data[key], Task.__table__.c[key].type) if key in data else restored.c[key]
+        for key in ("title", "description", "completed")
+    })
+    result = await db.execute(stmt)
+    row = result.mappings().one_or_none()
+    return dict(row) if row is not None else None
+
+
+# DELETE ... RETURNING вместо SELECT + DELETE (в том числе из архива); None — задачи нет
+async def delete_task(db: AsyncSession, task_id: int) -> Optional[Dict]:
+    stmt = _delete_with_tombstones(
+        delete(Task).where(Task.id == task_id, _change_lock()),
+        delete(TaskArchive).where(TaskArchive.id == task_id, _change_lock(TaskArchive)),
+    )
+    result = await db.execute(stmt)
+    row = result.mappings().one_or_none()
+    return dict(row) if row is not None else None
+
+
+# Пакетное создание: один многострочный INSERT ... RETURNING
+async def create_tasks(db: AsyncSession, owner_id: int, tasks: Sequence[TaskCreate]) -> List[Dict]:
+    rows = [{**task.model_dump(), "completed": False, "owner_id": owner_id} for task in tasks]
+    stmt = insert(Task).values(rows).returning(*TASK_COLUMNS)
+    result = await db.execute(stmt)
+    return [dict(row) for row in result.mappings()]
+
+
+# Пакетное обновление задач владельца: один UPDATE ... FROM (VALUES ...) RETURNING,
+# задачи из архива возвращаются в task тем же запросом
+async def update_tasks(db: AsyncSession, owner_id: int, tasks: Sequence[TaskBatchUpdate]) -> List[Dict]:
+    data = values(
+        column("id", Integer),
+        column("title", String),
+        column("description", String),
+        column("completed", Boolean),
+        name="data",
+    ).data([(task.id, task.title, task.description, task.completed) for task in tasks])
+    update_stmt = (
+        update(Task)
+        .where(Task.id == data.c.id, Task.owner_id == owner_id)
+        .values(title=data.c.title, description=data.c.description, completed=data.c.completed,
+                **BUMP_VERSION)
+    )
+    restore_stmt = delete(TaskArchive).where(
+        TaskArchive.id == data.c.id, TaskArchive.owner_id == owner_id, _change_lock(TaskArchive)
+    ).returning(data.c.title.label("new_title"), data.c.description.label("new_description"),
+                data.c.completed.label("new_completed"))
+    stmt = _update_or_restore(update_stmt, restore_stmt, lambda restored: {
+        "title": restored.c.new_title, "description": restored.c.new_description,
+        "completed": restored.c.new_completed,
+    })
+    result = await db.execute(stmt)
+    return [dict(row) for row in result.mappings()]
+
+
+# Пакетное удаление задач владельца (в том числе из архива): один DELETE ... RETURNING
+async def delete_tasks(db: AsyncSession, owner_id: int, task_ids: Sequence[int]) -> List[Dict]:
+    stmt = _delete_with_tombstones(
+        delete(Task).where(Task.id.in_(task_ids), Task.owner_id == owner_id, _change_lock()),
+        delete(TaskArchive).where(
+            TaskArchive.id.in_(task_ids), TaskArchive.owner_id == owner_id, _change_lock(TaskArchive)
+        ),
+    )
+    result = await db.execute(stmt)
+    return [dict(row) for row in result.mappings()]
@@ -1,3 +1,6 @@
+from datetime import datetime
+from typing import List, Optional
+
 from pydantic import BaseModel
 
 
@@ -17,3 +20,59 @@ class TaskResponse(BaseModel):
     title: str
     description: str
     completed: bool
+    version: int
+    updated_at: datetime
+
+
+class TaskChange(TaskResponse):
+    change_seq: int
+
+
+class TaskDeletion(BaseModel):
+    id: int
+    change_seq: int
+
+
+class TaskChanges(BaseModel):
+    tasks: List[TaskChange]  # созданные и измененные задачи
+    deleted: List[TaskDeletion]
+    next_since: int  # значение since для следующего запроса
+    has_more: bool  # изменений больше limit, нужно запросить еще
+
+
+class TaskStats(BaseModel):
+    total: int
+    completed: int
+    open: int
+
+
+class TaskSearchResult(TaskResponse):
+    rank: float
+
+
+class TaskBatchUpdate(TaskUpdate):
+    id: int
+
+
+class TaskBatchError(BaseModel):
+    index: int  # позиция элемента в запросе
+    id: Optional[int] = None
+    detail: str
+
+
+class TaskBatchResponse(BaseModel):
+    items: List[TaskResponse]
+    errors: List[TaskBatchError] = []
+
+
+class TaskImportError(BaseModel):
+    line: int  # номер строки во входном файле
+    detail: str
+
+
+class TaskImportResult(BaseModel):
+    lines: int = 0
+    staged: int = 0
+    imported: int = 0
+    error_count: int = 0
+    errors: List[TaskImportError] = []  # не больше TASK_IMPORT_MAX_ERRORS
@@ -0,0 +1,118 @@
+"""
+Общие фикстуры тестов.
+
+Модульным тестам база не нужна. Тесты с фикстурами `app` и `client` работают
+с PostgreSQL из TEST_DATABASE_URL и пропускаются, если переменная не задана.
+База из TEST_DATABASE_URL пересоздается в начале прогона — не указывайте рабочую:
+
+    TEST_DATABASE_URL=postgresql://postgres@localhost:5432/clients_test python -m pytest
+"""
+import os
+import uuid
+from urllib.parse import urlsplit
+
+import pytest
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+# Настройки читаются при импорте src.config, поэтому задаются до импорта приложения.
+# Параметры базы берутся только из TEST_DATABASE_URL, чтобы тесты не тронули базу из .env.
+_url = urlsplit(TEST_DATABASE_URL or "postgresql://postgres@localhost:5432/clients_test")
+os.environ.update({
+    "API_MODE": "test",
+    "DB_HOST": _url.hostname or "localhost",
+    "DB_PORT": str(_url.port or 5432),
+    "DB_USER": _url.username or "postgres",
+    "DB_PASS": _url.password or "",
+    "DB_NAME": _url.path.lstrip("/"),
+    "DB_DRIVER_SYNC": "psycopg2",
+    "DB_DRIVER_ASYNC": "asyncpg",
+})
+for _key, _value in {
+    "APP_NAME": "task-manager-tests",
+    "ADMIN_EMAIL": "admin@example.com",
+    "ACCESS_SECRET": "test-secret",
+    "ALGORITHM": "HS256",
+    "ACCESS_EXP": "3600",
+    "BCRYPT_ROUNDS": "4",
+    # Все тесты ходят с одного адреса: бюджеты регистрации и входа исчерпались бы
+    "RATE_LIMIT_ENABLED": "false",
+    # Архивация запускается в тестах явно
+    "TASK_ARCHIVE_INTERVAL": "0",
+}.items():
+    os.environ.setdefault(_key, _value)
+
+
+# Один цикл событий на весь прогон: движок, пул потоков хеширования и lifespan
+# приложения создаются один раз (фикстура app с областью session)
+@pytest.fixture(scope="session")
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+async def database():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    import asyncpg
+
+    from src.config import settings
+    from src.migrate import connect, migrate
+
+    admin = await asyncpg.connect(
+        host=settings.DB_HOST, port=int(settings.DB_PORT), user=settings.DB_USER,
+        password=settings.DB_PASS or None, database="postgres",
+    )
+    try:
+        await admin.execute(f'DROP DATABASE IF EXISTS "{settings.DB_NAME}" WITH (FORCE)')
+        await admin.execute(f'CREATE DATABASE "{settings.DB_NAME}"')
+    finally:
+        await admin.close()
+    conn = await connect()
+    try:
+        await migrate(conn, log=lambda message: None)
+    finally:
+        await conn.close()
+
+
+@pytest.fixture(scope="session")
+async def app(database):
+    from src.main import app, lifespan
+
+    async with lifespan(app):
+        yield app
+
+
+async def register_and_login(client, password: str = "test-password") -> dict:
+    email = f"test-{uuid.uuid4().hex[:12]}@example.com"
+    response = await client.post("/auth/register", json={
+        "email": email, "password": password, "username": "test", "role_id": 1,
+    })
+    assert response.status_code == 201, response.text
+    user = response.json()
+    response = await client.post("/auth/login", data={"username": email, "password": password})
+    assert response.status_code == 204, response.text
+    return user
+
+
+async def _logged_in_client(app):
+    import httpx
+
+    # cookie_secure=True: куки отправляются только по https
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="https://test") as client:
+        client.user = await register_and_login(client)
+        yield client
+
+
+# Клиент, вошедший под новым пользователем: задачи тестов не пересекаются
+@pytest.fixture
+async def client(app):
+    async for client in _logged_in_client(app):
+        yield client
+
+
+# Второй пользователь — для проверок доступа к чужим задачам
+@pytest.fixture
+async def other_client(app):
+    async for client in _logged_in_client(app):
+        yield client
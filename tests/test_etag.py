@@ -0,0 +1,40 @@
+import pytest
+
+from src.task_logic.etag import if_match_versions, none_match
+
+pytestmark = pytest.mark.anyio
+
+# Больше minimum_size сжатия (1 КиБ): ответ сжимается и получает слабый ETag
+LARGE_TASK = {"title": "large", "description": "x" * 4096}
+
+
+def test_if_match_versions():
+    assert if_match_versions(None, 1) is None
+    assert if_match_versions("*", 1) is None
+    assert if_match_versions('"1-3", "2-5", "1-x"', 1) == [3]
+    assert if_match_versions('W/"1-3"', 1) == [3]
+    assert if_match_versions('"10-3"', 1) == []
+
+
+def test_none_match_is_weak():
+    assert none_match('W/"1-3"', '"1-3"')
+    assert none_match('"2-1", "1-3"', '"1-3"')
+    assert not none_match('"1-2"', '"1-3"')
+
+
+async def test_if_match_accepts_etag_of_compressed_response(client):
+    task = (await client.post("/create-task/", json=LARGE_TASK)).json()
+
+    response = await client.get(f"/tasks/{task['id']}", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    etag = response.headers["etag"]
+    assert etag.startswith("W/")
+
+    update = {**LARGE_TASK, "completed": True}
+    response = await client.put(f"/update-task/{task['id']}", json=update, headers={"If-Match": etag})
+    assert response.status_code == 200, response.text
+
+    # Тег прочитанной версии устарел после обновления
+    response = await client.put(f"/update-task/{task['id']}", json=update, headers={"If-Match": etag})
+    assert response.status_code == 412
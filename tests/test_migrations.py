@@ -0,0 +1,78 @@
+import pytest
+
+from src.config import settings
+from src.migrate import LATEST_VERSION, migrate
+
+pytestmark = pytest.mark.anyio
+
+# Схема, которую создавал Base.metadata.create_all до появления миграций
+LEGACY_SCHEMA = """
+CREATE TABLE role (
+    id SERIAL NOT NULL, name VARCHAR NOT NULL, permissions JSON, PRIMARY KEY (id)
+);
+CREATE TABLE person (
+    id SERIAL NOT NULL, email VARCHAR NOT NULL, username VARCHAR NOT NULL, registered_at TIMESTAMP WITHOUT TIME ZONE,
+    role_id INTEGER, hashed_password VARCHAR(1024) NOT NULL, is_active BOOLEAN NOT NULL,
+    is_superuser BOOLEAN NOT NULL, is_verified BOOLEAN NOT NULL,
+    PRIMARY KEY (id), FOREIGN KEY (role_id) REFERENCES role (id)
+);
+CREATE INDEX ix_person_id ON person (id);
+CREATE TABLE task (
+    id SERIAL NOT NULL, title VARCHAR, description VARCHAR, completed BOOLEAN, owner_id INTEGER,
+    PRIMARY KEY (id), FOREIGN KEY (owner_id) REFERENCES person (id)
+);
+CREATE INDEX ix_task_id ON task (id);
+CREATE INDEX ix_task_title ON task (title);
+CREATE INDEX ix_task_description ON task (description);
+INSERT INTO role (id, name, permissions) VALUES (1, 'user', '["read", "write"]');
+INSERT INTO person (email, username, hashed_password, role_id, is_active, is_superuser, is_verified)
+VALUES ('legacy@example.com', 'legacy', 'x', 1, true, false, false);
+INSERT INTO task (title, description, completed, owner_id) VALUES ('old task', 'created before migrations', true, 1);
+"""
+
+
+@pytest.fixture
+async def legacy_database(database):
+    import asyncpg
+
+    name = f"{settings.DB_NAME}_legacy"
+    params = dict(host=settings.DB_HOST, port=int(settings.DB_PORT), user=settings.DB_USER,
+                  password=settings.DB_PASS or None)
+    admin = await asyncpg.connect(database="postgres", **params)
+    await admin.execute(f'DROP DATABASE IF EXISTS "{name}" WITH (FORCE)')
+    await admin.execute(f'CREATE DATABASE "{name}"')
+    conn = await asyncpg.connect(database=name, **params)
+    try:
+        await conn.execute(LEGACY_SCHEMA)
+        yield conn
+    finally:
+        await conn.close()
+        await admin.execute(f'DROP DATABASE IF EXISTS "{name}" WITH (FORCE)')
+        await admin.close()
+
+
+async def test_migrations_adopt_create_all_database(legacy_database):
+    conn = legacy_database
+    assert await migrate(conn, log=lambda message: None) == LATEST_VERSION
+
+    columns = {row["column_name"] for row in await conn.fetch(
+        "SELECT column_name FROM information_schema.columns WHERE table_name = 'task'"
+    )}
+    assert {"version", "updated_at", "search_vector", "change_seq"} <= columns
+    indexes = {row["indexname"] for row in await conn.fetch("SELECT indexname FROM pg_indexes WHERE tablename = 'task'")}
+    assert "ix_task_description" not in indexes
+    assert {"ix_task_search_vector", "ix_task_owner_id_id"} <= indexes
+
+    # Существующая задача получила значения новых колонок и находится поиском
+    task = await conn.fetchrow(
+        "SELECT version, updated_at, change_seq FROM task "
+        "WHERE search_vector @@ websearch_to_tsquery('simple', 'migrations')"
+    )
+    assert task is not None and task["version"] == 1 and task["updated_at"] is not None
+    assert await conn.fetchval("SELECT total FROM task_counter WHERE owner_id = 1") == 1
+
+
+async def test_migrations_are_idempotent(legacy_database):
+    conn = legacy_database
+    await migrate(conn, log=lambda message: None)
+    assert await migrate(conn, log=lambda message: None) == LATEST_VERSION
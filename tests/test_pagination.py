@@ -0,0 +1,59 @@
+import pytest
+from fastapi import HTTPException
+
+from src.task_logic.pagination import decode_cursor, decode_id_cursor, decode_rank_cursor, encode_cursor
+
+
+def test_id_cursor_round_trip():
+    cursor = encode_cursor({"id": 42})
+    assert "=" not in cursor
+    assert decode_id_cursor(cursor) == 42
+
+
+def test_missing_cursor_means_first_page():
+    assert decode_cursor(None) is None
+    assert decode_cursor("") is None
+    assert decode_id_cursor(None) is None
+
+
+@pytest.mark.parametrize("position", [
+    {"id": True},
+    {"id": False},
+    {"id": "42"},
+    {"id": 4.2},
+    {"id": None},
+    {},
+])
+def test_id_cursor_rejects_non_integer_id(position):
+    with pytest.raises(HTTPException) as error:
+        decode_id_cursor(encode_cursor(position))
+    assert error.value.status_code == 400
+
+
+@pytest.mark.parametrize("cursor", ["not base64!", "bm90IGpzb24", encode_cursor([1, 2]), encode_cursor(42)])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+    assert error.value.status_code == 400
+
+
+def test_rank_cursor_round_trip():
+    assert decode_rank_cursor(encode_cursor({"rank": 0.25, "id": 7})) == (0.25, 7)
+    # Целый ранг (в JSON без дробной части) тоже допустим
+    assert decode_rank_cursor(encode_cursor({"rank": 1, "id": 7})) == (1.0, 7)
+    assert decode_rank_cursor(None) is None
+
+
+@pytest.mark.parametrize("position", [
+    {"rank": True, "id": 7},
+    {"rank": "0.5", "id": 7},
+    {"rank": None, "id": 7},
+    {"rank": 0.5, "id": True},
+    {"rank": 0.5, "id": "7"},
+    {"rank": 0.5},
+    {"id": 7},
+])
+def test_rank_cursor_rejects_invalid_position(position):
+    with pytest.raises(HTTPException) as error:
+        decode_rank_cursor(encode_cursor(position))
+    assert error.value.status_code == 400
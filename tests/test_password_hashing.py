@@ -0,0 +1,46 @@
+import threading
+
+import anyio
+import pytest
+
+from src.auth.hashing import PasswordHashExecutor
+
+pytestmark = pytest.mark.anyio
+
+
+class BlockingPasswordHelper:
+    def __init__(self):
+        self.release = threading.Event()
+
+    def hash(self, password: str) -> str:
+        self.release.wait()
+        return f"hashed {password}"
+
+
+async def test_cancelled_queued_job_leaves_the_queue():
+    helper = BlockingPasswordHelper()
+    executor = PasswordHashExecutor(helper, max_workers=1)
+    results = []
+
+    async def hash_password(password: str):
+        results.append(await executor.hash(password))
+
+    try:
+        async with anyio.create_task_group() as group:
+            group.start_soon(hash_password, "first")
+            await anyio.sleep(0.1)
+            async with anyio.create_task_group() as waiting:
+                waiting.start_soon(hash_password, "second")
+                await anyio.sleep(0.1)
+                # Первый пароль занял единственный поток, второй ждет в очереди
+                assert executor.stats()["queued"] == 1
+                waiting.cancel_scope.cancel()
+            # Отменено только ожидание второго пароля; первый дохешируется
+            assert executor.stats()["queued"] == 0
+            helper.release.set()
+    finally:
+        helper.release.set()
+        executor.shutdown()
+    assert results == ["hashed first"]
+    assert executor.stats()["queued"] == 0
+    assert executor.stats()["calls"] == 1
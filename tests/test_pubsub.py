@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+from src.task_logic.broadcaster import Broadcaster
+from src.task_logic.pubsub import PostgresPubSub
+from src.task_logic.task_cache import InMemoryTaskCache
+from src.task_logic.task_events import TASK_DELETED, TASKS_DELETED, TASKS_UPDATED, batch_event, task_event
+
+pytestmark = pytest.mark.anyio
+
+PAYLOAD_LIMIT = 300
+
+
+# Broadcaster, который запоминает разосланные события вместо очередей подписчиков
+class RecordingBroadcaster(Broadcaster):
+    def __init__(self):
+        super().__init__()
+        self.events = []
+
+    def publish(self, owner_id, message, task_ids=()):
+        self.events.append((owner_id, message, list(task_ids)))
+
+
+def make_pubsub() -> PostgresPubSub:
+    return PostgresPubSub(RecordingBroadcaster(), InMemoryTaskCache(max_size=100, ttl=60, negative_ttl=5),
+                          channel="task_events", payload_limit=PAYLOAD_LIMIT)
+
+
+# Уведомления, которые воркер отправил бы в NOTIFY
+def sent(pubsub: PostgresPubSub) -> list:
+    payloads = []
+    while not pubsub._outgoing.empty():
+        payloads.append(pubsub._outgoing.get_nowait())
+    return payloads
+
+
+async def test_large_batch_delete_is_split_and_delivered_without_fetch():
+    sender, receiver = make_pubsub(), make_pubsub()
+    task_ids = list(range(1000, 1100))
+    sender.publish(7, batch_event(TASKS_DELETED, task_ids, seq=42), task_ids)
+
+    payloads = sent(sender)
+    assert len(payloads) > 1
+    assert all(len(payload.encode()) <= PAYLOAD_LIMIT for payload in payloads)
+    assert sender.dropped == 0
+
+    for payload in payloads:
+        await receiver._deliver(json.loads(payload))
+    assert receiver.fetched == 0
+    delivered = []
+    for owner_id, event, filter_ids in receiver.broadcaster.events:
+        assert owner_id == 7 and event.type == TASKS_DELETED and event.data["seq"] == 42
+        assert filter_ids == event.data["task_ids"]
+        delivered += event.data["task_ids"]
+    assert delivered == task_ids
+
+
+async def test_ids_only_task_deleted_is_delivered_without_fetch():
+    receiver = make_pubsub()
+    await receiver._deliver({"owner_id": 7, "task_ids": [5], "ids": [5], "type": TASK_DELETED, "seq": 3})
+    assert receiver.fetched == 0
+    (owner_id, event, _), = receiver.broadcaster.events
+    assert event.data == task_event(TASK_DELETED, 5, seq=3).data
+
+
+def test_large_batch_update_is_split_into_ids_only_payloads():
+    pubsub = make_pubsub()
+    task_ids = list(range(1, 60))
+    items = [{"id": task_id, "title": "x" * 50} for task_id in task_ids]
+    pubsub.publish(7, batch_event(TASKS_UPDATED, task_ids, items, seq=9), task_ids)
+
+    messages = [json.loads(payload) for payload in sent(pubsub)]
+    assert len(messages) > 1
+    assert all("event" not in message and message["type"] == TASKS_UPDATED for message in messages)
+    assert [task_id for message in messages for task_id in message["ids"]] == task_ids
+
+
+def test_event_that_cannot_be_split_is_dropped():
+    pubsub = make_pubsub()
+    pubsub.publish(7, task_event("message", 1, {"text": "x" * PAYLOAD_LIMIT}))
+    assert sent(pubsub) == []
+    assert pubsub.dropped == 1
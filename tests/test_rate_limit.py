@@ -0,0 +1,27 @@
+import pytest
+
+from src.rate_limit import InFlightLimitMiddleware
+
+pytestmark = pytest.mark.anyio
+
+
+def find_middleware(app, cls):
+    layer = app.middleware_stack
+    while layer is not None and not isinstance(layer, cls):
+        layer = getattr(layer, "app", None)
+    return layer
+
+
+# Отказ из-за перегрузки проходит через CORSMiddleware: браузер видит 503 и Retry-After
+async def test_overload_response_carries_cors_headers(app, client, monkeypatch):
+    limiter = find_middleware(app, InFlightLimitMiddleware)
+    assert limiter is not None
+    monkeypatch.setattr(limiter, "in_flight", limiter.max_in_flight)
+
+    response = await client.get("/tasks/stats", headers={"Origin": "http://localhost:3000"})
+    assert response.status_code == 503
+    assert "retry-after" in response.headers
+    assert response.headers["access-control-allow-origin"] == "http://localhost:3000"
+
+    response = await client.get("/healthz")
+    assert response.status_code == 200
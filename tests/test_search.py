@@ -0,0 +1,83 @@
+import pytest
+
+from src.task_logic.pagination import decode_rank_cursor
+
+pytestmark = pytest.mark.anyio
+
+
+async def create(client, title: str, description: str, completed: bool = False) -> dict:
+    response = await client.post("/create-task/", json={"title": title, "description": description})
+    assert response.status_code == 200, response.text
+    task = response.json()
+    if completed:
+        response = await client.put(f"/update-task/{task['id']}", json={
+            "title": title, "description": description, "completed": True,
+        })
+        assert response.status_code == 200, response.text
+        task = response.json()
+    return task
+
+
+async def search(client, **params):
+    response = await client.get("/tasks/search", params=params)
+    assert response.status_code == 200, response.text
+    return response
+
+
+async def test_title_match_ranks_above_description_match(client):
+    in_description = await create(client, "weekly report", "mention the quarterly budget once")
+    in_title = await create(client, "budget review", "numbers for next year")
+    await create(client, "groceries", "milk and bread")
+
+    results = (await search(client, q="budget")).json()
+    assert [task["id"] for task in results] == [in_title["id"], in_description["id"]]
+    assert results[0]["rank"] > results[1]["rank"]
+
+
+async def test_search_is_scoped_to_owner(client, other_client):
+    await create(client, "private plans", "secret")
+    assert len((await search(client, q="private")).json()) == 1
+    assert (await search(other_client, q="private")).json() == []
+
+
+async def test_completed_filter(client):
+    done = await create(client, "invoice march", "paid", completed=True)
+    open_task = await create(client, "invoice april", "pending")
+
+    assert [task["id"] for task in (await search(client, q="invoice", completed="true")).json()] == [done["id"]]
+    assert [task["id"] for task in (await search(client, q="invoice", completed="false")).json()] == [open_task["id"]]
+    assert len((await search(client, q="invoice")).json()) == 2
+
+
+async def test_cursor_continues_in_rank_then_id_order(client):
+    # Ранги различаются (слово в заголовке или в описании) и совпадают внутри группы:
+    # курсор (rank, id) должен продолжать выдачу и при равных рангах
+    for i in range(4):
+        await create(client, f"deploy {i}", "service")
+    for i in range(3):
+        await create(client, f"step {i}", "deploy service")
+
+    expected = (await search(client, q="deploy", limit=100)).json()
+    assert len(expected) == 7
+    assert [(-task["rank"], task["id"]) for task in expected] == sorted((-task["rank"], task["id"]) for task in expected)
+
+    pages, after = [], None
+    while True:
+        params = {"q": "deploy", "limit": 2}
+        if after:
+            params["after"] = after
+        response = await search(client, **params)
+        pages.append(response.json())
+        after = response.headers.get("X-Next-Cursor")
+        if after is None:
+            break
+        last = pages[-1][-1]
+        assert decode_rank_cursor(after) == (last["rank"], last["id"])
+
+    assert [task["id"] for page in pages for task in page] == [task["id"] for task in expected]
+    assert [len(page) for page in pages] == [2, 2, 2, 1]
+
+
+async def test_search_requires_query(client):
+    response = await client.get("/tasks/search", params={"q": ""})
+    assert response.status_code == 422
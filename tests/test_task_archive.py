@@ -0,0 +1,86 @@
+import pytest
+from sqlalchemy import text
+
+from src.database import engine
+from src.task_logic.task_archive import ARCHIVE_LOCK_ID, archive_completed_tasks
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_archiving_pass_is_skipped_while_another_runs(database):
+    async with engine.connect() as conn:
+        assert await conn.scalar(text("SELECT pg_try_advisory_lock(:key)"), {"key": ARCHIVE_LOCK_ID})
+        try:
+            assert await archive_completed_tasks(after_days=0, batch_size=100) is None
+        finally:
+            await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": ARCHIVE_LOCK_ID})
+    assert await archive_completed_tasks(after_days=365 * 20, batch_size=100) == 0
+
+
+async def archived_task(client, **fields) -> dict:
+    task = (await client.post("/create-task/", json={"title": "old", "description": "d"})).json()
+    response = await client.put(f"/update-task/{task['id']}", json={"title": "old", "description": "d",
+                                                                     "completed": True})
+    # Задача старше любого порога: переносится только она
+    async with engine.begin() as conn:
+        await conn.execute(text("UPDATE task SET updated_at = '2000-01-01' WHERE id = :id"), {"id": task["id"]})
+    assert await archive_completed_tasks(after_days=365 * 20, batch_size=100) == 1
+    return response.json()
+
+
+async def next_since(client) -> int:
+    return (await client.get("/tasks/changes")).json()["next_since"]
+
+
+async def stats(client) -> dict:
+    return (await client.get("/tasks/stats")).json()
+
+
+async def test_update_restores_archived_task(client):
+    task = await archived_task(client)
+    before, since = await stats(client), await next_since(client)
+    etag = (await client.get(f"/tasks/{task['id']}")).headers["etag"]
+
+    reopen = {"title": "reopened", "description": "d", "completed": False}
+    response = await client.put(f"/update-task/{task['id']}", json=reopen, headers={"If-Match": '"0-0"'})
+    assert response.status_code == 412
+    response = await client.put(f"/update-task/{task['id']}", json=reopen, headers={"If-Match": etag})
+    assert response.status_code == 200, response.text
+    updated = response.json()
+    assert updated["version"] == task["version"] + 1 and updated["completed"] is False
+
+    # Задача снова в task: видна в списке без include_archived и в ленте изменений
+    listed = (await client.get("/tasks/")).json()
+    assert [item["id"] for item in listed] == [task["id"]]
+    feed = (await client.get("/tasks/changes", params={"since": since})).json()
+    assert [item["id"] for item in feed["tasks"]] == [task["id"]]
+    assert await stats(client) == {**before, "completed": before["completed"] - 1, "open": before["open"] + 1}
+
+
+async def test_batch_update_restores_archived_task(client):
+    task = await archived_task(client)
+    response = await client.put("/update-tasks/", json=[
+        {"id": task["id"], "title": "batch", "description": "d", "completed": False},
+        {"id": 2147483647, "title": "missing", "description": "d", "completed": False},
+    ])
+    assert response.status_code == 200
+    body = response.json()
+    assert [(item["id"], item["title"]) for item in body["items"]] == [(task["id"], "batch")]
+    assert [error["index"] for error in body["errors"]] == [1]
+    assert (await client.get("/tasks/")).json()[0]["title"] == "batch"
+
+
+async def test_delete_archived_task(client):
+    task = await archived_task(client)
+    since = await next_since(client)
+    response = await client.delete(f"/delete-task/{task['id']}")
+    assert response.status_code == 200, response.text
+    assert (await client.get(f"/tasks/{task['id']}")).status_code == 404
+    feed = (await client.get("/tasks/changes", params={"since": since})).json()
+    assert [item["id"] for item in feed["deleted"]] == [task["id"]]
+    assert (await stats(client))["total"] == 0
+
+    task = await archived_task(client)
+    response = await client.post("/delete-tasks/", json=[task["id"]])
+    assert [item["id"] for item in response.json()["items"]] == [task["id"]]
+    assert (await stats(client))["total"] == 0
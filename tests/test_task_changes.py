@@ -0,0 +1,66 @@
+import anyio
+import pytest
+
+from src.database import async_session_maker
+from src.task_logic import task_repository
+from src.task_logic.task_schemas import TaskCreate
+
+pytestmark = pytest.mark.anyio
+
+TASK = {"title": "title", "description": "description"}
+# Время, за которое незаблокированная запись успела бы выполниться
+BLOCKED_FOR = 0.3
+
+
+async def changes(client, since: int) -> dict:
+    response = await client.get("/tasks/changes", params={"since": since})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+async def test_changes_feed(client):
+    since = (await client.get("/tasks/changes")).json()["next_since"]
+    first = (await client.post("/create-task/", json=TASK)).json()
+    second = (await client.post("/create-task/", json=TASK)).json()
+    await client.put(f"/update-task/{first['id']}", json={**TASK, "completed": True})
+    await client.delete(f"/delete-task/{second['id']}")
+
+    feed = await changes(client, since)
+    assert [task["id"] for task in feed["tasks"]] == [first["id"]]
+    assert feed["tasks"][0]["completed"] is True
+    assert [task["id"] for task in feed["deleted"]] == [second["id"]]
+    assert feed["next_since"] == feed["deleted"][0]["change_seq"] > feed["tasks"][0]["change_seq"]
+    assert (await changes(client, feed["next_since"]))["tasks"] == []
+
+
+# Запись, взявшая номер раньше, фиксируется позже соседней: соседняя ждет ее фиксации,
+# и номера идут в порядке фиксации — клиент не может прочитать больший номер раньше меньшего
+async def test_change_seq_follows_commit_order(client, other_client):
+    owner_id = client.user["id"]
+    task = (await client.post("/create-task/", json=TASK)).json()
+    since = (await changes(client, 0))["next_since"]
+    created = {}
+
+    async def create_concurrently():
+        async with async_session_maker() as db:
+            created["task"] = await task_repository.create_task(db, owner_id, TaskCreate(**TASK))
+            await db.commit()
+
+    async with async_session_maker() as slow:
+        updated = await task_repository.update_task(slow, task["id"], {**TASK, "completed": True})
+        async with anyio.create_task_group() as group:
+            group.start_soon(create_concurrently)
+            await anyio.sleep(BLOCKED_FOR)
+            assert "task" not in created
+            assert (await changes(client, since))["tasks"] == []
+
+            # Записи другого владельца не ждут
+            with anyio.fail_after(BLOCKED_FOR):
+                response = await other_client.post("/create-task/", json=TASK)
+            assert response.status_code == 200
+
+            await slow.commit()
+    assert created["task"]["change_seq"] > updated["change_seq"]
+
+    feed = await changes(client, since)
+    assert [change["id"] for change in feed["tasks"]] == [task["id"], created["task"]["id"]]
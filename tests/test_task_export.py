@@ -0,0 +1,133 @@
+import asyncio
+import json
+import os
+
+import pytest
+from sqlalchemy import text
+
+from src.database import engine
+from src.task_logic.task_archive import archive_completed_tasks
+
+pytestmark = pytest.mark.anyio
+
+ROWS = 1_000_000
+# Прирост RSS во время выгрузки. Список из миллиона задач в памяти занял бы
+# сотни мегабайт, потоковая выгрузка держит одну пачку TASK_EXPORT_BATCH_SIZE строк.
+RSS_BOUND_MB = 64
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+# Текущий RSS процесса (ru_maxrss — пик за всю жизнь процесса: его поднимают и
+# предыдущие тесты, и прирост при выгрузке он может не показать)
+def rss_mb() -> float:
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * PAGE_SIZE / 2**20
+
+
+async def generate_tasks(owner_id: int, rows: int) -> None:
+    async with engine.begin() as conn:
+        await conn.execute(text(
+            "INSERT INTO task (title, description, completed, owner_id) "
+            "SELECT 'task ' || g, 'generated for export test', g % 2 = 0, :owner_id "
+            "FROM generate_series(1, :rows) g"
+        ), {"rows": rows, "owner_id": owner_id})
+
+
+# Выгрузка вызовом приложения по ASGI: полученные куски тела только считаются
+# (httpx.ASGITransport накапливает ответ целиком и сам занял бы память)
+# sample вызывается на каждом куске тела: по нему тест снимает RSS во время выгрузки
+async def export(app, cookie: str, query: str, sample=lambda: None) -> tuple:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "https", "path": "/tasks/export", "raw_path": b"/tasks/export",
+        "query_string": query.encode(), "root_path": "",
+        "headers": [(b"host", b"test"), (b"cookie", f"access_token={cookie}".encode())],
+        "client": ("127.0.0.1", 0), "server": ("test", 443),
+    }
+    status, size, lines = None, 0, 0
+    request_sent = False
+    done = asyncio.Event()
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status, size, lines
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            body = message.get("body", b"")
+            sample()
+            size += len(body)
+            lines += body.count(b"\n")
+            if not message.get("more_body", False):
+                done.set()
+
+    await app(scope, receive, send)
+    return status, size, lines
+
+
+async def test_export_streams_with_bounded_memory(app, client):
+    await generate_tasks(client.user["id"], ROWS)
+    cookie = client.cookies["access_token"]
+
+    before = rss_mb()
+    peak = before
+
+    def sample():
+        nonlocal peak
+        peak = max(peak, rss_mb())
+
+    status, size, lines = await export(app, cookie, "format=ndjson", sample)
+    growth = peak - before
+
+    assert status == 200
+    assert lines == ROWS
+    assert size > 50 * 2**20
+    assert growth < RSS_BOUND_MB, f"RSS grew by {growth:.1f} MiB while exporting {size / 2**20:.0f} MiB"
+
+
+async def test_export_csv_with_completed_filter(client):
+    for i in range(3):
+        response = await client.post("/create-task/", json={"title": f"task {i}", "description": "d"})
+        task = response.json()
+    await client.put(f"/update-task/{task['id']}", json={"title": "done", "description": "d", "completed": True})
+
+    response = await client.get("/tasks/export", params={"format": "csv", "completed": "true"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    header, *rows = response.text.strip().splitlines()
+    assert header.startswith("id,")
+    assert len(rows) == 1 and rows[0].startswith(f"{task['id']},")
+
+    # Даты в CSV в том же виде, что и в NDJSON
+    response = await client.get("/tasks/export", params={"format": "ndjson", "completed": "true"})
+    updated_at = json.loads(response.text)["updated_at"]
+    assert "T" in updated_at
+    assert dict(zip(header.split(","), rows[0].split(",")))["updated_at"] == updated_at
+
+
+async def test_export_include_archived(client):
+    tasks = [(await client.post("/create-task/", json={"title": f"task {i}", "description": "d"})).json()
+             for i in range(3)]
+    old = tasks[1]
+    await client.put(f"/update-task/{old['id']}", json={"title": "old", "description": "d", "completed": True})
+    # Задача старше любого порога: переносится только она
+    async with engine.begin() as conn:
+        await conn.execute(text("UPDATE task SET updated_at = '2000-01-01' WHERE id = :id"), {"id": old["id"]})
+    assert await archive_completed_tasks(after_days=365 * 20, batch_size=100) == 1
+
+    response = await client.get("/tasks/export", params={"format": "ndjson"})
+    assert [json.loads(line)["id"] for line in response.text.splitlines()] == [tasks[0]["id"], tasks[2]["id"]]
+
+    response = await client.get("/tasks/export", params={"format": "ndjson", "include_archived": "true"})
+    exported = [json.loads(line) for line in response.text.splitlines()]
+    # Архивные задачи — после задач из task
+    assert [task["id"] for task in exported] == [tasks[0]["id"], tasks[2]["id"], old["id"]]
+    assert exported[2]["title"] == "old" and exported[2]["completed"] is True
+
@@ -0,0 +1,107 @@
+import json
+from typing import AsyncIterator, List
+
+import pytest
+from fastapi import HTTPException
+
+from src.config import settings
+from src.task_logic.task_import import iter_lines, limit_size, parse_csv, parse_ndjson
+
+pytestmark = pytest.mark.anyio
+
+
+async def stream(*chunks: bytes) -> AsyncIterator[bytes]:
+    for chunk in chunks:
+        yield chunk
+
+
+async def collect(items) -> List:
+    return [item async for item in items]
+
+
+async def test_lines_are_split_across_chunks():
+    lines = await collect(iter_lines(stream(b"first\r\nsec", b"ond\n", b"third"), max_line=100))
+    assert lines == [(1, "first"), (2, "second"), (3, "third")]
+
+
+async def test_long_line_becomes_error_without_buffering():
+    # Строка без перевода длиной 1000 пачек: хвост не растет дальше max_line
+    chunks = [b"short\n"] + [b"x" * 64] * 1000 + [b"\nnext\n"]
+    lines = await collect(iter_lines(stream(*chunks), max_line=256))
+    assert lines[0] == (1, "short")
+    assert lines[1][0] == 2 and isinstance(lines[1][1], ValueError)
+    assert lines[2] == (3, "next")
+
+
+async def test_long_last_line_is_reported():
+    lines = await collect(iter_lines(stream(b"ok\n", b"y" * 300), max_line=256))
+    assert lines[0] == (1, "ok")
+    assert lines[1][0] == 2 and isinstance(lines[1][1], ValueError)
+
+
+async def test_long_line_is_a_per_line_error_in_both_formats():
+    ndjson = await collect(parse_ndjson(iter_lines(stream(b'{"a": 1}\n' + b"z" * 300 + b'\n{"b": 2}\n'), 256)))
+    assert ndjson[0] == (1, {"a": 1}) and ndjson[2] == (3, {"b": 2})
+    assert isinstance(ndjson[1][1], ValueError)
+
+    csv = await collect(parse_csv(iter_lines(stream(b"title,description\n" + b"z" * 300 + b"\nt,d\n"), 256)))
+    assert csv[0][0] == 2 and isinstance(csv[0][1], ValueError)
+    assert csv[1] == (3, {"title": "t", "description": "d"})
+
+
+async def test_invalid_utf8_is_a_per_line_error():
+    body = '{"title": "привет"}\n'.encode() + b'{"title": "\xd0"}\n' + b"\xff"
+    lines = await collect(iter_lines(stream(body[:13], body[13:]), 256))
+    assert lines[0] == (1, '{"title": "привет"}')
+    assert [line_no for line_no, _ in lines[1:]] == [2, 3]
+    assert all(isinstance(line, ValueError) for _, line in lines[1:])
+    assert str(lines[1][1]) == "Invalid UTF-8 at byte 12: invalid continuation byte"
+
+
+async def test_limit_size_rejects_oversized_body():
+    assert await collect(limit_size(stream(b"a" * 10, b"b" * 10), 20)) == [b"a" * 10, b"b" * 10]
+    with pytest.raises(HTTPException) as error:
+        await collect(limit_size(stream(b"a" * 10, b"b" * 11), 20))
+    assert error.value.status_code == 413
+
+
+def ndjson(*tasks) -> bytes:
+    return b"".join(json.dumps(task).encode() + b"\n" for task in tasks)
+
+
+async def test_import_reports_long_lines(client, monkeypatch):
+    monkeypatch.setattr(settings, "TASK_IMPORT_MAX_LINE_BYTES", 200)
+    body = ndjson({"title": "one", "description": "d"}) \
+        + json.dumps({"title": "long", "description": "x" * 500}).encode() + b"\n" \
+        + ndjson({"title": "three", "description": "d"})
+    response = await client.post("/import-tasks/", content=body)
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert result["imported"] == 2
+    assert result["errors"] == [{"line": 2, "detail": "Line is longer than 200 bytes"}]
+
+
+async def test_import_rejects_oversized_body(client, monkeypatch):
+    monkeypatch.setattr(settings, "TASK_IMPORT_MAX_BYTES", 1000)
+    body = ndjson(*({"title": f"task {i}", "description": "d"} for i in range(100)))
+
+    response = await client.post("/import-tasks/", content=body)
+    assert response.status_code == 413
+
+    # Без Content-Length (chunked) предел проверяется по мере чтения
+    response = await client.post("/import-tasks/", content=stream(body[:800], body[800:]))
+    assert response.status_code == 413
+
+    assert (await client.get("/tasks/stats")).json()["total"] == 0
+
+
+async def test_import_reports_invalid_utf8(client):
+    body = ndjson({"title": "one", "description": "d"}) \
+        + '{"title": "два", "description": "d"}\n'.encode("cp1251") \
+        + ndjson({"title": "three", "description": "d"})
+    response = await client.post("/import-tasks/", content=body)
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert result["imported"] == 2
+    assert [error["line"] for error in result["errors"]] == [2]
+    assert result["errors"][0]["detail"].startswith("Invalid UTF-8")
@@ -0,0 +1,141 @@
+from contextlib import contextmanager
+from typing import Iterator, List
+
+import pytest
+from sqlalchemy import event
+
+from src.config import settings
+from src.database import engine
+from src.task_logic.task_cache import task_cache
+
+pytestmark = pytest.mark.anyio
+
+TASK = {"title": "title", "description": "description"}
+
+
+# SQL-запросы, выполненные внутри блока (тем же хуком, что считает запросы для метрик)
+@contextmanager
+def count_statements() -> Iterator[List[str]]:
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
+# Пользователь загружается из базы при первом запросе и дальше берется из кэша:
+# после этого запросы маршрутов задач не включают аутентификацию
+@pytest.fixture
+async def authed(client):
+    response = await client.get("/tasks/stats")
+    assert response.status_code == 200
+    return client
+
+
+async def create(client, **fields) -> dict:
+    response = await client.post("/create-task/", json={**TASK, **fields})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+async def test_create_task_is_one_statement(authed):
+    with count_statements() as statements:
+        await create(authed)
+    assert len(statements) == 1, statements
+    assert statements[0].lstrip().upper().startswith("INSERT")
+
+
+async def test_read_task_is_one_statement(authed):
+    task = await create(authed)
+    await task_cache.clear()
+    with count_statements() as statements:
+        response = await authed.get(f"/tasks/{task['id']}")
+    assert response.status_code == 200
+    assert len(statements) == 1, statements
+
+
+async def test_update_task_is_one_statement(authed):
+    task = await create(authed)
+    with count_statements() as statements:
+        response = await authed.put(f"/update-task/{task['id']}", json={**TASK, "completed": True})
+    assert response.status_code == 200
+    assert response.json()["version"] == task["version"] + 1
+    assert len(statements) == 1, statements
+    # UPDATE задачи и возврат из архива — части одного оператора WITH
+    assert "UPDATE task" in statements[0]
+
+
+async def test_update_missing_task_is_one_statement(authed):
+    with count_statements() as statements:
+        response = await authed.put("/update-task/2147483647", json={**TASK, "completed": True})
+    assert response.status_code == 404
+    assert len(statements) == 1, statements
+
+
+async def test_delete_task_is_one_statement(authed):
+    task = await create(authed)
+    with count_statements() as statements:
+        response = await authed.delete(f"/delete-task/{task['id']}")
+    assert response.status_code == 200
+    assert len(statements) == 1, statements
+
+    with count_statements() as statements:
+        response = await authed.delete(f"/delete-task/{task['id']}")
+    assert response.status_code == 404
+    assert len(statements) == 1, statements
+
+
+async def test_batch_routes_are_one_statement_each(authed):
+    with count_statements() as statements:
+        response = await authed.post("/create-tasks/", json=[{**TASK, "title": f"task {i}"} for i in range(5)])
+    assert response.status_code == 200
+    assert len(statements) == 1, statements
+    ids = [task["id"] for task in response.json()["items"]]
+
+    with count_statements() as statements:
+        response = await authed.put("/update-tasks/", json=[
+            {"id": task_id, **TASK, "completed": True} for task_id in ids
+        ])
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == 5
+    assert len(statements) == 1, statements
+
+    with count_statements() as statements:
+        response = await authed.post("/delete-tasks/", json=ids)
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == 5
+    assert len(statements) == 1, statements
+
+
+async def test_create_tasks_reports_invalid_items(authed):
+    with count_statements() as statements:
+        response = await authed.post("/create-tasks/", json=[
+            {**TASK, "title": "valid"}, {"title": "no description"}, "not an object", {**TASK, "title": "also valid"},
+        ])
+    assert response.status_code == 200
+    body = response.json()
+    assert [task["title"] for task in body["items"]] == ["valid", "also valid"]
+    assert [(error["index"], error["detail"]) for error in body["errors"]] == [
+        (1, "description: Field required"),
+        (2, "Input should be a valid dictionary or instance of TaskCreate"),
+    ]
+    assert len(statements) == 1, statements
+
+
+# Пакет длиннее TASK_BATCH_MAX_SIZE отклоняется при разборе тела, до запросов к БД
+@pytest.mark.parametrize("path, method, item", [
+    ("/create-tasks/", "POST", TASK),
+    ("/update-tasks/", "PUT", {"id": 1, **TASK, "completed": True}),
+    ("/delete-tasks/", "POST", 1),
+])
+async def test_batch_size_is_limited(authed, path, method, item):
+    with count_statements() as statements:
+        response = await authed.request(method, path, json=[item] * (settings.TASK_BATCH_MAX_SIZE + 1))
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["type"] == "too_long"
+    assert statements == []